@@ -17,25 +17,45 @@
 #
 #
 
+import asyncio
+import codecs
 import json
 import base64
 import gzip
 import zlib
 import re
-from datetime import datetime, timezone
+import os
+import time
 from asyncio.events import AbstractEventLoop
 from enum import Enum
 
-from typing import Dict, Tuple, List
+from typing import TYPE_CHECKING, Callable, Dict, Tuple, List, Iterator, Type
 from http.client import HTTPResponse
-from urllib.request import HTTPPasswordMgrWithDefaultRealm, HTTPBasicAuthHandler, Request, build_opener
-from urllib.parse import urlencode
-from io import BytesIO
+from urllib.request import HTTPPasswordMgrWithDefaultRealm, HTTPBasicAuthHandler, Request, build_opener, getproxies, \
+  proxy_bypass
+from urllib.parse import urlencode, urlsplit
 try:
   from urllib.request import URLError, HTTPError
 except ImportError:
   from urllib.error import URLError, HTTPError
 
+from .pool import CurlSession, ConnectionPool, _InstrumentedHTTPHandler, _InstrumentedHTTPSHandler
+from .aio import AsyncCurlSession, BufferedHTTPResponse, request as aio_request
+from .decoders import ContentDecoder, get_charset, split_lines
+from .cache import HttpCache, HttpCacheEntry, request_key
+from .retry import RetryPolicy, CircuitBreaker, CircuitOpenError, CircuitState
+from .cookies import CURLCookie, CookieJar
+from .dns import DnsCache
+from .metrics import RequestMetrics, RequestTimings, LatencyHistogram, HostLatencyAggregator, add_hook, remove_hook, \
+  current_metrics, _active_hooks, _begin as _begin_metrics, _finish as _finish_metrics
+
+if TYPE_CHECKING:  # apputils-json2obj is optional, views are only passed in by the caller
+  from ..json2obj import SerializableObject
+
+
+# charsets, for which json could be parsed directly from bytes
+_JSON_BYTES_CHARSETS = ("utf-8", "utf8", "us-ascii", "ascii")
+
 
 class CurlRequestType(Enum):
   GET = "GET"
@@ -44,90 +64,53 @@ class CurlRequestType(Enum):
   DELETE = "DELETE"
 
 
-class CURLCookie(object):
-  def __init__(self, name: str, value: str):
-    """
-    :param name: Name of the cookie set by "set-cookie"
-    :param value: Cookie value with all params separated by ";"
-    """
-    self.__EXPIRE_TIME_PATTERN = "%a, %d %b %Y %H:%M:%S %Z"
-
-    self.__name: str = name
-    self.__options: Dict[str, str] = {}
-    self.__value: str = ""
-    self.__expiry_date: datetime or None = None
-    if not value:
-      return
-
-    options = value.split(";")
-    if options:
-      self.__value = options[0]
-
-    options = options[1:]
-    if options:
-      self.__options = {s[0]: s[1] for line in options if "=" in line and (s := line.split("="))}
-
-    if "expires" in self.__options:
-      # at the moment we always assume that time are in GMT+0/UTC
-      self.__expiry_date = datetime.strptime(self.__options["expires"], self.__EXPIRE_TIME_PATTERN)
-
-  @property
-  def name(self) -> str:
-    return self.__name
-
-  @property
-  def value(self) -> str:
-    return self.__value
-
-  @property
-  def options(self) -> Dict[str, str]:
-    return self.__options
-
-  @property
-  def is_expired(self) -> bool:
-    if self.__expiry_date:
-      return datetime.now(tz=timezone.utc) > self.__expiry_date
-
-    return False
-
-  def __str__(self):
-    return f"{self.__name}={self.__value}"
-
-
 class CURLResponse(object):
-  def __init__(self, director_open_result: HTTPResponse or HTTPError, is_stream: bool = False):
+  def __init__(self, director_open_result: HTTPResponse or HTTPError or BufferedHTTPResponse, is_stream: bool = False):
     self._code: int = director_open_result.getcode()
+    self._reason: str = getattr(director_open_result, "reason", "")
     self._headers = director_open_result.info()
     self._is_stream = is_stream
     self._director_result = director_open_result
+    self._cookies: Dict[str, CURLCookie] or None = None
+    self._metrics: RequestMetrics or None = None
+    self._charset: str or None = None
+    self._body: bytes or None = None
+    self._text: str or None = None
 
     if not self._is_stream:
       self._content = director_open_result.read()
 
-  def __decode_response(self, data: bytes or str) -> str:
-    data = self.__decode_compressed(data)
-    if isinstance(data, bytes) and "Content-Type" in self._headers and "charset" in self._headers["Content-Type"]:
-      charset = list(filter(lambda x: "charset" in x, self._headers["Content-Type"].split(';')))
-      if len(charset) > 0:
-        charset = charset[0].split('=')
-        if len(charset) == 2:
-          return data.decode(charset[1].lower())
-      return data.decode('utf-8')
-    elif isinstance(data, bytes):
-      return data.decode('utf-8')
-    else:
-      return data
-
   def __decode_compressed(self, data: bytes or str):
     if isinstance(data, bytes) and "Content-Encoding" in self._headers:
-
-      if "gzip" in self._headers["Content-Encoding"] or 'x-gzip' in self._headers["Content-Encoding"]:
-        data = gzip.GzipFile(fileobj=BytesIO(data)).read()
-      elif "deflate" in self._headers["Content-Encoding"]:
-        data = zlib.decompress(data)
+      decoder = ContentDecoder(self._headers["Content-Encoding"])
+      if not decoder.is_passthrough:
+        data = b"".join(decoder.decode([data]))
 
     return data
 
+  @property
+  def charset(self) -> str:
+    """
+    :return: charset of the response from the "Content-Type" header, utf-8 by default
+    """
+    if self._charset is None:
+      self._charset = get_charset(self._headers.get("Content-Type"))
+
+    return self._charset
+
+  @property
+  def body(self) -> bytes:
+    """
+    :return: decompressed, but not decoded content of the response, the result is cached
+    """
+    if self._is_stream:
+      raise TypeError("Stream content could be obtained only via raw property")
+
+    if self._body is None:
+      self._body = self.__decode_compressed(self._content)
+
+    return self._body
+
   @property
   def code(self):
     """
@@ -135,6 +118,13 @@ class CURLResponse(object):
     """
     return self._code
 
+  @property
+  def reason(self) -> str:
+    """
+    :return: HTTP Response reason phrase
+    """
+    return self._reason
+
   @property
   def headers(self):
     """
@@ -142,16 +132,34 @@ class CURLResponse(object):
     """
     return self._headers
 
+  @property
+  def metrics(self) -> RequestMetrics or None:
+    """
+    :return: timings and transferred bytes of the request, available if instrumentation hooks are registered
+    """
+    return self._metrics
+
+  def _attach_metrics(self, metrics: RequestMetrics):
+    self._metrics = metrics
+    metrics.code = self._code
+    if not self._is_stream and isinstance(self._content, bytes):
+      metrics.bytes_received = len(self._content)
+      metrics.bytes_decoded = len(self.body)
+
   @property
   def content(self):
     """
-    :return: Text content of the response (unzipped and decoded)
+    :return: Text content of the response (unzipped and decoded), the result is cached
     """
-    if not self._is_stream:
-      return self.__decode_response(self._content)
-    else:
+    if self._is_stream:
       raise TypeError("Stream content could be obtained only via raw property")
 
+    if self._text is None:
+      body = self.body
+      self._text = body.decode(self.charset) if isinstance(body, bytes) else body
+
+    return self._text
+
   @property
   def raw(self) -> str or HTTPResponse:
     """
@@ -159,6 +167,88 @@ class CURLResponse(object):
     """
     return self._director_result if self._is_stream else self._content
 
+  def __iter_raw(self, chunk_size: int) -> Iterator[bytes]:
+    if self._is_stream:
+      read = self._director_result.read
+      while True:
+        chunk = read(chunk_size)
+        if not chunk:
+          break
+        yield chunk
+    else:
+      data = memoryview(self._content)
+      for pos in range(0, len(data), chunk_size):
+        yield data[pos:pos + chunk_size]
+
+  def iter_content(self, chunk_size: int = 64 * 1024, decode_unicode: bool = False) -> Iterator[bytes or str]:
+    """
+    Iterate over the response body, gzip/deflate content is decompressed on the fly.
+    Works for both streamed and not streamed responses, stream could be iterated only once.
+
+    :param chunk_size: amount of bytes to read at once, decompressed pieces are not bigger than that
+    :param decode_unicode: decode content to str using response charset
+    """
+    decoder = ContentDecoder(self._headers.get("Content-Encoding"))
+    chunks = decoder.decode(self.__iter_raw(chunk_size), chunk_size)
+
+    if not decode_unicode:
+      yield from (bytes(chunk) for chunk in chunks) if decoder.is_passthrough else chunks
+      return
+
+    text_decoder = codecs.getincrementaldecoder(get_charset(self._headers.get("Content-Type")))()
+    for chunk in chunks:
+      text = text_decoder.decode(chunk)
+      if text:
+        yield text
+
+    text = text_decoder.decode(b"", final=True)
+    if text:
+      yield text
+
+  def iter_lines(self, chunk_size: int = 64 * 1024, decode_unicode: bool = True,
+                 delimiter: str or bytes = None) -> Iterator[str or bytes]:
+    """
+    Iterate over the response body line by line, memory usage is bounded by the longest line
+
+    :param chunk_size: amount of bytes to read at once
+    :param decode_unicode: yield str lines instead of bytes
+    :param delimiter: line delimiter, by default new line ("\n" or "\r\n")
+    """
+    yield from split_lines(self.iter_content(chunk_size, decode_unicode), delimiter)
+
+  def iter_ndjson(self, clazz: Type['SerializableObject'] = None,
+                  chunk_size: int = 64 * 1024) -> Iterator[dict or list or 'SerializableObject']:
+    """
+    Iterate over newline-delimited JSON (NDJSON, JSON lines) response record by record. Content is decompressed
+    on the fly, so memory usage is bounded by the largest record. Blank lines are skipped.
+
+    Example:
+
+      r = curl("https://example.com/export.ndjson", use_stream=True)
+      for item in r.iter_ndjson(ItemView):
+        ...
+
+    :param clazz: SerializableObject subclass to map every record to
+    :param chunk_size: amount of bytes to read at once
+    :raises ValueError: if record is not a valid JSON or doesn't fit the view
+    """
+    as_bytes = self.charset.replace("_", "-") in _JSON_BYTES_CHARSETS
+    for line_no, line in enumerate(self.iter_lines(chunk_size, decode_unicode=not as_bytes), start=1):
+      if not line.strip():
+        continue
+
+      try:
+        record = json.loads(line)
+      except ValueError as e:
+        raise ValueError(f"Invalid JSON record at line {line_no}: {e}") from e
+
+      if clazz is None:
+        yield record
+      elif isinstance(record, dict):
+        yield clazz(serialized_obj=record)
+      else:
+        raise ValueError(f"Expected JSON object at line {line_no}, got '{type(record).__name__}'")
+
   def from_json(self):
     """
     :return: Return parsed json object from the response, if possible.
@@ -167,16 +257,51 @@ class CURLResponse(object):
     :rtype dict
     """
     try:
-      return json.loads(self.content)
+      return self.__parse_json()
     except ValueError:
       return None
 
+  def __parse_json(self):
+    """
+    UTF-8 bodies are parsed directly from bytes (json detects utf-8/16/32 itself), others are decoded first
+    """
+    if self._text is None and self.charset.replace("_", "-") in _JSON_BYTES_CHARSETS:
+      return json.loads(self.body)
+
+    return json.loads(self.content)
+
+  def to_object(self, clazz: Type['SerializableObject']) -> 'SerializableObject' or List['SerializableObject']:
+    """
+    Parse JSON response directly to the SerializableObject view, list of views is returned for JSON arrays
+
+    Example:
+
+      class ItemView(SerializableObject):
+        id: int = 0
+        name: str = ""
+
+      items = curl("https://example.com/api/items").to_object(ItemView)
+
+    :param clazz: SerializableObject subclass to populate
+    :raises ValueError: if response is not a valid JSON object or array of objects, or doesn't fit the view
+    """
+    data = self.__parse_json()
+    if isinstance(data, dict):
+      return clazz(serialized_obj=data)
+    elif isinstance(data, list):
+      return [clazz(serialized_obj=item) for item in data]
+
+    raise ValueError(f"Expected JSON object or array in response, got '{type(data).__name__}'")
+
   def response_cookies(self) -> Dict[str, CURLCookie]:
-    return {
-      value[0]: CURLCookie(*value)
-      for item in self._headers.items()
-      if item[0].lower() == "set-cookie" and (value := item[1].split("=", maxsplit=1))
-    }
+    if self._cookies is None:
+      self._cookies = {
+        value[0]: CURLCookie(*value)
+        for item in self._headers.items()
+        if item[0].lower() == "set-cookie" and (value := item[1].split("=", maxsplit=1))
+      }
+
+    return self._cookies
 
 
 class CURLAuth(object):
@@ -240,7 +365,71 @@ def __detect_str_type(data) -> str:
     return "plain/text"
 
 
-def __parse_content(data) -> Tuple[bytes, Dict[str, str]]:
+def __is_stream(data) -> bool:
+  return hasattr(data, "read") or hasattr(data, "__aiter__") or \
+         (hasattr(data, "__iter__") and
+          not isinstance(data, (str, bytes, bytearray, memoryview, dict, list, set, tuple)))
+
+
+def __stream_size(f) -> int or None:
+  """
+  :return: amount of bytes left in the file object or None if it couldn't be determined
+  """
+  try:
+    return os.fstat(f.fileno()).st_size - f.tell()
+  except (AttributeError, OSError, ValueError):
+    pass
+
+  try:
+    pos = f.tell()
+    size = f.seek(0, os.SEEK_END) - pos
+    f.seek(pos)
+    return size
+  except (AttributeError, OSError, ValueError):
+    return None
+
+
+def __iter_stream(data, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+  if hasattr(data, "read"):
+    while True:
+      chunk = data.read(chunk_size)
+      if not chunk:
+        break
+      yield __encode_str(chunk) if isinstance(chunk, str) else chunk
+  else:
+    for chunk in data:
+      if chunk:
+        yield __encode_str(chunk) if isinstance(chunk, str) else chunk
+
+
+def __gzip_stream(data) -> Iterator[bytes]:
+  compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+  for chunk in __iter_stream(data):
+    out = compressor.compress(chunk)
+    if out:
+      yield out
+
+  yield compressor.flush()
+
+
+def __body_rewinder(data) -> Callable[[], None] or None:
+  """
+  :return: callable which prepares request body to be sent again, None if body couldn't be re-sent
+  """
+  if data is None or not __is_stream(data):
+    return lambda: None
+
+  try:
+    pos = data.tell()  # only seekable file objects are passed as is
+    return lambda: data.seek(pos)
+  except (AttributeError, OSError, ValueError):
+    return None
+
+
+def __parse_content(data, compress_body: bool = False) -> Tuple[bytes or object, Dict[str, str], int or None]:
+  """
+  :return: request body, content headers and body length, None length means that body should be sent in chunks
+  """
   if isinstance(data, dict) or isinstance(data, list) or isinstance(data, set) or isinstance(data, tuple):
     response_data = __encode_str(json.dumps(data))
     response_headers = {"Content-Type": "application/json; charset=UTF-8"}
@@ -249,41 +438,37 @@ def __parse_content(data) -> Tuple[bytes, Dict[str, str]]:
     response_headers = {
       "Content-Type": f"{__detect_str_type(data)}; charset=UTF-8"
     }
+  elif __is_stream(data):
+    if hasattr(data, "__aiter__"):
+      if compress_body:
+        raise ValueError("Request body compression is not supported for async iterables")
+      return data, {}, None
+
+    if compress_body:
+      return __gzip_stream(data), {"Content-Encoding": "gzip"}, None
+
+    if hasattr(data, "read"):
+      size = __stream_size(data)
+      # binary file objects are streamed by the http.client as is
+      return data if size is not None else __iter_stream(data), {}, size
+
+    return __iter_stream(data), {}, None
   else:
     response_data = data
     response_headers = {}
 
-  return response_data, response_headers
+  if compress_body:
+    response_data = gzip.compress(response_data)
+    response_headers["Content-Encoding"] = "gzip"
 
-
-async def curl_async(loop: AbstractEventLoop, url: str, params: Dict[str, str] = None, auth: CURLAuth = None,
-                     req_type: CurlRequestType = CurlRequestType.GET, data: str or bytes or dict = None,
-                     headers: Dict[str, str] = None, cookies: List[CURLCookie] = None,
-                     timeout: int = None, use_gzip: bool = True, use_stream: bool = False) -> CURLResponse:
-  return await loop.run_in_executor(
-    None,
-    lambda: curl(url, params, auth, req_type, data, headers, cookies, timeout, use_gzip, use_stream)
-  )
+  return response_data, response_headers, memoryview(response_data).nbytes
 
 
-def curl(url: str, params: Dict[str, str] = None, auth: CURLAuth = None,
-         req_type: CurlRequestType = CurlRequestType.GET, data: str or bytes or dict = None,
-         headers: Dict[str, str] = None, cookies: List[CURLCookie] = None, timeout: int = None, use_gzip: bool = True,
-         use_stream: bool = False) -> CURLResponse:
+def __prepare_request(url: str, params: Dict[str, str] or None, auth: CURLAuth or None, req_type: CurlRequestType,
+                      data, headers: Dict[str, str] or None, cookies: List[CURLCookie] or CookieJar or None,
+                      use_gzip: bool, compress_body: bool = False) -> Tuple[str, Dict[str, str], bytes or None]:
   """
-  Make request to web resource
-
-  :param cookies: list of cookies to send alongside with the request
-  :param url: Url to endpoint
-  :param params: list of params after "?"
-  :param auth: authorization tokens
-  :param req_type: column_type of the request
-  :param data: data which need to be posted
-  :param headers: headers which would be posted with request
-  :param timeout: Request timeout
-  :param use_gzip: Accept gzip and deflate response from the server
-  :param use_stream: Do not parse content of response ans stream it via raw property
-  :return Response object
+  :return: url, headers and request body
   """
   post_req = [CurlRequestType.POST, CurlRequestType.PUT]
   get_req = [CurlRequestType.GET, CurlRequestType.DELETE]
@@ -295,16 +480,15 @@ def curl(url: str, params: Dict[str, str] = None, auth: CURLAuth = None,
     raise IOError("Wrong request column_type \"%s\" passed" % req_type)
 
   _headers = {}
-  handler_chain = []
-  req_args = {
-    "headers": _headers
-  }
+  _data = None
 
   if req_type in post_req and data is not None:
-    _data, __header = __parse_content(data)
+    _data, __header, size = __parse_content(data, compress_body)
     _headers.update(__header)
-    _headers["Content-Length"] = len(_data)
-    req_args["data"] = _data
+    if size is not None:
+      _headers["Content-Length"] = size
+    else:
+      _headers["Transfer-Encoding"] = "chunked"
 
   if use_gzip:
     if "Accept-Encoding" in _headers:
@@ -313,35 +497,236 @@ def curl(url: str, params: Dict[str, str] = None, auth: CURLAuth = None,
     else:
       _headers["Accept-Encoding"] = "gzip, x-gzip, deflate"
 
-  if auth is not None and auth.force is False:
-    manager = HTTPPasswordMgrWithDefaultRealm()
-    manager.add_password("", url, auth.user, auth.password)
-    handler_chain.append(HTTPBasicAuthHandler(manager))
-
   if auth is not None and auth.force:
     _headers.update(auth.headers)
 
   if headers is not None:
     _headers.update(headers)
-
-  if cookies and _headers:
+    if "Content-Length" in headers:
+      _headers.pop("Transfer-Encoding", None)
+
+  if isinstance(cookies, CookieJar):
+    cookie_header = cookies.header_for(url)
+    if cookie_header:
+      _headers["cookie"] = f"{cookie_header}; {_headers['cookie']}" if "cookie" in _headers else cookie_header
+  elif cookies and _headers:
     temp_cookies: List[str] = list([str(cookie) for cookie in cookies if not cookie.is_expired])
     if "cookie" in _headers:
       temp_cookies.extend(_headers["cookie"].split("; "))
 
     _headers["cookie"] = "; ".join(temp_cookies)
 
-  director = build_opener(*handler_chain)
+  return url, _headers, _data
+
+
+def __uses_proxy(url: str) -> bool:
+  """
+  Check if the request should go via proxy from the environment (http_proxy, https_proxy, no_proxy)
+  """
+  parts = urlsplit(url)
+  return parts.scheme.lower() in getproxies() and not proxy_bypass(parts.hostname or "")
+
+
+async def curl_async(loop: AbstractEventLoop, url: str, params: Dict[str, str] = None, auth: CURLAuth = None,
+                     req_type: CurlRequestType = CurlRequestType.GET, data: str or bytes or dict = None,
+                     headers: Dict[str, str] = None, cookies: List[CURLCookie] or CookieJar = None,
+                     timeout: int = None, use_gzip: bool = True, use_stream: bool = False,
+                     session: CurlSession or AsyncCurlSession = None, retry: RetryPolicy = None,
+                     compress_body: bool = False, dns_cache: DnsCache = None) -> CURLResponse:
+  """
+  Make request to web resource using asyncio transport, arguments are the same as for the curl() call.
+
+  Requests with use_stream=True or routed via CurlSession would be executed by curl() in the loop executor,
+  as the resulting stream is a blocking one. AsyncCurlSession connections are not used for them, while its
+  cookie jar, retry policy and dns cache are.
+
+  asyncio transport doesn't go through the urllib handlers, so requests which should be sent via proxy
+  from the environment (http_proxy, https_proxy, no_proxy) are executed by curl() in the loop executor as well.
+
+  :param session: AsyncCurlSession to re-use keep-alive connections or CurlSession to run blocking curl() with
+  :param retry: retry policy, by default the one of the session is used
+  """
+  if use_stream or isinstance(session, CurlSession) or __uses_proxy(url):
+    if isinstance(session, AsyncCurlSession):  # its connections belong to the event loop
+      cookies = session.cookie_jar if cookies is None else cookies
+      retry = session.retry if retry is None else retry
+      dns_cache = session.dns_cache if dns_cache is None else dns_cache
+      session = None
+
+    return await loop.run_in_executor(
+      None,
+      lambda: curl(url, params, auth, req_type, data, headers, cookies, timeout, use_gzip, use_stream, session,
+                   retry=retry, compress_body=compress_body, dns_cache=dns_cache)
+    )
+
+  if cookies is None and session is not None:
+    cookies = session.cookie_jar
+
+  url, _headers, _data = __prepare_request(url, params, auth, req_type, data, headers, cookies, use_gzip,
+                                           compress_body)
+  if retry is None and session is not None:
+    retry = session.retry
+
+  rewind = __body_rewinder(_data)
+  can_resend = rewind is not None
+  if not can_resend:  # streamed body could be sent only once
+    retry, rewind = None, lambda: None
+
+  hooks = _active_hooks(session.hooks if session is not None else None)
+
+  async def _open() -> CURLResponse:
+    metrics = _begin_metrics(req_type.value, url) if hooks else None
+    try:
+      try:
+        rewind()
+        r = await aio_request(req_type.value, url, _headers, _data, session, timeout, dns_cache)
+        if r.getcode() == 401 and auth is not None and not auth.force and can_resend:  # HTTP 401 challenge
+          rewind()
+          _headers.update(auth.get_auth_header())
+          r = await aio_request(req_type.value, url, _headers, _data, session, timeout, dns_cache)
+      except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        raise TimeoutError
+
+      response = CURLResponse(r)
+    except BaseException as e:
+      if metrics is not None:
+        metrics.error = e
+        _finish_metrics(metrics, hooks)
+      raise
+
+    if metrics is not None:
+      response._attach_metrics(metrics)
+      _finish_metrics(metrics, hooks)
+
+    return response
+
+  response = await retry.call_async(req_type.value, url, _open) if retry else await _open()
+
+  if isinstance(cookies, CookieJar):
+    cookies.extract(url, response.headers)
+
+  return response
+
+
+def curl(url: str, params: Dict[str, str] = None, auth: CURLAuth = None,
+         req_type: CurlRequestType = CurlRequestType.GET, data: str or bytes or dict = None,
+         headers: Dict[str, str] = None, cookies: List[CURLCookie] or CookieJar = None, timeout: int = None,
+         use_gzip: bool = True,
+         use_stream: bool = False, session: CurlSession = None, cache: HttpCache = None,
+         retry: RetryPolicy = None, compress_body: bool = False, dns_cache: DnsCache = None) -> CURLResponse:
+  """
+  Make request to web resource
+
+  :param cookies: list of cookies to send alongside with the request or cookie jar, which also receives
+                  cookies set by the response. If not set, cookie jar of the session is used
+  :param url: Url to endpoint
+  :param params: list of params after "?"
+  :param auth: authorization tokens
+  :param req_type: column_type of the request
+  :param data: data which need to be posted: str, bytes, dict/list (sent as json), binary file object,
+               iterable or generator. Sized files are streamed with "Content-Length", other streams are sent
+               with "Transfer-Encoding: chunked", so the body is never buffered in the memory.
+  :param headers: headers which would be posted with request
+  :param timeout: Request timeout
+  :param use_gzip: Accept gzip and deflate response from the server
+  :param use_stream: Do not parse content of response ans stream it via raw property
+  :param session: keep-alive connection pool to send request through
+  :param cache: http cache to serve not streamed GET requests from
+  :param retry: retry policy, by default the one of the session is used. Bodies from iterables and generators
+                could be sent only once, so such requests are not retried
+  :param compress_body: compress request body with gzip and send it with "Content-Encoding: gzip"
+  :param dns_cache: resolved host names cache for the requests without session, session uses its own one
+  :return Response object
+  """
+  if cookies is None and session is not None:
+    cookies = session.cookie_jar
+
+  url, _headers, _data = __prepare_request(url, params, auth, req_type, data, headers, cookies, use_gzip,
+                                           compress_body)
+  use_cache = cache is not None and req_type == CurlRequestType.GET and not use_stream
+  cache_entry: HttpCacheEntry or None = None
+
+  if use_cache:
+    # challenge auth header is added by the handler, while the response still belongs to the auth user
+    key_headers = dict(_headers, **auth.get_auth_header()) if auth is not None and not auth.force else _headers
+    cache_key = request_key(url, key_headers)
+    cache_entry, is_fresh = cache.lookup(cache_key)
+    if is_fresh:
+      return CURLResponse(cache_entry.to_response(url))
+    if cache_entry is not None:
+      _headers.update(cache_entry.validators)
+
+  handler_chain = []
+  req_args = {
+    "headers": _headers
+  }
+
+  if _data is not None:
+    req_args["data"] = _data
+
+  if auth is not None and auth.force is False:
+    manager = HTTPPasswordMgrWithDefaultRealm()
+    manager.add_password("", url, auth.user, auth.password)
+    handler_chain.append(HTTPBasicAuthHandler(manager))
+
+  hooks = _active_hooks(session.hooks if session is not None else None)
+  if (hooks or dns_cache is not None) and session is None:
+    handler_chain.extend([_InstrumentedHTTPHandler(dns_cache), _InstrumentedHTTPSHandler(dns_cache)])
+
+  director = session.build_opener(*handler_chain) if session else build_opener(*handler_chain)
   req = Request(url, **req_args)
   req.get_method = lambda: req_type.value
 
-  try:
-    if timeout is not None:
-      return CURLResponse(director.open(req, timeout=timeout), is_stream=use_stream)
-    else:
-      return CURLResponse(director.open(req), is_stream=use_stream)
-  except URLError or HTTPError as e:
-    if isinstance(e, HTTPError):
-      return CURLResponse(e, is_stream=use_stream)
-    else:
-      raise TimeoutError
+  if retry is None and session is not None:
+    retry = session.retry
+
+  rewind = __body_rewinder(_data)
+  can_resend = rewind is not None
+  if not can_resend:  # streamed body could be sent only once
+    retry, rewind = None, lambda: None
+
+  def _open() -> CURLResponse:
+    rewind()
+    metrics = _begin_metrics(req_type.value, url) if hooks else None
+    try:
+      try:
+        if timeout is not None:
+          r = director.open(req, timeout=timeout)
+        else:
+          r = director.open(req)
+      except URLError or HTTPError as e:
+        if isinstance(e, HTTPError):
+          r = e
+        else:
+          raise TimeoutError
+
+      headers_at = time.perf_counter()
+      response = CURLResponse(r, is_stream=use_stream)
+    except BaseException as e:
+      if metrics is not None:
+        metrics.error = e
+        _finish_metrics(metrics, hooks)
+      raise
+
+    if metrics is not None:
+      response._attach_metrics(metrics)
+      _finish_metrics(metrics, hooks, headers_at)
+
+    return response
+
+  response = retry.call(req_type.value, url, _open) if retry else _open()
+
+  if isinstance(cookies, CookieJar):
+    cookies.extract(url, response.headers)
+
+  if use_cache:
+    cache_entry = cache.store(cache_key, cache_entry, response.code, response.reason, response.headers, response.raw)
+    if cache_entry is not None:  # 304 Not Modified
+      return CURLResponse(cache_entry.to_response(url))
+
+  return response
+
+
+# helpers built on top of the curl() and curl_async() calls
+from .batch import CurlBatchStats, curl_many, curl_many_async
+from .download import curl_download, curl_download_parallel
@@ -0,0 +1,481 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import asyncio
+import socket
+import ssl
+import sys
+import time
+
+from typing import Callable, Dict, List, Tuple
+from http.client import HTTPMessage, parse_headers
+from urllib.parse import urlsplit, urljoin
+from io import BytesIO
+
+from .retry import RetryPolicy
+from .cookies import CookieJar
+from .metrics import RequestMetrics, current_metrics
+from .dns import DnsCache
+
+
+_DEFAULT_PORTS: Dict[str, int] = {"http": 80, "https": 443}
+_USER_AGENT: str = f"Python-urllib/{sys.version_info[0]}.{sys.version_info[1]}"
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS: int = 10
+_BODY_HEADERS = ("content-length", "content-type", "content-encoding", "transfer-encoding")
+
+
+class BufferedHTTPResponse(object):
+  """
+  Fully read response (asyncio transport, http cache), exposes the same subset of the HTTPResponse API
+  which is used by CURLResponse
+  """
+
+  def __init__(self, url: str, status: int, reason: str, headers: HTTPMessage, body: bytes):
+    self.url: str = url
+    self.status: int = status
+    self.reason: str = reason
+    self.headers: HTTPMessage = headers
+    self.msg: str = reason
+    self.__body: BytesIO = BytesIO(body)
+
+  def getcode(self) -> int:
+    return self.status
+
+  def geturl(self) -> str:
+    return self.url
+
+  def info(self) -> HTTPMessage:
+    return self.headers
+
+  def read(self, amt: int = None) -> bytes:
+    return self.__body.read(amt)
+
+
+class _AsyncConnection(object):
+  def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    self.reader: asyncio.StreamReader = reader
+    self.writer: asyncio.StreamWriter = writer
+    self.requests: int = 0
+    self.last_used: float = time.monotonic()
+
+  @property
+  def is_dropped(self) -> bool:
+    return self.reader.at_eof() or self.writer.is_closing()
+
+  def close(self):
+    self.writer.close()
+
+
+class AsyncCurlSession(object):
+  """
+  Pool of keep-alive connections for the asyncio transport of curl_async.
+
+  Connections are bound to the event loop they were created in, so session should not be shared across loops.
+
+  Example:
+
+    async with AsyncCurlSession() as session:
+      responses = await asyncio.gather(*[curl_async(loop, url, session=session) for url in urls])
+  """
+
+  def __init__(self, pool_size: int = 10, idle_timeout: float = 60.0, max_requests: int = 100,
+               ssl_context: ssl.SSLContext = None, retry: RetryPolicy = None, cookie_jar: CookieJar = None,
+               hooks: List[Callable[[RequestMetrics], None]] = None, dns_cache: DnsCache = None):
+    """
+    :param pool_size: max amount of idle keep-alive connections per (scheme, host, port)
+    :param idle_timeout: seconds after which not used connection would be closed
+    :param max_requests: max amount of requests to send via one connection, 0 - unlimited
+    :param ssl_context: SSL context to use for https connections
+    :param retry: default retry policy for requests sent via the session
+    :param cookie_jar: cookie jar to use for requests sent via the session without explicit cookies
+    :param hooks: instrumentation hooks for requests sent via the session, in addition to the global ones
+    :param dns_cache: cache of the resolved host names for the new connections
+    """
+    self._dns_cache: DnsCache or None = dns_cache
+    self._hooks: List[Callable[[RequestMetrics], None]] = list(hooks) if hooks else []
+    self._cookie_jar: CookieJar or None = cookie_jar
+    self._retry: RetryPolicy or None = retry
+    self._pool_size: int = pool_size
+    self._idle_timeout: float = idle_timeout
+    self._max_requests: int = max_requests
+    self._ssl_context: ssl.SSLContext or None = ssl_context
+    self._connections: Dict[Tuple[str, str, int], List[_AsyncConnection]] = {}
+    self._created: int = 0
+    self._reused: int = 0
+
+  @property
+  def created(self) -> int:
+    return self._created
+
+  @property
+  def reused(self) -> int:
+    return self._reused
+
+  @property
+  def max_requests(self) -> int:
+    return self._max_requests
+
+  @property
+  def retry(self) -> RetryPolicy or None:
+    return self._retry
+
+  @property
+  def cookie_jar(self) -> CookieJar or None:
+    return self._cookie_jar
+
+  @property
+  def hooks(self) -> List[Callable[[RequestMetrics], None]]:
+    return self._hooks
+
+  @property
+  def dns_cache(self) -> DnsCache or None:
+    return self._dns_cache
+
+  @property
+  def ssl_context(self) -> ssl.SSLContext or None:
+    return self._ssl_context
+
+  def _acquire(self, key: Tuple[str, str, int]) -> _AsyncConnection or None:
+    connections = self._connections.get(key)
+    now = time.monotonic()
+    while connections:
+      conn = connections.pop()
+      if now - conn.last_used > self._idle_timeout or conn.is_dropped:
+        conn.close()
+        continue
+
+      self._reused += 1
+      return conn
+
+    return None
+
+  def _release(self, key: Tuple[str, str, int], conn: _AsyncConnection):
+    connections = self._connections.setdefault(key, [])
+    if len(connections) >= self._pool_size or conn.is_dropped:
+      conn.close()
+      return
+
+    conn.last_used = time.monotonic()
+    connections.append(conn)
+
+  def close(self):
+    for connections in self._connections.values():
+      for conn in connections:
+        conn.close()
+    self._connections.clear()
+
+  async def __aenter__(self):
+    return self
+
+  async def __aexit__(self, exc_type, exc_val, exc_tb):
+    self.close()
+
+
+async def _open_resolved_connection(scheme: str, host: str, port: int, ssl_context: ssl.SSLContext or None,
+                                    metrics: RequestMetrics or None, dns_cache: DnsCache or None) -> _AsyncConnection:
+  """
+  Open connection with optionally cached name resolution and separately measured resolution, connect and
+  tls handshake phases. Addresses are tried in the resolved order until one of them accepts the connection.
+  """
+  timings = metrics.timings if metrics is not None else None
+  ssl_context = (ssl_context if ssl_context else ssl.create_default_context()) if scheme == "https" else None
+  split_tls = ssl_context is not None and hasattr(asyncio.StreamWriter, "start_tls")  # python 3.11+
+
+  started = time.perf_counter()
+  if dns_cache is not None:
+    addresses = await dns_cache.resolve_async(host, port)
+  else:
+    addresses = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+
+  if timings is not None:
+    timings.dns = time.perf_counter() - started
+
+  started = time.perf_counter()
+  error: OSError or None = None
+  for _, _, _, _, sockaddr in addresses:
+    try:
+      if ssl_context is not None and not split_tls:
+        reader, writer = await asyncio.open_connection(sockaddr[0], port, ssl=ssl_context, server_hostname=host)
+      else:
+        reader, writer = await asyncio.open_connection(sockaddr[0], port)
+      break
+    except OSError as e:
+      error = e
+  else:
+    raise error if error is not None else OSError(f"getaddrinfo returned empty list for '{host}'")
+
+  if timings is not None:
+    timings.connect = time.perf_counter() - started
+
+  if split_tls:
+    started = time.perf_counter()
+    try:
+      await writer.start_tls(ssl_context, server_hostname=host)
+    except BaseException:
+      writer.close()
+      raise
+    if timings is not None:
+      timings.tls = time.perf_counter() - started
+
+  return _AsyncConnection(reader, writer)
+
+
+async def _open_connection(scheme: str, host: str, port: int, ssl_context: ssl.SSLContext or None,
+                           dns_cache: DnsCache = None) -> _AsyncConnection:
+  metrics = current_metrics()
+  if metrics is not None or dns_cache is not None:
+    return await _open_resolved_connection(scheme, host, port, ssl_context, metrics, dns_cache)
+
+  if scheme == "https":
+    reader, writer = await asyncio.open_connection(
+      host, port, ssl=ssl_context if ssl_context else ssl.create_default_context(), server_hostname=host
+    )
+  else:
+    reader, writer = await asyncio.open_connection(host, port)
+
+  return _AsyncConnection(reader, writer)
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+  body = bytearray()
+  while True:
+    line = await reader.readline()
+    if not line:
+      raise asyncio.IncompleteReadError(bytes(body), None)
+
+    size = int(line.split(b";", 1)[0].strip(), 16)
+    if size == 0:
+      break
+
+    body += await reader.readexactly(size)
+    await reader.readexactly(2)  # CRLF after the chunk
+
+  while True:  # trailers
+    line = await reader.readline()
+    if line in (b"\r\n", b"\n", b""):
+      break
+
+  return bytes(body)
+
+
+async def _read_response(conn: _AsyncConnection, method: str) -> Tuple[int, str, HTTPMessage, bytes, bool]:
+  """
+  :return: status, reason, headers, body, will_close
+  """
+  reader = conn.reader
+  metrics = current_metrics()
+  started = time.perf_counter()
+  while True:
+    status_line = await reader.readline()
+    if not status_line:
+      raise ConnectionResetError("Remote end closed connection without response")
+
+    if metrics is not None:
+      metrics.timings.ttfb = time.perf_counter() - started
+
+    version, status, reason = (status_line.decode("iso-8859-1").rstrip("\r\n").split(None, 2) + [""])[:3]
+    status = int(status)
+
+    header_lines = []
+    while True:
+      line = await reader.readline()
+      header_lines.append(line)
+      if line in (b"\r\n", b"\n", b""):
+        break
+
+    if status >= 200 or status == 101:
+      break
+    # skipping informational responses like "100 Continue"
+
+  headers = parse_headers(BytesIO(b"".join(header_lines)))
+  conn_header = (headers.get("Connection") or "").lower()
+  will_close = "close" in conn_header or (version == "HTTP/1.0" and "keep-alive" not in conn_header)
+
+  started = time.perf_counter()
+  if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+    body = b""
+  elif "chunked" in (headers.get("Transfer-Encoding") or "").lower():
+    body = await _read_chunked(reader)
+  elif headers.get("Content-Length") is not None:
+    body = await reader.readexactly(int(headers.get("Content-Length")))
+  else:
+    body = await reader.read()
+    will_close = True
+
+  if metrics is not None:
+    metrics.timings.transfer = time.perf_counter() - started
+
+  return status, reason, headers, body, will_close
+
+
+def _is_buffer(data) -> bool:
+  return isinstance(data, (bytes, bytearray, memoryview))
+
+
+async def _write_body(writer: asyncio.StreamWriter, data, chunked: bool, chunk_size: int = 64 * 1024):
+  """
+  Write streamed request body: file object, iterable or async iterable of bytes
+  """
+  async def _chunks():
+    if hasattr(data, "read"):
+      while True:
+        chunk = data.read(chunk_size)
+        if not chunk:
+          break
+        yield chunk
+    elif hasattr(data, "__aiter__"):
+      async for chunk in data:
+        yield chunk
+    else:
+      for chunk in data:
+        yield chunk
+
+  metrics = current_metrics()
+  async for chunk in _chunks():
+    if not chunk:
+      continue
+    if isinstance(chunk, str):
+      chunk = chunk.encode("utf-8")
+    if metrics is not None:
+      metrics.bytes_sent += len(chunk)
+
+    if chunked:
+      writer.write(b"%x\r\n" % len(chunk))
+      writer.write(chunk)
+      writer.write(b"\r\n")
+    else:
+      writer.write(chunk)
+    await writer.drain()
+
+  if chunked:
+    writer.write(b"0\r\n\r\n")
+
+
+async def _request_once(method: str, url: str, headers: Dict[str, str], data,
+                        session: AsyncCurlSession or None, dns_cache: DnsCache = None) -> BufferedHTTPResponse:
+  parts = urlsplit(url)
+  scheme = parts.scheme.lower()
+  if scheme not in _DEFAULT_PORTS:
+    raise ValueError(f"Unsupported url scheme: {scheme}")
+
+  host = parts.hostname or ""
+  port = parts.port or _DEFAULT_PORTS[scheme]
+  key = (scheme, host.lower(), port)
+  selector = parts.path or "/"
+  if parts.query:
+    selector += f"?{parts.query}"
+
+  _headers = {k.title(): str(v) for k, v in headers.items()}
+  _headers.setdefault("Host", host if port == _DEFAULT_PORTS[scheme] else f"{host}:{port}")
+  _headers.setdefault("User-Agent", _USER_AGENT)
+  is_stream = data is not None and not _is_buffer(data)
+  if data is not None and not is_stream:
+    _headers["Content-Length"] = str(len(data))
+  elif is_stream and "Content-Length" not in _headers:
+    _headers["Transfer-Encoding"] = "chunked"
+  chunked = _headers.get("Transfer-Encoding", "").lower() == "chunked"
+
+  while True:
+    conn = session._acquire(key) if session else None
+    is_reused = conn is not None
+    if conn is None:
+      conn = await _open_connection(scheme, host, port, session.ssl_context if session else None,
+                                    dns_cache if dns_cache is not None or not session else session.dns_cache)
+      if session:
+        session._created += 1
+
+    metrics = current_metrics()
+    if metrics is not None:
+      metrics.reused_connection = is_reused
+
+    conn.requests += 1
+    last_request = not session or (session.max_requests and conn.requests >= session.max_requests)
+    if last_request:
+      _headers["Connection"] = "close"
+
+    head = f"{method} {selector} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in _headers.items()) + "\r\n"
+    if metrics is not None:
+      metrics.bytes_sent += len(head) + (0 if is_stream or data is None else memoryview(data).nbytes)
+
+    try:
+      if is_stream:
+        conn.writer.write(head.encode("iso-8859-1"))
+        await _write_body(conn.writer, data, chunked)
+      else:
+        conn.writer.write(head.encode("iso-8859-1") + (data or b""))
+      await conn.writer.drain()
+      status, reason, response_headers, body, will_close = await _read_response(conn, method)
+    except (ConnectionError, asyncio.IncompleteReadError):
+      conn.close()
+      if is_reused and not is_stream:  # keep-alive connection was dropped by the server, trying new one
+        continue
+      raise
+    except BaseException:
+      conn.close()
+      raise
+
+    if session and not will_close and not last_request:
+      session._release(key, conn)
+    else:
+      conn.close()
+
+    return BufferedHTTPResponse(url, status, reason, response_headers, body)
+
+
+async def request(method: str, url: str, headers: Dict[str, str] = None, data=None,
+                  session: AsyncCurlSession = None, timeout: float = None,
+                  dns_cache: DnsCache = None) -> BufferedHTTPResponse:
+  """
+  Send HTTP/1.1 request using asyncio streams, redirects are followed in the same manner as urllib does
+
+  :param method: HTTP method
+  :param url: full url of the resource
+  :param headers: request headers
+  :param data: request body: bytes, binary file object, iterable or async iterable of bytes,
+               streams without "Content-Length" header are sent with chunked transfer encoding
+  :param session: keep-alive connections pool, if not set - connection would be closed after the request
+  :param timeout: overall request timeout in seconds
+  :param dns_cache: resolved names cache, session's one is used if not set
+  """
+  async def _request():
+    _method, _url, _data = method, url, data
+    _headers = dict(headers) if headers else {}
+
+    for _ in range(_MAX_REDIRECTS + 1):
+      r = await _request_once(_method, _url, _headers, _data, session, dns_cache)
+      location = r.headers.get("Location") or r.headers.get("URI")
+      if r.status not in _REDIRECT_CODES or not location:
+        return r
+
+      if _method not in ("GET", "HEAD"):
+        if r.status not in (301, 302, 303):
+          return r
+        _method, _data = "GET", None
+        _headers = {k: v for k, v in _headers.items() if k.lower() not in _BODY_HEADERS}
+
+      _url = urljoin(_url, location)
+      _headers = {k: v for k, v in _headers.items() if k.lower() != "host"}
+
+    return r
+
+  if timeout is not None:
+    return await asyncio.wait_for(_request(), timeout)
+
+  return await _request()
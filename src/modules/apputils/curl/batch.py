@@ -0,0 +1,252 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import asyncio
+import time
+from asyncio.events import AbstractEventLoop
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Tuple
+
+from . import curl, curl_async, CURLResponse
+from .aio import AsyncCurlSession
+from .pool import CurlSession
+
+
+class CurlBatchStats(object):
+  """
+  Aggregated latency and throughput of the curl_many/curl_many_async batch.
+
+  Example:
+
+    stats = CurlBatchStats()
+    for index, r in curl_many(urls, concurrency=8, stats=stats):
+      ...
+    print(stats)
+  """
+
+  def __init__(self):
+    self._latencies: List[float] = []
+    self._errors: int = 0
+    self._started: float or None = None
+    self._finished: float or None = None
+    self._sorted: bool = True
+
+  def _start(self):
+    self._started = time.perf_counter()
+
+  def _add(self, latency: float, is_error: bool):
+    self._latencies.append(latency)
+    self._sorted = False
+    if is_error:
+      self._errors += 1
+
+  def _stop(self):
+    self._finished = time.perf_counter()
+
+  @property
+  def count(self) -> int:
+    return len(self._latencies)
+
+  @property
+  def errors(self) -> int:
+    return self._errors
+
+  @property
+  def elapsed(self) -> float:
+    """
+    :return: wall time of the batch in seconds
+    """
+    if self._started is None:
+      return 0.0
+
+    return (self._finished or time.perf_counter()) - self._started
+
+  @property
+  def throughput(self) -> float:
+    """
+    :return: requests per second
+    """
+    elapsed = self.elapsed
+    return self.count / elapsed if elapsed else 0.0
+
+  @property
+  def avg_latency(self) -> float:
+    return sum(self._latencies) / self.count if self._latencies else 0.0
+
+  def percentile(self, p: float) -> float:
+    """
+    :param p: percentile in range 0..100
+    :return: request latency in seconds
+    """
+    if not self._latencies:
+      return 0.0
+
+    if not self._sorted:
+      self._latencies.sort()
+      self._sorted = True
+
+    index = min(len(self._latencies) - 1, max(0, int(round(p / 100 * len(self._latencies) + 0.5)) - 1))
+    return self._latencies[index]
+
+  def __str__(self):
+    return f"requests: {self.count}, errors: {self.errors}, elapsed: {self.elapsed:.3f}s, " \
+           f"throughput: {self.throughput:.1f} req/s, latency avg/p50/p95/p99: " \
+           f"{self.avg_latency * 1000:.2f}/{self.percentile(50) * 1000:.2f}/" \
+           f"{self.percentile(95) * 1000:.2f}/{self.percentile(99) * 1000:.2f} ms"
+
+
+def _normalize_spec(spec: str or dict) -> Dict:
+  if isinstance(spec, str):
+    return {"url": spec}
+  elif isinstance(spec, dict):
+    return dict(spec)
+
+  raise ValueError(f"Request spec should be url or dict of curl arguments, got '{type(spec).__name__}'")
+
+
+def _collect(index: int, result, ordered: bool, buffer: Dict[int, object],
+             next_index: List[int]) -> Iterator[Tuple[int, object]]:
+  if not ordered:
+    yield index, result
+    return
+
+  buffer[index] = result
+  while next_index[0] in buffer:
+    yield next_index[0], buffer.pop(next_index[0])
+    next_index[0] += 1
+
+
+def curl_many(requests: Iterable[str or dict], concurrency: int = 10, ordered: bool = False,
+              return_exceptions: bool = False, session: CurlSession = None,
+              stats: CurlBatchStats = None) -> Iterator[Tuple[int, CURLResponse or Exception]]:
+  """
+  Execute batch of requests with limited concurrency, connections are re-used per host
+
+  :param requests: request specs, each one is url or dict with curl() arguments
+  :param concurrency: max amount of requests in flight
+  :param ordered: yield responses in order of the specs, instead of order of completion
+  :param return_exceptions: yield exception in place of the response instead of raising it
+  :param session: keep-alive connection pool to use, if not set - new one would be created for the batch
+  :param stats: holder to collect batch latency and throughput
+  :return: pairs of (spec index, response)
+  """
+  own_session = session is None
+  session = CurlSession(pool_size=concurrency) if own_session else session
+  stats = stats if stats is not None else CurlBatchStats()
+  specs = enumerate(requests)
+  pending = {}
+  buffer: Dict[int, object] = {}
+  next_index = [0]
+
+  def _call(spec: Dict) -> Tuple[float, CURLResponse or None, Exception or None]:
+    spec.setdefault("session", session)
+    started = time.perf_counter()
+    try:
+      response = curl(**spec)
+      return time.perf_counter() - started, response, None
+    except Exception as e:
+      return time.perf_counter() - started, None, e
+
+  def _submit(executor: ThreadPoolExecutor):
+    while len(pending) < concurrency and len(buffer) < concurrency * 4:
+      try:
+        index, spec = next(specs)
+      except StopIteration:
+        return
+      pending[executor.submit(_call, _normalize_spec(spec))] = index
+
+  stats._start()
+  try:
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+      _submit(executor)
+      while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for f in done:
+          index = pending.pop(f)
+          latency, response, error = f.result()
+          stats._add(latency, error is not None)
+          if error is not None and not return_exceptions:
+            raise error
+
+          yield from _collect(index, response if error is None else error, ordered, buffer, next_index)
+        _submit(executor)
+  finally:
+    stats._stop()
+    if own_session:
+      session.close()
+
+
+async def curl_many_async(loop: AbstractEventLoop, requests: Iterable[str or dict], concurrency: int = 10,
+                          ordered: bool = False, return_exceptions: bool = False, session: AsyncCurlSession = None,
+                          stats: CurlBatchStats = None) -> AsyncIterator[Tuple[int, CURLResponse or Exception]]:
+  """
+  Asyncio twin of the curl_many(), requests are executed via curl_async()
+
+  Example:
+
+    async for index, r in curl_many_async(loop, urls, concurrency=100):
+      ...
+  """
+  own_session = session is None
+  session = AsyncCurlSession(pool_size=concurrency) if own_session else session
+  stats = stats if stats is not None else CurlBatchStats()
+  specs = enumerate(requests)
+  pending = {}
+  buffer: Dict[int, object] = {}
+  next_index = [0]
+
+  async def _call(spec: Dict) -> Tuple[float, CURLResponse or None, Exception or None]:
+    spec.setdefault("session", session)
+    started = time.perf_counter()
+    try:
+      response = await curl_async(loop, **spec)
+      return time.perf_counter() - started, response, None
+    except Exception as e:
+      return time.perf_counter() - started, None, e
+
+  def _submit():
+    while len(pending) < concurrency and len(buffer) < concurrency * 4:
+      try:
+        index, spec = next(specs)
+      except StopIteration:
+        return
+      pending[loop.create_task(_call(_normalize_spec(spec)))] = index
+
+  stats._start()
+  try:
+    _submit()
+    while pending:
+      done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+      for task in done:
+        index = pending.pop(task)
+        latency, response, error = task.result()
+        stats._add(latency, error is not None)
+        if error is not None and not return_exceptions:
+          raise error
+
+        for item in _collect(index, response if error is None else error, ordered, buffer, next_index):
+          yield item
+      _submit()
+  finally:
+    for task in pending:
+      task.cancel()
+    stats._stop()
+    if own_session:
+      session.close()
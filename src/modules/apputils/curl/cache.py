@@ -0,0 +1,312 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
+from typing import Dict, List, Tuple
+from http.client import HTTPMessage
+
+from .aio import BufferedHTTPResponse
+
+
+_CACHEABLE_CODES = (200, 203, 300, 301, 308, 410)
+# headers which are replaced in the stored entry by the 304 response
+_REVALIDATION_HEADERS = ("cache-control", "expires", "date", "etag", "last-modified", "age")
+# request headers, which identify the user the response is sent to
+_CREDENTIAL_HEADERS = ("authorization", "proxy-authorization", "cookie")
+# Vary response headers, which are covered by the cache key (accept-encoding is the same for all the requests)
+_KEYED_VARY_HEADERS = frozenset(("",) + _CREDENTIAL_HEADERS + ("accept-encoding",))
+
+
+def _parse_cache_control(value: str or None) -> Dict[str, str or None]:
+  result = {}
+  if not value:
+    return result
+
+  for directive in value.split(","):
+    name, _, arg = directive.strip().partition("=")
+    if name:
+      result[name.lower()] = arg.strip('"') if arg else None
+
+  return result
+
+
+def _parse_http_date(value: str or None) -> float or None:
+  if not value:
+    return None
+  try:
+    return parsedate_to_datetime(value).timestamp()
+  except (TypeError, ValueError, IndexError):
+    return None
+
+
+def request_key(url: str, headers: Dict[str, str]) -> str:
+  """
+  Cache key of the GET request. Responses to the requests with credentials (auth or cookies) are stored
+  per credentials, so they are never served to the request of another user. Credentials are hashed,
+  as the key is kept in the persistent tier.
+
+  :param headers: request headers, including the authorization one
+  """
+  credentials = sorted(f"{k.lower()}: {v}" for k, v in headers.items() if k.lower() in _CREDENTIAL_HEADERS)
+  if not credentials:
+    return url
+
+  digest = hashlib.sha256("\n".join(credentials).encode()).hexdigest()
+  return f"{url}#{digest}"
+
+
+class HttpCacheEntry(object):
+  def __init__(self, code: int, reason: str, headers: List[Tuple[str, str]], body: bytes, stored_at: float = None):
+    """
+    :param code: HTTP response code
+    :param reason: HTTP response reason
+    :param headers: response headers as list of (name, value)
+    :param body: raw (not decompressed) response body
+    :param stored_at: unix timestamp when response was received
+    """
+    self.code: int = code
+    self.reason: str = reason
+    self.headers: List[Tuple[str, str]] = headers
+    self.body: bytes = body
+    self.stored_at: float = stored_at if stored_at is not None else time.time()
+    self.max_age: float = self.__calc_max_age()
+
+  def __header(self, name: str) -> str or None:
+    name = name.lower()
+    for k, v in self.headers:
+      if k.lower() == name:
+        return v
+    return None
+
+  def __calc_max_age(self) -> float:
+    cache_control = _parse_cache_control(self.__header("Cache-Control"))
+    if "no-cache" in cache_control:
+      return 0.0
+
+    age = self.__header("Age") or ""
+    age = float(age) if age.isdigit() else 0.0
+
+    if cache_control.get("max-age") and cache_control["max-age"].isdigit():
+      return max(0.0, int(cache_control["max-age"]) - age)
+
+    expires = _parse_http_date(self.__header("Expires"))
+    if expires is not None:
+      date = _parse_http_date(self.__header("Date")) or self.stored_at
+      return max(0.0, expires - date - age)
+
+    return 0.0
+
+  @property
+  def is_fresh(self) -> bool:
+    return time.time() - self.stored_at < self.max_age
+
+  @property
+  def validators(self) -> Dict[str, str]:
+    """
+    :return: conditional request headers to re-validate the entry
+    """
+    result = {}
+    etag = self.__header("ETag")
+    last_modified = self.__header("Last-Modified")
+    if etag:
+      result["If-None-Match"] = etag
+    if last_modified:
+      result["If-Modified-Since"] = last_modified
+    return result
+
+  def revalidate(self, headers: HTTPMessage):
+    """
+    Apply "304 Not Modified" response headers to the entry
+    """
+    updated = {k.lower() for k, _ in headers.items() if k.lower() in _REVALIDATION_HEADERS}
+    self.headers = [(k, v) for k, v in self.headers if k.lower() not in updated] + \
+                   [(k, v) for k, v in headers.items() if k.lower() in updated]
+    self.stored_at = time.time()
+    self.max_age = self.__calc_max_age()
+
+  def to_response(self, url: str) -> BufferedHTTPResponse:
+    headers = HTTPMessage()
+    for k, v in self.headers:
+      headers[k] = v
+
+    return BufferedHTTPResponse(url, self.code, self.reason, headers, self.body)
+
+  def to_json(self) -> str:
+    return json.dumps({
+      "code": self.code,
+      "reason": self.reason,
+      "headers": self.headers,
+      "body": base64.b64encode(self.body).decode("ascii"),
+      "stored_at": self.stored_at
+    })
+
+  @classmethod
+  def from_json(cls, data: str):
+    """
+    :rtype HttpCacheEntry
+    """
+    d = json.loads(data)
+    return cls(d["code"], d["reason"], [tuple(h) for h in d["headers"]], base64.b64decode(d["body"]), d["stored_at"])
+
+  @classmethod
+  def from_response(cls, code: int, reason: str, headers: HTTPMessage, body: bytes):
+    """
+    :return: cache entry or None if response couldn't be cached
+    :rtype HttpCacheEntry
+    """
+    if code not in _CACHEABLE_CODES or not isinstance(body, bytes):
+      return None
+
+    cache_control = _parse_cache_control(headers.get("Cache-Control"))
+    vary = {h.strip() for h in (headers.get("Vary") or "").lower().split(",")}
+    if "no-store" in cache_control or not vary <= _KEYED_VARY_HEADERS:  # varies by the request not in the key
+      return None
+
+    entry = cls(code, reason, list(headers.items()), body)
+    if entry.max_age <= 0 and not entry.validators:
+      return None
+
+    return entry
+
+
+class HttpCache(object):
+  """
+  HTTP response cache for the GET requests, honours Cache-Control/Expires freshness and re-validates
+  stale entries with If-None-Match/If-Modified-Since, so "304 Not Modified" are served locally.
+
+  It is a private cache of the client: responses to the requests with credentials (auth, "Authorization"
+  header or cookies) are stored per credentials (see request_key()), so "Cache-Control: private" responses
+  are stored as well. Responses, which vary by other request headers, are not stored.
+
+  Entries are kept in the in-memory LRU tier and, optionally, in the persistent tier.
+  Persistent tier could be any object with DataCacheExtension interface (get(name) and set(name, value, encrypted)).
+
+  Example:
+
+    conf = BaseConfiguration()
+    cache = HttpCache(max_entries=256, persistent=conf.get_cache_ext("http_cache"))
+    r = curl("https://example.com/api/list", cache=cache)
+  """
+
+  def __init__(self, max_entries: int = 128, persistent=None, persistent_encrypted: bool = False):
+    """
+    :param max_entries: max amount of entries in the in-memory tier
+    :param persistent: DataCacheExtension compatible storage
+    :param persistent_encrypted: encrypt entries in the persistent storage
+    """
+    self._max_entries: int = max_entries
+    self._persistent = persistent
+    self._persistent_encrypted: bool = persistent_encrypted
+    self._entries: OrderedDict = OrderedDict()
+    self._lock = threading.Lock()
+    self._hits: int = 0
+    self._misses: int = 0
+    self._revalidated: int = 0
+
+  @property
+  def hits(self) -> int:
+    """
+    :return: amount of requests served from the cache without network round-trip
+    """
+    return self._hits
+
+  @property
+  def misses(self) -> int:
+    return self._misses
+
+  @property
+  def revalidated(self) -> int:
+    """
+    :return: amount of requests served from the cache after "304 Not Modified" response
+    """
+    return self._revalidated
+
+  def __put_memory(self, key: str, entry: HttpCacheEntry):
+    with self._lock:
+      self._entries[key] = entry
+      self._entries.move_to_end(key)
+      while len(self._entries) > self._max_entries:
+        self._entries.popitem(last=False)
+
+  def get(self, key: str) -> HttpCacheEntry or None:
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None:
+        self._entries.move_to_end(key)
+
+    if entry is None and self._persistent is not None:
+      data = self._persistent.get(key)
+      if data:
+        try:
+          entry = HttpCacheEntry.from_json(data)
+        except (ValueError, KeyError, TypeError):
+          entry = None
+        if entry is not None:
+          self.__put_memory(key, entry)
+
+    return entry
+
+  def put(self, key: str, entry: HttpCacheEntry):
+    self.__put_memory(key, entry)
+    if self._persistent is not None:
+      self._persistent.set(key, entry.to_json(), encrypted=self._persistent_encrypted)
+
+  def lookup(self, key: str) -> Tuple[HttpCacheEntry or None, bool]:
+    """
+    :return: cache entry and flag if it is fresh enough to be used without the request
+    """
+    entry = self.get(key)
+    if entry is not None and entry.is_fresh:
+      self._hits += 1
+      return entry, True
+
+    self._misses += 1
+    return entry, False
+
+  def store(self, key: str, entry: HttpCacheEntry or None, code: int, reason: str, headers: HTTPMessage,
+            body: bytes) -> HttpCacheEntry or None:
+    """
+    Process response received from the server
+
+    :param key: cache key
+    :param entry: stale entry, which was used to send conditional request
+    :return: entry to serve the response from, if server answered "304 Not Modified"
+    """
+    if code == 304 and entry is not None:
+      entry.revalidate(headers)
+      self.put(key, entry)
+      self._revalidated += 1
+      return entry
+
+    new_entry = HttpCacheEntry.from_response(code, reason, headers, body)
+    if new_entry is not None:
+      self.put(key, new_entry)
+
+    return None
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
@@ -0,0 +1,374 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import json
+import threading
+import time
+from email.utils import parsedate_tz, mktime_tz
+from functools import lru_cache
+
+from typing import Dict, Iterator, List, Tuple
+from urllib.parse import urlsplit
+
+
+# second level domains, which are registered under country code ones
+_GENERIC_SLDS = frozenset(("co", "ac", "com", "edu", "org", "net", "gov", "mil", "int", "aero", "biz", "cat", "coop",
+                           "info", "jobs", "mobi", "museum", "name", "pro", "travel", "eu"))
+
+
+@lru_cache(maxsize=256)
+def _parse_expires(value: str) -> float or None:
+  """
+  :return: "Expires" attribute as unix timestamp, servers are usually re-sending the same value
+  """
+  parsed = parsedate_tz(value)
+  if parsed is None:
+    return None
+
+  try:
+    return float(mktime_tz(parsed))
+  except (OverflowError, ValueError):
+    return None
+
+
+class CURLCookie(object):
+  def __init__(self, name: str, value: str, expires: float = None):
+    """
+    :param name: Name of the cookie set by "set-cookie"
+    :param value: Cookie value with all params separated by ";"
+    :param expires: expiration unix timestamp, overrides "Max-Age" and "Expires" attributes
+    """
+    self.__name: str = name.strip()
+    self.__options: Dict[str, str] = {}
+    self.__value: str = ""
+    self.__expires: float or None = expires
+    if not value:
+      return
+
+    options = value.split(";")
+    self.__value = options[0].strip()
+
+    for option in options[1:]:
+      key, _, option_value = option.partition("=")
+      key = key.strip().lower()
+      if key:
+        self.__options[key] = option_value.strip()
+
+    if expires is None:
+      max_age = self.__options.get("max-age", "")
+      if max_age.lstrip("-").isdigit():
+        self.__expires = time.time() + int(max_age)
+      elif self.__options.get("expires"):
+        self.__expires = _parse_expires(self.__options["expires"])
+
+  @property
+  def name(self) -> str:
+    return self.__name
+
+  @property
+  def value(self) -> str:
+    return self.__value
+
+  @property
+  def options(self) -> Dict[str, str]:
+    """
+    :return: cookie attributes with lower-cased names, flags like "secure" have empty value
+    """
+    return self.__options
+
+  @property
+  def expires(self) -> float or None:
+    """
+    :return: expiration unix timestamp or None for the session cookie
+    """
+    return self.__expires
+
+  @property
+  def domain(self) -> str or None:
+    return self.__options.get("domain", "").lstrip(".").lower() or None
+
+  @property
+  def path(self) -> str or None:
+    path = self.__options.get("path")
+    return path if path and path.startswith("/") else None
+
+  @property
+  def secure(self) -> bool:
+    return "secure" in self.__options
+
+  @property
+  def is_expired(self) -> bool:
+    return self.__expires is not None and time.time() >= self.__expires
+
+  def to_set_cookie(self) -> str:
+    """
+    :return: cookie value with attributes, as it would be passed in the "Set-Cookie" header
+    """
+    return "; ".join([self.__value] + [f"{k}={v}" if v else k for k, v in self.__options.items()])
+
+  def __str__(self):
+    return f"{self.__name}={self.__value}"
+
+
+class _JarEntry(object):
+  __slots__ = ("cookie", "path", "host_only")
+
+  def __init__(self, cookie: CURLCookie, path: str, host_only: bool):
+    self.cookie: CURLCookie = cookie
+    self.path: str = path
+    self.host_only: bool = host_only
+
+
+def _default_path(path: str) -> str:
+  if not path.startswith("/") or path.count("/") == 1:
+    return "/"
+
+  return path[:path.rindex("/")]
+
+
+def _path_match(request_path: str, cookie_path: str) -> bool:
+  if request_path == cookie_path:
+    return True
+
+  return request_path.startswith(cookie_path) and \
+      (cookie_path.endswith("/") or request_path[len(cookie_path)] == "/")
+
+
+def _is_ip_address(host: str) -> bool:
+  return host.replace(".", "").isdigit() or ":" in host
+
+
+def _is_public_suffix(domain: str) -> bool:
+  """
+  :return: True if the domain is top-level one or generic second level domain of the country, like "co.uk".
+           The same heuristic as http.cookiejar.DefaultCookiePolicy uses, there is no public suffix list at hand
+  """
+  labels = domain.split(".")
+  return len(labels) == 1 or (len(labels) == 2 and len(labels[1]) == 2 and labels[0] in _GENERIC_SLDS)
+
+
+def _parent_domains(host: str) -> Iterator[str]:
+  """
+  :return: host itself and all its parent domains, the most specific first
+  """
+  yield host
+  if _is_ip_address(host):
+    return
+
+  idx = host.find(".")
+  while idx != -1:
+    host = host[idx + 1:]
+    yield host
+    idx = host.find(".")
+
+
+class CookieJar(object):
+  """
+  Cookie storage, which persists cookies across the requests.
+
+  Cookies are indexed by domain, so lookup costs only a few dictionary hits per request, no matter how many cookies
+  the jar holds. Attributes are parsed once, when cookie is received. Expired cookies are evicted lazily on lookup,
+  the resulting "Cookie" header is cached per (host, path) until the jar changes or one of its cookies expires.
+
+  Example:
+
+    jar = CookieJar.load(conf.storage)
+    session = CurlSession(cookie_jar=jar)
+    curl("https://example.com/login", req_type=CurlRequestType.POST, data=creds, session=session)
+    curl("https://example.com/api/items", session=session)  # cookies set by the login response are sent back
+    jar.save(conf.storage)
+  """
+
+  def __init__(self):
+    self._domains: Dict[str, Dict[Tuple[str, str], _JarEntry]] = {}  # domain -> {(path, name): entry}
+    self._header_cache: Dict[Tuple[bool, str, str], Tuple[str or None, float]] = {}
+    self._lock = threading.RLock()
+
+  def __len__(self) -> int:
+    with self._lock:
+      return sum(len(entries) for entries in self._domains.values())
+
+  def __iter__(self) -> Iterator[CURLCookie]:
+    with self._lock:
+      return iter([entry.cookie for entries in self._domains.values() for entry in entries.values()])
+
+  def set_cookie(self, cookie: CURLCookie, url: str):
+    """
+    Store the cookie received in the response to the url, expired cookie removes stored one with the same name.
+    Cookies for the foreign domains and for the public suffixes ("com", "co.uk") are rejected.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    domain = cookie.domain
+    if domain and domain != host and \
+       (not host.endswith("." + domain) or _is_ip_address(host) or _is_public_suffix(domain)):
+      return  # cookie for the foreign domain or for all the sites under the public suffix
+    if domain and _is_public_suffix(domain):
+      domain = None  # host like "localhost" sets the cookie for itself only
+
+    path = cookie.path or _default_path(parts.path)
+    key = (path, cookie.name)
+
+    with self._lock:
+      self._header_cache.clear()
+      entries = self._domains.setdefault(domain or host, {})
+      if cookie.is_expired:
+        entries.pop(key, None)
+      else:
+        entries[key] = _JarEntry(cookie, path, host_only=not domain)
+
+      if not entries:
+        del self._domains[domain or host]
+
+  def extract(self, url: str, headers):
+    """
+    Store cookies from the "Set-Cookie" headers of the response
+
+    :param url: url of the request
+    :param headers: response headers (HTTPMessage)
+    """
+    for header in headers.get_all("Set-Cookie") or []:
+      name, sep, value = header.partition("=")
+      if sep and name.strip():
+        self.set_cookie(CURLCookie(name, value), url)
+
+  def cookies_for(self, url: str) -> List[CURLCookie]:
+    """
+    :return: not expired cookies to send with the request to the url, cookies with longer paths first
+    """
+    parts = urlsplit(url)
+    return [entry.cookie for entry in self.__lookup(parts.scheme.lower() == "https", (parts.hostname or "").lower(),
+                                                     parts.path or "/")]
+
+  def __lookup(self, secure: bool, host: str, path: str) -> List[_JarEntry]:
+    now = time.time()
+    result = []
+    with self._lock:
+      for domain in _parent_domains(host):
+        entries = self._domains.get(domain)
+        if not entries:
+          continue
+
+        expired = [key for key, entry in entries.items() if entry.cookie.is_expired]
+        for key in expired:
+          del entries[key]
+        if expired:
+          self._header_cache.clear()
+
+        result.extend(
+          entry for entry in entries.values()
+          if (not entry.host_only or domain == host) and (secure or not entry.cookie.secure) and
+          _path_match(path, entry.path)
+        )
+
+    result.sort(key=lambda entry: len(entry.path), reverse=True)
+    return result
+
+  def header_for(self, url: str) -> str or None:
+    """
+    :return: value of the "Cookie" header for the request to the url or None if there are no matching cookies
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme.lower() == "https", (parts.hostname or "").lower(), parts.path or "/")
+
+    with self._lock:
+      cached = self._header_cache.get(key)
+      if cached is not None and time.time() < cached[1]:
+        return cached[0]
+
+      entries = self.__lookup(*key)
+      header = "; ".join(str(entry.cookie) for entry in entries) or None
+      valid_until = min((entry.cookie.expires for entry in entries if entry.cookie.expires is not None),
+                        default=float("inf"))
+      self._header_cache[key] = (header, valid_until)
+      return header
+
+  def remove_expired(self):
+    with self._lock:
+      self._header_cache.clear()
+      for domain in list(self._domains):
+        entries = self._domains[domain]
+        for key in [key for key, entry in entries.items() if entry.cookie.is_expired]:
+          del entries[key]
+        if not entries:
+          del self._domains[domain]
+
+  def clear(self, domain: str = None):
+    with self._lock:
+      self._header_cache.clear()
+      if domain is None:
+        self._domains.clear()
+      else:
+        self._domains.pop(domain.lstrip(".").lower(), None)
+
+  def to_json(self) -> str:
+    self.remove_expired()
+    with self._lock:
+      return json.dumps([
+        {
+          "domain": domain,
+          "path": entry.path,
+          "host_only": entry.host_only,
+          "name": entry.cookie.name,
+          "value": entry.cookie.to_set_cookie(),
+          "expires": entry.cookie.expires
+        }
+        for domain, entries in self._domains.items() for entry in entries.values()
+      ])
+
+  @classmethod
+  def from_json(cls, data: str):
+    """
+    :rtype CookieJar
+    """
+    jar = cls()
+    for item in json.loads(data):
+      cookie = CURLCookie(item["name"], item["value"], expires=item["expires"])
+      if not cookie.is_expired:
+        jar._domains.setdefault(item["domain"], {})[(item["path"], cookie.name)] = \
+          _JarEntry(cookie, item["path"], item["host_only"])
+
+    return jar
+
+  def save(self, storage, name: str = "cookies", table: str = "curl", encrypted: bool = True):
+    """
+    Serialize the jar to the configuration storage
+
+    :param storage: apputils.config.storages.SQLStorage or any storage with the same set_text_property() method
+    :param name: property name to store jar under
+    :param table: storage table
+    :param encrypted: cookies are holding session tokens, so they are encrypted by default
+    """
+    storage.set_text_property(table, name, self.to_json(), encrypted=encrypted)
+
+  @classmethod
+  def load(cls, storage, name: str = "cookies", table: str = "curl"):
+    """
+    Restore the jar saved by save(), empty jar is returned if nothing was stored yet
+
+    :rtype CookieJar
+    """
+    value = storage.get_property(table, name).value
+    if not value or not isinstance(value, str):
+      return cls()
+
+    try:
+      return cls.from_json(value)
+    except (ValueError, KeyError, TypeError):
+      return cls()
@@ -0,0 +1,178 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import zlib
+
+from typing import Iterable, Iterator
+
+
+def get_charset(content_type: str or None, default: str = "utf-8") -> str:
+  """
+  :param content_type: value of the "Content-Type" header
+  :return: charset name from the header or default one
+  """
+  if content_type and "charset" in content_type:
+    for option in content_type.split(";"):
+      if "charset" in option:
+        charset = option.split("=")
+        if len(charset) == 2:
+          return charset[1].strip().strip('"').lower()
+        break
+
+  return default
+
+
+class ContentDecoder(object):
+  """
+  Incremental decoder of the "Content-Encoding" (gzip, x-gzip, deflate), output is bounded by max_length per piece,
+  so the whole body never need to be in the memory.
+
+  Unknown or missing encoding is passed as is.
+  """
+
+  def __init__(self, content_encoding: str or None):
+    content_encoding = (content_encoding or "").lower()
+    self._is_gzip: bool = "gzip" in content_encoding
+    self._is_deflate: bool = not self._is_gzip and "deflate" in content_encoding
+    self._head: bytes or None = b"" if self._is_deflate else None  # start of the stream, until the format is known
+    self._obj = self.__new_decompressobj()
+
+  @property
+  def is_passthrough(self) -> bool:
+    return self._obj is None
+
+  def __new_decompressobj(self, raw_deflate: bool = False):
+    if self._is_gzip:
+      return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif self._is_deflate:
+      # "deflate" should be zlib wrapped, but a number of servers are sending raw deflate stream
+      return zlib.decompressobj(-zlib.MAX_WBITS if raw_deflate else zlib.MAX_WBITS)
+
+    return None
+
+  def decompress(self, data: bytes, max_length: int = 0) -> Iterator[bytes]:
+    """
+    :param data: next piece of the compressed stream
+    :param max_length: max size of the yielded piece, 0 - unlimited
+    """
+    if self._obj is None:
+      if data:
+        yield data
+      return
+
+    if self._head is not None:
+      data = self._head + data
+      if len(data) < 2:  # zlib header is 2 bytes long, chunks could be shorter
+        self._head = data
+        return
+
+      self._head = None
+      try:
+        zlib.decompressobj(zlib.MAX_WBITS).decompress(data[:2])
+      except zlib.error:
+        self._obj = self.__new_decompressobj(raw_deflate=True)
+
+    while data:
+      out = self._obj.decompress(data, max_length)
+      if out:
+        yield out
+
+      data = self._obj.unconsumed_tail
+      if self._obj.eof and self._obj.unused_data:  # gzip stream with several members
+        data = self._obj.unused_data
+        self._obj = self.__new_decompressobj()
+
+  def flush(self) -> bytes:
+    if self._obj is None:
+      return b""
+
+    if self._head:  # stream is shorter than the zlib header
+      head, self._head = self._head, None
+      return self._obj.decompress(head) + self._obj.flush()
+
+    return self._obj.flush()
+
+  def decode(self, chunks: Iterable[bytes], max_length: int = 0) -> Iterator[bytes]:
+    """
+    Decompress whole stream of chunks
+    """
+    for chunk in chunks:
+      yield from self.decompress(chunk, max_length)
+
+    tail = self.flush()
+    if tail:
+      yield tail
+
+
+def _tail(parts: list, size: int) -> bytes or str:
+  """
+  :return: last size characters (bytes) of the line parts
+  """
+  tail = parts[0][:0]
+  for part in reversed(parts):
+    tail = part[-(size - len(tail)):] + tail
+    if len(tail) >= size:
+      break
+  return tail
+
+
+def split_lines(chunks: Iterable[bytes or str], delimiter: bytes or str or None = None) -> Iterator[bytes or str]:
+  """
+  Split stream of chunks to the lines. Line parts are collected in the list and joined once,
+  so long lines spread across many chunks are not re-concatenated on every chunk.
+
+  :param chunks: stream of bytes or str pieces
+  :param delimiter: line delimiter, by default - new line with optional trailing "\\r" removed
+  """
+  parts = []
+  strip_cr = delimiter is None
+
+  for chunk in chunks:
+    if not chunk:
+      continue
+
+    delim = delimiter if delimiter is not None else (b"\n" if isinstance(chunk, bytes) else "\n")
+    delim_len = len(delim)
+    start = 0
+    if parts and delim_len > 1:  # delimiter could be split between the chunks
+      tail = _tail(parts, delim_len - 1)
+      idx = (tail + chunk[:delim_len - 1]).find(delim)
+      if -1 < idx < len(tail):
+        in_parts = len(tail) - idx
+        line = chunk[:0].join(parts)[:-in_parts]
+        parts = []
+        start = delim_len - in_parts
+        yield line
+    while True:
+      idx = chunk.find(delim, start)
+      if idx == -1:
+        break
+
+      parts.append(chunk[start:idx])
+      line = chunk[:0].join(parts) if len(parts) > 1 else parts[0]
+      parts = []
+      start = idx + delim_len
+      yield line[:-1] if strip_cr and line[-1:] in (b"\r", "\r") else line
+
+    if start < len(chunk):
+      parts.append(chunk[start:] if start else chunk)
+
+  if parts:
+    line = parts[0][:0].join(parts)
+    yield line[:-1] if strip_cr and line[-1:] in (b"\r", "\r") else line
@@ -0,0 +1,165 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import asyncio
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from typing import List, Tuple
+
+
+AddressInfo = Tuple[int, int, int, str, tuple]
+
+
+class _DnsEntry(object):
+  __slots__ = ("addresses", "error", "expires", "next")
+
+  def __init__(self, addresses: List[AddressInfo] or None, error: socket.gaierror or None, expires: float):
+    self.addresses: List[AddressInfo] or None = addresses
+    self.error: socket.gaierror or None = error
+    self.expires: float = expires
+    self.next: int = 0
+
+
+class DnsCache(object):
+  """
+  Cache of the socket.getaddrinfo() results with TTL. Failed lookups are cached for the negative_ttl.
+
+  If host resolves to several A/AAAA records, every next lookup returns them rotated by one,
+  so new connections are spread across the addresses. Connection is attempted to the addresses in the
+  returned order, so unavailable address is just skipped.
+
+  Example:
+
+    session = CurlSession(dns_cache=DnsCache(ttl=300))
+  """
+
+  def __init__(self, ttl: float = 60.0, negative_ttl: float = 5.0, max_entries: int = 1024, rotate: bool = True):
+    """
+    :param ttl: seconds to keep resolved addresses
+    :param negative_ttl: seconds to keep failed lookups, 0 - do not cache failures
+    :param max_entries: max amount of cached hosts, least recently used are evicted first
+    :param rotate: rotate addresses of the host on every lookup
+    """
+    self._ttl: float = ttl
+    self._negative_ttl: float = negative_ttl
+    self._max_entries: int = max_entries
+    self._rotate: bool = rotate
+    self._entries: OrderedDict = OrderedDict()
+    self._lock = threading.Lock()
+    self._hits: int = 0
+    self._misses: int = 0
+
+  @property
+  def hits(self) -> int:
+    return self._hits
+
+  @property
+  def misses(self) -> int:
+    return self._misses
+
+  def __lookup(self, key: Tuple) -> List[AddressInfo] or None:
+    """
+    :return: cached addresses or None on cache miss
+    :raises socket.gaierror: cached failure
+    """
+    with self._lock:
+      entry: _DnsEntry or None = self._entries.get(key)
+      if entry is None or time.monotonic() >= entry.expires:
+        self._misses += 1
+        return None
+
+      self._entries.move_to_end(key)
+      self._hits += 1
+      if entry.error is not None:
+        raise socket.gaierror(*entry.error.args)
+
+      addresses = entry.addresses
+      if self._rotate and len(addresses) > 1:
+        index = entry.next
+        entry.next = (index + 1) % len(addresses)
+        return addresses[index:] + addresses[:index]
+
+      return list(addresses)
+
+  def __store(self, key: Tuple, addresses: List[AddressInfo] or None, error: socket.gaierror or None):
+    ttl = self._ttl if error is None else self._negative_ttl
+    if ttl <= 0:
+      return
+
+    entry = _DnsEntry(addresses, error, time.monotonic() + ttl)
+    if self._rotate and addresses and len(addresses) > 1:
+      entry.next = 1  # the first address was already returned by the lookup itself
+
+    with self._lock:
+      self._entries[key] = entry
+      self._entries.move_to_end(key)
+      while len(self._entries) > self._max_entries:
+        self._entries.popitem(last=False)
+
+  def resolve(self, host: str, port: int, family: int = 0, type: int = socket.SOCK_STREAM) -> List[AddressInfo]:
+    """
+    Cached socket.getaddrinfo()
+
+    :raises socket.gaierror: if host couldn't be resolved
+    """
+    key = (host.lower(), port, family, type)
+    addresses = self.__lookup(key)
+    if addresses is not None:
+      return addresses
+
+    try:
+      addresses = socket.getaddrinfo(host, port, family, type)
+    except socket.gaierror as e:
+      self.__store(key, None, e)
+      raise
+
+    self.__store(key, addresses, None)
+    return list(addresses)
+
+  async def resolve_async(self, host: str, port: int, family: int = 0,
+                          type: int = socket.SOCK_STREAM) -> List[AddressInfo]:
+    """
+    Asyncio version of the resolve(), lookup is done via loop.getaddrinfo()
+    """
+    key = (host.lower(), port, family, type)
+    addresses = self.__lookup(key)
+    if addresses is not None:
+      return addresses
+
+    try:
+      addresses = await asyncio.get_running_loop().getaddrinfo(host, port, family=family, type=type)
+    except socket.gaierror as e:
+      self.__store(key, None, e)
+      raise
+
+    self.__store(key, addresses, None)
+    return list(addresses)
+
+  def invalidate(self, host: str):
+    host = host.lower()
+    with self._lock:
+      for key in [key for key in self._entries if key[0] == host]:
+        del self._entries[key]
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
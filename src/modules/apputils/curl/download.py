@@ -0,0 +1,287 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from typing import Dict, List, Tuple
+
+from . import curl, CURLAuth, CURLCookie, CURLResponse, CookieJar
+from .pool import CurlSession
+from .retry import RetryPolicy
+
+
+def _hash_file(f, hasher, buff: bytearray, size: int):
+  """
+  Feed first "size" bytes of already downloaded file to the hasher, re-using the same buffer
+  """
+  view = memoryview(buff)
+  f.seek(0)
+  while size > 0:
+    n = f.readinto(view if size >= len(buff) else view[:size])
+    if not n:
+      break
+    hasher.update(view if n == len(buff) else view[:n])
+    size -= n
+
+
+def curl_download(url: str, path: str, params: Dict[str, str] = None, auth: CURLAuth = None,
+                  headers: Dict[str, str] = None, cookies: List[CURLCookie] or CookieJar = None, timeout: int = None,
+                  session: CurlSession = None, retry: RetryPolicy = None, resume: bool = False,
+                  checksum: str = None, checksum_algorithm: str = "sha256", chunk_size: int = 256 * 1024,
+                  progress=None) -> CURLResponse:
+  """
+  Stream resource to the file. Data is read with readinto() to the single re-usable buffer,
+  so no new object is allocated per chunk.
+
+  Example:
+
+    from apputils.progressbar import ProgressBar
+
+    curl_download("https://example.com/image.iso", "/tmp/image.iso", resume=True,
+                  checksum="9f86d08...", progress=ProgressBar("Downloading", width=40))
+
+  :param url: Url to the resource
+  :param path: file to store resource to
+  :param resume: continue download of already existing file using "Range" request
+  :param checksum: expected hex digest of the whole file
+  :param checksum_algorithm: name of the hashlib algorithm to use for checksum
+  :param chunk_size: size of the read buffer
+  :param progress: apputils.progressbar.ProgressBar or any object with the same start/progress/stop methods,
+                   driven by the "Content-Length" of the response
+  :return: response object, its stream is already consumed
+  :raises IOError: if server response is not successful or the body is incomplete
+  :raises ValueError: if checksum of the downloaded file doesn't match expected one
+  """
+  offset = os.path.getsize(path) if resume and os.path.exists(path) else 0
+  _headers = dict(headers) if headers else {}
+  if offset:
+    _headers["Range"] = f"bytes={offset}-"
+
+  r = curl(url, params=params, auth=auth, headers=_headers, cookies=cookies, timeout=timeout, use_gzip=False,
+           use_stream=True, session=session, retry=retry)
+  raw = r.raw
+
+  if offset and r.code == 416:  # requested range is behind the file end, so the file is already complete
+    raw.close()
+    total = offset
+    stream = None
+  elif r.code == 206 and offset:
+    total = offset + int(r.headers.get("Content-Length") or 0)
+    stream = raw
+  elif 200 <= r.code < 300:
+    offset = 0  # server ignored "Range" header
+    total = int(r.headers.get("Content-Length") or 0)
+    stream = raw
+  else:
+    raw.close()
+    raise IOError(f"Unable to download '{url}', server responded with {r.code} {r.reason}")
+
+  hasher = hashlib.new(checksum_algorithm) if checksum else None
+  buff = bytearray(chunk_size)
+  view = memoryview(buff)
+  written = offset
+
+  if progress is not None:
+    progress.start(total)
+    progress.progress(written)
+
+  try:
+    with open(path, "r+b" if offset else "wb") as f:
+      if hasher and offset:
+        _hash_file(f, hasher, buff, offset)
+      f.seek(offset)
+      f.truncate()
+
+      while stream is not None:
+        n = stream.readinto(view)
+        if not n:
+          break
+
+        chunk = view if n == chunk_size else view[:n]
+        f.write(chunk)
+        if hasher:
+          hasher.update(chunk)
+
+        written += n
+        if progress is not None:
+          progress.progress(written)
+
+    if total and written != total:  # http.client doesn't raise if connection was closed before the end of body
+      raise IOError(f"Download of '{url}' is incomplete, got {written} of {total} bytes")
+  finally:
+    if stream is not None:
+      stream.close()  # not fully read response discards the pooled connection
+    if progress is not None:
+      progress.stop()
+
+  if hasher and hasher.hexdigest().lower() != checksum.lower():
+    raise ValueError(f"Checksum mismatch for '{path}': expected {checksum}, got {hasher.hexdigest()}")
+
+  return r
+
+
+def _probe_ranges(url: str, **kwargs) -> int or None:
+  """
+  :return: size of the resource if server supports byte ranges, otherwise None
+  """
+  _headers = dict(kwargs.pop("headers", None) or {})
+  _headers["Range"] = "bytes=0-0"
+  r = curl(url, headers=_headers, use_gzip=False, use_stream=True, **kwargs)
+  if r.code == 206:
+    r.raw.read()  # the single byte, so the connection is returned to the pool instead of been discarded
+  r.raw.close()
+
+  content_range = r.headers.get("Content-Range") or ""
+  if r.code != 206 and (r.headers.get("Accept-Ranges") or "").lower() != "bytes":
+    return None
+
+  if r.code == 206 and "/" in content_range:
+    total = content_range.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+  total = r.headers.get("Content-Length") if r.code != 206 else None
+  return int(total) if total and total.isdigit() else None
+
+
+def _split_ranges(total: int, parts: int) -> List[Tuple[int, int]]:
+  part_size = total // parts
+  ranges = [(i * part_size, (i + 1) * part_size - 1) for i in range(parts)]
+  ranges[-1] = (ranges[-1][0], total - 1)
+  return ranges
+
+
+class _PositionalWriter(object):
+  """
+  Writes data to the file at the given offset, os.pwrite is used if platform supports it
+  """
+
+  def __init__(self, f):
+    self._f = f
+    self._fd = f.fileno()
+    self._lock = threading.Lock()
+    self._has_pwrite = hasattr(os, "pwrite")
+
+  def write(self, data, offset: int):
+    if self._has_pwrite:
+      while data:
+        n = os.pwrite(self._fd, data, offset)
+        data = data[n:]
+        offset += n
+    else:
+      with self._lock:
+        self._f.seek(offset)
+        self._f.write(data)
+
+
+def curl_download_parallel(url: str, path: str, connections: int = 4, params: Dict[str, str] = None,
+                           auth: CURLAuth = None, headers: Dict[str, str] = None,
+                           cookies: List[CURLCookie] or CookieJar = None, timeout: int = None,
+                           session: CurlSession = None, retry: RetryPolicy = None,
+                           checksum: str = None, checksum_algorithm: str = "sha256", chunk_size: int = 256 * 1024,
+                           min_part_size: int = 1024 * 1024, progress=None) -> int:
+  """
+  Download resource over several connections at once: resource is split into byte ranges, which are fetched
+  concurrently and written directly to their offsets of the preallocated file.
+
+  If server doesn't support byte ranges or resource size is unknown, single stream curl_download() is used.
+
+  :param url: Url to the resource
+  :param path: file to store resource to
+  :param connections: max amount of ranges to fetch concurrently
+  :param checksum: expected hex digest of the whole file, verified after the download
+  :param checksum_algorithm: name of the hashlib algorithm to use for checksum
+  :param chunk_size: size of the read buffer per connection
+  :param min_part_size: resource would not be split to ranges smaller than that
+  :param progress: apputils.progressbar.ProgressBar or compatible object, updated with aggregated progress
+  :return: size of the downloaded file
+  :raises IOError: if server response is not successful
+  :raises ValueError: if checksum of the downloaded file doesn't match expected one
+  """
+  own_session = session is None
+  session = CurlSession(pool_size=connections) if own_session else session
+  request_args = dict(params=params, auth=auth, cookies=cookies, timeout=timeout, session=session, retry=retry)
+
+  try:
+    total = _probe_ranges(url, headers=headers, **request_args)
+    if total is None or total < min_part_size * 2 or connections < 2:
+      curl_download(url, path, headers=headers, checksum=checksum, checksum_algorithm=checksum_algorithm,
+                    chunk_size=chunk_size, progress=progress, **request_args)
+      return os.path.getsize(path)
+
+    ranges = _split_ranges(total, min(connections, total // min_part_size))
+    lock = threading.Lock()
+    written = [0]
+
+    if progress is not None:
+      progress.start(total)
+
+    def _fetch(writer: _PositionalWriter, start: int, end: int):
+      _headers = dict(headers) if headers else {}
+      _headers["Range"] = f"bytes={start}-{end}"
+      r = curl(url, headers=_headers, use_gzip=False, use_stream=True, **request_args)
+      stream = r.raw
+      if r.code != 206:
+        stream.close()
+        raise IOError(f"Unable to download range {start}-{end} of '{url}', server responded with {r.code} {r.reason}")
+
+      buff = bytearray(chunk_size)
+      view = memoryview(buff)
+      offset = start
+      while offset <= end:
+        n = stream.readinto(view)
+        if not n:
+          break
+
+        writer.write(view if n == chunk_size else view[:n], offset)
+        offset += n
+        with lock:
+          written[0] += n
+          if progress is not None:
+            progress.progress(written[0])
+
+      if offset != end + 1:
+        raise IOError(f"Range {start}-{end} of '{url}' is incomplete, got {offset - start} bytes")
+
+    try:
+      with open(path, "wb") as f:
+        f.truncate(total)
+        writer = _PositionalWriter(f)
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+          futures = [executor.submit(_fetch, writer, start, end) for start, end in ranges]
+          for future in futures:
+            future.result()
+    finally:
+      if progress is not None:
+        progress.stop()
+
+    if checksum:
+      hasher = hashlib.new(checksum_algorithm)
+      with open(path, "rb") as f:
+        _hash_file(f, hasher, bytearray(chunk_size), total)
+
+      if hasher.hexdigest().lower() != checksum.lower():
+        raise ValueError(f"Checksum mismatch for '{path}': expected {checksum}, got {hasher.hexdigest()}")
+
+    return total
+  finally:
+    if own_session:
+      session.close()
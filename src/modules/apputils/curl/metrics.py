@@ -0,0 +1,253 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import logging
+import math
+import threading
+import time
+from contextvars import ContextVar
+
+from typing import Callable, Dict, Iterable, List
+from urllib.parse import urlsplit
+
+
+_log = logging.getLogger(__name__)
+
+
+class RequestTimings(object):
+  """
+  Per-phase request timings in seconds, None if phase was not measured (e.g. dns/connect/tls for the
+  re-used keep-alive connection or transfer of the streamed response)
+  """
+  __slots__ = ("dns", "connect", "tls", "ttfb", "transfer", "total")
+
+  def __init__(self):
+    self.dns: float or None = None
+    self.connect: float or None = None
+    self.tls: float or None = None
+    self.ttfb: float or None = None
+    self.transfer: float or None = None
+    self.total: float or None = None
+
+  def to_dict(self) -> Dict[str, float or None]:
+    return {name: getattr(self, name) for name in self.__slots__}
+
+  def __str__(self):
+    return ", ".join(f"{name}: {value * 1000:.2f}ms" for name, value in self.to_dict().items() if value is not None)
+
+
+class RequestMetrics(object):
+  """
+  Metrics of the single request attempt, passed to the instrumentation hooks
+  """
+  __slots__ = ("method", "url", "host", "code", "error", "reused_connection", "timings",
+               "bytes_sent", "bytes_received", "bytes_decoded", "_started", "_token")
+
+  def __init__(self, method: str, url: str):
+    self.method: str = method
+    self.url: str = url
+    self.host: str = urlsplit(url).netloc
+    self.code: int or None = None
+    self.error: Exception or None = None
+    self.reused_connection: bool = False
+    self.timings: RequestTimings = RequestTimings()
+    self.bytes_sent: int = 0             # request line, headers and body
+    self.bytes_received: int or None = None  # response body as it was on the wire (compressed)
+    self.bytes_decoded: int or None = None   # response body after decompression
+    self._started: float = time.perf_counter()
+    self._token = None
+
+  def __str__(self):
+    received = "-" if self.bytes_received is None else f"{self.bytes_received}B"
+    decoded = "-" if self.bytes_decoded is None else f"{self.bytes_decoded}B"
+    return f"{self.method} {self.url} -> {self.code if self.error is None else type(self.error).__name__} " \
+           f"({self.timings}; sent: {self.bytes_sent}B, received: {received}, decoded: {decoded})"
+
+
+_hooks: List[Callable[[RequestMetrics], None]] = []
+_current: ContextVar = ContextVar("apputils_curl_metrics", default=None)
+
+
+def add_hook(hook: Callable[[RequestMetrics], None]):
+  """
+  Register hook, which would be called with RequestMetrics after every request attempt made by curl()/curl_async().
+  Errors raised by the hook are logged and don't fail the request
+  """
+  if hook not in _hooks:
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable[[RequestMetrics], None]):
+  if hook in _hooks:
+    _hooks.remove(hook)
+
+
+def _active_hooks(session_hooks: Iterable[Callable] or None) -> List[Callable[[RequestMetrics], None]]:
+  return _hooks + list(session_hooks) if session_hooks else list(_hooks)
+
+
+def current_metrics() -> RequestMetrics or None:
+  """
+  :return: metrics of the request in progress in the current thread or asyncio task, if instrumentation is enabled
+  """
+  return _current.get()
+
+
+def _begin(method: str, url: str) -> RequestMetrics:
+  metrics = RequestMetrics(method, url)
+  metrics._token = _current.set(metrics)
+  return metrics
+
+
+def _finish(metrics: RequestMetrics, hooks: List[Callable[[RequestMetrics], None]], headers_at: float or None = None):
+  """
+  Complete the attempt metrics and pass them to the hooks
+
+  :param headers_at: perf_counter() value when the response headers were received
+  """
+  finished = time.perf_counter()
+  timings = metrics.timings
+  timings.total = finished - metrics._started
+
+  if headers_at is not None:
+    if timings.ttfb is None:  # connection wasn't instrumented, so the whole wait counts
+      timings.ttfb = headers_at - metrics._started - sum(t for t in (timings.dns, timings.connect, timings.tls) if t)
+    if metrics.bytes_received is not None and timings.transfer is None:
+      timings.transfer = finished - headers_at
+
+  _current.reset(metrics._token)  # request made while sending the other one gives the current metrics back
+  for hook in hooks:
+    try:
+      hook(metrics)
+    except Exception:
+      _log.exception("Instrumentation hook %r failed for %s %s", hook, metrics.method, metrics.url)
+
+
+class LatencyHistogram(object):
+  """
+  Fixed-memory latency histogram with logarithmic buckets, percentiles are accurate within the bucket
+  growth factor (5% by default)
+  """
+
+  def __init__(self, min_value: float = 0.0001, max_value: float = 300.0, growth: float = 1.05):
+    self._min: float = min_value
+    self._log_growth: float = math.log(growth)
+    self._buckets: List[int] = [0] * (int(math.log(max_value / min_value) / self._log_growth) + 2)
+    self._count: int = 0
+    self._sum: float = 0.0
+    self._max: float = 0.0
+
+  def add(self, value: float):
+    index = 0 if value <= self._min else min(len(self._buckets) - 1,
+                                             int(math.log(value / self._min) / self._log_growth) + 1)
+    self._buckets[index] += 1
+    self._count += 1
+    self._sum += value
+    self._max = max(self._max, value)
+
+  @property
+  def count(self) -> int:
+    return self._count
+
+  @property
+  def avg(self) -> float:
+    return self._sum / self._count if self._count else 0.0
+
+  @property
+  def max(self) -> float:
+    return self._max
+
+  def percentile(self, p: float) -> float:
+    """
+    :param p: percentile in range 0..100
+    :return: upper bound of the bucket, which holds the percentile
+    """
+    if not self._count:
+      return 0.0
+
+    rank = max(1, int(math.ceil(p / 100 * self._count)))
+    seen = 0
+    for index, bucket in enumerate(self._buckets):
+      seen += bucket
+      if seen >= rank:
+        return min(self._max, self._min * math.exp(self._log_growth * index))
+
+    return self._max
+
+
+class HostLatencyAggregator(object):
+  """
+  Instrumentation hook, which keeps latency histograms per host
+
+  Example:
+
+    aggregator = HostLatencyAggregator()
+    add_hook(aggregator)
+    ...
+    print(aggregator)
+  """
+
+  def __init__(self, phase: str = "total"):
+    """
+    :param phase: RequestTimings attribute to aggregate: dns, connect, tls, ttfb, transfer or total
+    """
+    if phase not in RequestTimings.__slots__:
+      raise ValueError(f"Unknown request phase '{phase}', expected one of: {', '.join(RequestTimings.__slots__)}")
+
+    self._phase: str = phase
+    self._hosts: Dict[str, LatencyHistogram] = {}
+    self._errors: Dict[str, int] = {}
+    self._lock = threading.Lock()
+
+  def __call__(self, metrics: RequestMetrics):
+    value = getattr(metrics.timings, self._phase)
+    with self._lock:
+      if metrics.error is not None:
+        self._errors[metrics.host] = self._errors.get(metrics.host, 0) + 1
+      if value is not None:
+        self._hosts.setdefault(metrics.host, LatencyHistogram()).add(value)
+
+  @property
+  def hosts(self) -> List[str]:
+    with self._lock:
+      return sorted(set(self._hosts) | set(self._errors))
+
+  def histogram(self, host: str) -> LatencyHistogram or None:
+    return self._hosts.get(host)
+
+  def errors(self, host: str) -> int:
+    return self._errors.get(host, 0)
+
+  def percentile(self, host: str, p: float) -> float:
+    histogram = self._hosts.get(host)
+    return histogram.percentile(p) if histogram else 0.0
+
+  def reset(self):
+    with self._lock:
+      self._hosts.clear()
+      self._errors.clear()
+
+  def __str__(self):
+    lines = [f"{'host':<40} {'count':>8} {'errors':>7} {'avg':>9} {'p50':>9} {'p95':>9} {'p99':>9}  "
+             f"({self._phase}, ms)"]
+    for host in self.hosts:
+      h = self._hosts.get(host) or LatencyHistogram()
+      lines.append(f"{host:<40} {h.count:>8} {self.errors(host):>7} {h.avg * 1000:>9.2f} "
+                   f"{h.percentile(50) * 1000:>9.2f} {h.percentile(95) * 1000:>9.2f} {h.percentile(99) * 1000:>9.2f}")
+    return "\n".join(lines)
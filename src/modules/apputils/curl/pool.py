@@ -0,0 +1,501 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import select
+import socket
+import ssl
+import threading
+import time
+from functools import partial
+
+from typing import Callable, Dict, Iterable, List, Tuple
+from http.client import HTTPConnection, HTTPSConnection, HTTPResponse, RemoteDisconnected
+from urllib.parse import urlsplit
+from urllib.request import HTTPHandler, HTTPSHandler, OpenerDirector, Request, build_opener
+try:
+  from urllib.request import URLError
+except ImportError:
+  from urllib.error import URLError
+
+from .retry import RetryPolicy
+from .cookies import CookieJar
+from .metrics import RequestMetrics, current_metrics
+from .dns import DnsCache
+
+
+_DEFAULT_PORTS: Dict[str, int] = {"http": 80, "https": 443}
+
+# errors which are signaling that the server silently dropped an idle keep-alive connection
+_STALE_CONNECTION_ERRORS = (RemoteDisconnected, BrokenPipeError, ConnectionResetError, ConnectionAbortedError)
+
+
+def _create_connection(address: Tuple[str, int], timeout: float = socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None,
+                       metrics: RequestMetrics = None, dns_cache: DnsCache = None) -> socket.socket:
+  """
+  socket.create_connection() with optionally cached name resolution and separately measured resolution and
+  connect phases. Addresses are tried in the resolved order until one of them accepts the connection.
+  """
+  host, port = address
+  started = time.perf_counter()
+  if dns_cache is not None:
+    addresses = dns_cache.resolve(host, port)
+  else:
+    addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+
+  if metrics is not None:
+    metrics.timings.dns = time.perf_counter() - started
+
+  started = time.perf_counter()
+  error: OSError or None = None
+  for _, _, _, _, sockaddr in addresses:
+    try:
+      sock = socket.create_connection(sockaddr[:2], timeout, source_address)
+      if metrics is not None:
+        metrics.timings.connect = time.perf_counter() - started
+      return sock
+    except OSError as e:
+      error = e
+
+  raise error if error is not None else OSError(f"getaddrinfo returned empty list for '{host}'")
+
+
+class _CountingReader(object):
+  """
+  File object wrapper, which counts amount of bytes read from it
+  """
+
+  def __init__(self, f, metrics: RequestMetrics):
+    self._f = f
+    self._metrics = metrics
+
+  def read(self, size: int = -1):
+    data = self._f.read(size)
+    self._metrics.bytes_sent += len(data)
+    return data
+
+
+def _counting_iter(data: Iterable[bytes], metrics: RequestMetrics):
+  for chunk in data:
+    metrics.bytes_sent += len(chunk)
+    yield chunk
+
+
+def _body_rewinder(data) -> Callable[[], None] or None:
+  """
+  :return: callable which prepares request body to be sent again, None if body couldn't be re-sent
+  """
+  if data is None or isinstance(data, (bytes, bytearray, memoryview, str)):
+    return lambda: None
+
+  try:
+    pos = data.tell()  # seekable file objects are rewound, iterators and pipes are consumed by the first attempt
+    return lambda: data.seek(pos)
+  except (AttributeError, OSError, ValueError):
+    return None
+
+
+class _InstrumentedConnectionMixin(object):
+  """
+  Records dns, connect, tls and time-to-first-byte phases, and amount of sent bytes of the request in progress,
+  if instrumentation is enabled for it. Host name is resolved via DNS cache, if it is set.
+  """
+
+  def __init__(self, *args, dns_cache: DnsCache = None, **kwargs):
+    super(_InstrumentedConnectionMixin, self).__init__(*args, **kwargs)
+    self._dns_cache: DnsCache or None = dns_cache
+
+  def connect(self):
+    metrics = current_metrics()
+    if metrics is None and self._dns_cache is None:
+      return super(_InstrumentedConnectionMixin, self).connect()
+
+    started = time.perf_counter()
+    create_connection = self._create_connection
+    self._create_connection = partial(_create_connection, metrics=metrics, dns_cache=self._dns_cache)
+    try:
+      super(_InstrumentedConnectionMixin, self).connect()
+    finally:
+      self._create_connection = create_connection
+
+    if metrics is not None and isinstance(self, HTTPSConnection):
+      timings = metrics.timings
+      timings.tls = time.perf_counter() - started - (timings.dns or 0.0) - (timings.connect or 0.0)
+
+  def send(self, data):
+    metrics = current_metrics()
+    if metrics is None:
+      return super(_InstrumentedConnectionMixin, self).send(data)
+
+    if isinstance(data, (bytes, bytearray, memoryview)):
+      super(_InstrumentedConnectionMixin, self).send(data)
+      metrics.bytes_sent += memoryview(data).nbytes
+    elif hasattr(data, "read"):
+      super(_InstrumentedConnectionMixin, self).send(_CountingReader(data, metrics))
+    else:
+      super(_InstrumentedConnectionMixin, self).send(_counting_iter(data, metrics))
+
+  def getresponse(self):
+    metrics = current_metrics()
+    if metrics is None:
+      return super(_InstrumentedConnectionMixin, self).getresponse()
+
+    started = time.perf_counter()
+    response = super(_InstrumentedConnectionMixin, self).getresponse()
+    metrics.timings.ttfb = time.perf_counter() - started
+    return response
+
+
+class _InstrumentedHTTPConnection(_InstrumentedConnectionMixin, HTTPConnection):
+  pass
+
+
+class _InstrumentedHTTPSConnection(_InstrumentedConnectionMixin, HTTPSConnection):
+  pass
+
+
+class _InstrumentedHTTPHandler(HTTPHandler):
+  """
+  Not pooled handler, which opens instrumented connections
+  """
+
+  def __init__(self, dns_cache: DnsCache = None):
+    super(_InstrumentedHTTPHandler, self).__init__()
+    self._dns_cache: DnsCache or None = dns_cache
+
+  def http_open(self, req: Request):
+    return self.do_open(_InstrumentedHTTPConnection, req, dns_cache=self._dns_cache)
+
+
+class _InstrumentedHTTPSHandler(HTTPSHandler):
+  def __init__(self, dns_cache: DnsCache = None):
+    super(_InstrumentedHTTPSHandler, self).__init__()
+    self._dns_cache: DnsCache or None = dns_cache
+
+  def https_open(self, req: Request):
+    return self.do_open(_InstrumentedHTTPSConnection, req, context=self._context, dns_cache=self._dns_cache)
+
+
+class _PooledHTTPResponse(HTTPResponse):
+  """
+  Response which remembers if it was closed before been read till the end,
+  in that case connection still contains not read data and couldn't be re-used
+  """
+  discarded: bool = False
+
+  def close(self):
+    if self.fp is not None:
+      self.discarded = True
+    super(_PooledHTTPResponse, self).close()
+
+
+class _PooledConnection(object):
+  def __init__(self, conn: HTTPConnection):
+    self.conn: HTTPConnection = conn
+    self.conn.response_class = _PooledHTTPResponse
+    self.requests: int = 0
+    self.last_used: float = time.monotonic()
+    self.response: HTTPResponse or None = None
+    self.busy: bool = True
+
+  @property
+  def is_idle(self) -> bool:
+    """
+    Connection could be re-used only after the previous response been read till the end
+    """
+    return not self.busy and (self.response is None or self.response.isclosed()) and not self.is_discarded
+
+  @property
+  def is_discarded(self) -> bool:
+    return self.response is not None and self.response.discarded
+
+  @property
+  def is_dropped(self) -> bool:
+    """
+    Idle keep-alive socket which became readable was closed by the remote side
+    """
+    sock = self.conn.sock
+    if sock is None:
+      return False
+
+    try:
+      readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+      return True
+
+    return bool(readable)
+
+  def close(self):
+    self.conn.close()
+
+
+class ConnectionPool(object):
+  """
+  Thread-safe pool of HTTP/1.1 keep-alive connections, grouped per (scheme, host, port).
+
+  Connection is returned back to the pool implicitly, once the response been read till the end.
+  """
+
+  def __init__(self, pool_size: int = 10, idle_timeout: float = 60.0, max_requests: int = 100):
+    """
+    :param pool_size: max amount of connections to keep per (scheme, host, port)
+    :param idle_timeout: seconds after which not used connection would be closed
+    :param max_requests: max amount of requests to send via one connection, 0 - unlimited
+    """
+    self._pool_size: int = pool_size
+    self._idle_timeout: float = idle_timeout
+    self._max_requests: int = max_requests
+    self._lock = threading.Lock()
+    self._connections: Dict[Tuple[str, str, int], List[_PooledConnection]] = {}
+    self._created: int = 0
+    self._reused: int = 0
+
+  @property
+  def created(self) -> int:
+    """
+    :return: amount of new connections opened by the pool
+    """
+    return self._created
+
+  @property
+  def reused(self) -> int:
+    """
+    :return: amount of requests which were sent via already opened connection
+    """
+    return self._reused
+
+  @classmethod
+  def _pool_key(cls, req: Request) -> Tuple[str, str, int]:
+    parts = urlsplit(f"//{req.host}")
+    return req.type, (parts.hostname or "").lower(), parts.port or _DEFAULT_PORTS.get(req.type, 80)
+
+  def _acquire(self, key: Tuple[str, str, int], factory) -> Tuple[_PooledConnection, bool, bool]:
+    """
+    :return: connection, is_reused, is_pooled
+    """
+    now = time.monotonic()
+    with self._lock:
+      connections = self._connections.setdefault(key, [])
+      found: _PooledConnection or None = None
+
+      for item in list(connections):
+        if item.busy:
+          continue
+
+        # expired connection with not fully read response means that response was abandoned by the caller
+        if now - item.last_used > self._idle_timeout or item.is_discarded:
+          connections.remove(item)
+          item.close()
+        elif found is None and item.is_idle:
+          if item.is_dropped:
+            connections.remove(item)
+            item.close()
+          else:
+            found = item
+
+      if found:
+        found.response = None
+        found.busy = True
+        found.last_used = now
+        is_reused = found.conn.sock is not None
+        if is_reused:
+          self._reused += 1
+        return found, is_reused, True
+
+      item = _PooledConnection(factory())
+      self._created += 1
+      if len(connections) < self._pool_size:
+        connections.append(item)
+        return item, False, True
+
+      return item, False, False
+
+  def _release(self, key: Tuple[str, str, int], item: _PooledConnection):
+    with self._lock:
+      connections = self._connections.get(key, [])
+      if item in connections:
+        connections.remove(item)
+    item.close()
+
+  def urlopen(self, req: Request, http_class=HTTPConnection, **http_conn_args) -> HTTPResponse:
+    host = req.host
+    if not host:
+      raise URLError('no host given')
+
+    key = self._pool_key(req)
+    timeout = req.timeout if req.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT else socket.getdefaulttimeout()
+
+    headers = dict(req.unredirected_hdrs)
+    headers.update({k: v for k, v in req.headers.items() if k not in headers})
+    headers = {name.title(): val for name, val in headers.items()}
+    rewind = _body_rewinder(req.data)
+
+    while True:
+      item, is_reused, is_pooled = self._acquire(key, lambda: http_class(host, timeout=timeout, **http_conn_args))
+      metrics = current_metrics()
+      if metrics is not None:
+        metrics.reused_connection = is_reused
+      item.requests += 1
+      item.conn.timeout = timeout
+      if item.conn.sock:
+        item.conn.sock.settimeout(timeout)
+
+      _headers = dict(headers)
+      if not is_pooled or (self._max_requests and item.requests >= self._max_requests):
+        _headers["Connection"] = "close"
+
+      try:
+        try:
+          item.conn.request(req.get_method(), req.selector, req.data, _headers,
+                            encode_chunked=req.has_header('Transfer-encoding'))
+          r = item.conn.getresponse()
+        except _STALE_CONNECTION_ERRORS as err:
+          self._release(key, item)
+          if is_reused and rewind is not None:  # keep-alive connection was dropped by the server, trying new one
+            rewind()
+            continue
+          raise URLError(err)  # same as urllib does, so it is handled by the callers
+        except OSError as err:  # timeout error
+          raise URLError(err)
+      except BaseException:
+        self._release(key, item)
+        raise
+
+      if not is_pooled or r.will_close:
+        with self._lock:
+          connections = self._connections.get(key, [])
+          if item in connections:
+            connections.remove(item)
+      else:
+        item.response = r
+        item.last_used = time.monotonic()
+        item.busy = False
+
+      r.url = req.get_full_url()
+      r.msg = r.reason
+      return r
+
+  def close(self):
+    with self._lock:
+      for connections in self._connections.values():
+        for item in connections:
+          item.close()
+      self._connections.clear()
+
+
+class _PooledHTTPHandler(HTTPHandler):
+  def __init__(self, pool: ConnectionPool, dns_cache: DnsCache = None):
+    super(_PooledHTTPHandler, self).__init__()
+    self._pool = pool
+    self._dns_cache: DnsCache or None = dns_cache
+
+  def http_open(self, req: Request):
+    if req._tunnel_host:
+      return super(_PooledHTTPHandler, self).http_open(req)
+
+    return self._pool.urlopen(req, _InstrumentedHTTPConnection, dns_cache=self._dns_cache)
+
+
+class _PooledHTTPSHandler(HTTPSHandler):
+  def __init__(self, pool: ConnectionPool, context: ssl.SSLContext = None, dns_cache: DnsCache = None):
+    super(_PooledHTTPSHandler, self).__init__(context=context)
+    self._pool = pool
+    self._dns_cache: DnsCache or None = dns_cache
+
+  def https_open(self, req: Request):
+    if req._tunnel_host:
+      return super(_PooledHTTPSHandler, self).https_open(req)
+
+    return self._pool.urlopen(req, _InstrumentedHTTPSConnection, context=self._context, dns_cache=self._dns_cache)
+
+
+class CurlSession(object):
+  """
+  Keeps HTTP/1.1 connections alive between requests.
+
+  Example:
+
+    with CurlSession(pool_size=4) as session:
+      for page in range(10):
+        r = curl("http://example.com/api", params={"page": page}, session=session)
+  """
+
+  def __init__(self, pool_size: int = 10, idle_timeout: float = 60.0, max_requests: int = 100,
+               ssl_context: ssl.SSLContext = None, retry: RetryPolicy = None, cookie_jar: CookieJar = None,
+               hooks: List[Callable[[RequestMetrics], None]] = None, dns_cache: DnsCache = None):
+    """
+    :param pool_size: max amount of keep-alive connections per (scheme, host, port)
+    :param idle_timeout: seconds after which not used connection would be closed
+    :param max_requests: max amount of requests to send via one connection, 0 - unlimited
+    :param ssl_context: SSL context to use for https connections
+    :param retry: default retry policy for requests sent via the session
+    :param cookie_jar: cookie jar to use for requests sent via the session without explicit cookies
+    :param hooks: instrumentation hooks for requests sent via the session, in addition to the global ones
+    :param dns_cache: cache of the resolved host names for the new connections
+    """
+    self._dns_cache: DnsCache or None = dns_cache
+    self._hooks: List[Callable[[RequestMetrics], None]] = list(hooks) if hooks else []
+    self._cookie_jar: CookieJar or None = cookie_jar
+    self._retry: RetryPolicy or None = retry
+    self._pool = ConnectionPool(pool_size, idle_timeout, max_requests)
+    self._ssl_context = ssl_context
+    self._opener: OpenerDirector or None = None
+
+  @property
+  def pool(self) -> ConnectionPool:
+    return self._pool
+
+  @property
+  def retry(self) -> RetryPolicy or None:
+    return self._retry
+
+  @property
+  def cookie_jar(self) -> CookieJar or None:
+    return self._cookie_jar
+
+  @property
+  def hooks(self) -> List[Callable[[RequestMetrics], None]]:
+    return self._hooks
+
+  @property
+  def dns_cache(self) -> DnsCache or None:
+    return self._dns_cache
+
+  def build_opener(self, *handlers) -> OpenerDirector:
+    """
+    Build urllib opener which would route http/https requests via the session pool
+    """
+    if not handlers:
+      if self._opener is None:
+        self._opener = build_opener(*self.__pooled_handlers())
+      return self._opener
+
+    return build_opener(*handlers, *self.__pooled_handlers())
+
+  def __pooled_handlers(self) -> Tuple[HTTPHandler, HTTPSHandler]:
+    return _PooledHTTPHandler(self._pool, self._dns_cache), \
+      _PooledHTTPSHandler(self._pool, self._ssl_context, self._dns_cache)
+
+  def close(self):
+    self._pool.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.close()
@@ -0,0 +1,285 @@
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Github: https://github.com/hapylestat/apputils
+#
+#
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from enum import Enum
+
+from typing import Awaitable, Callable, Dict, Tuple
+from http.client import HTTPException
+from urllib.parse import urlsplit
+
+
+class CircuitOpenError(TimeoutError):
+  """
+  Request was not sent, as the upstream host is considered to be down by the circuit breaker
+  """
+  pass
+
+
+class CircuitState(Enum):
+  CLOSED = "closed"
+  OPEN = "open"
+  HALF_OPEN = "half-open"
+
+
+class _HostCircuit(object):
+  def __init__(self):
+    self.state: CircuitState = CircuitState.CLOSED
+    self.failures: int = 0
+    self.opened_at: float = 0.0
+
+
+class CircuitBreaker(object):
+  """
+  Per-host circuit breaker.
+
+  After failure_threshold consecutive failures host circuit is opened and all requests to it are failing fast
+  with CircuitOpenError. Once recovery_timeout passed, one probe request is allowed (half-open state),
+  which closes the circuit on success or opens it again on failure or if it was not completed.
+  """
+
+  def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+    """
+    :param failure_threshold: amount of consecutive failures to open the circuit
+    :param recovery_timeout: seconds to wait before the probe request
+    """
+    self._failure_threshold: int = failure_threshold
+    self._recovery_timeout: float = recovery_timeout
+    self._hosts: Dict[str, _HostCircuit] = {}
+    self._lock = threading.Lock()
+
+  def state(self, host: str) -> CircuitState:
+    with self._lock:
+      circuit = self._hosts.get(host)
+      return circuit.state if circuit else CircuitState.CLOSED
+
+  def before_request(self, host: str):
+    """
+    :raises CircuitOpenError: if requests to the host are not allowed at the moment
+    """
+    with self._lock:
+      circuit = self._hosts.get(host)
+      if circuit is None or circuit.state == CircuitState.CLOSED:
+        return
+
+      if circuit.state == CircuitState.OPEN and time.monotonic() - circuit.opened_at >= self._recovery_timeout:
+        circuit.state = CircuitState.HALF_OPEN  # this request is the probe
+        return
+
+    raise CircuitOpenError(f"Circuit for '{host}' is open, request is not sent")
+
+  def record_success(self, host: str):
+    with self._lock:
+      circuit = self._hosts.get(host)
+      if circuit is not None:
+        circuit.state = CircuitState.CLOSED
+        circuit.failures = 0
+
+  def record_failure(self, host: str):
+    with self._lock:
+      circuit = self._hosts.setdefault(host, _HostCircuit())
+      circuit.failures += 1
+      if circuit.state == CircuitState.HALF_OPEN or circuit.failures >= self._failure_threshold:
+        circuit.state = CircuitState.OPEN
+        circuit.opened_at = time.monotonic()
+
+  def record_aborted(self, host: str):
+    """
+    Request was not completed: cancelled or failed with an error, which doesn't tell anything about the host.
+    Aborted probe opens the circuit again, so the next probe is allowed after recovery timeout.
+    """
+    with self._lock:
+      circuit = self._hosts.get(host)
+      if circuit is not None and circuit.state == CircuitState.HALF_OPEN:
+        circuit.state = CircuitState.OPEN
+        circuit.opened_at = time.monotonic()
+
+
+class RetryPolicy(object):
+  """
+  Retry policy for the curl requests: exponential backoff with full jitter, retry on network errors and
+  on the listed response codes, "Retry-After" header support and optional per-host circuit breaker.
+
+  Example:
+
+    policy = RetryPolicy(max_attempts=5, circuit_breaker=CircuitBreaker())
+    r = curl("https://example.com/api", retry=policy)
+  """
+  retry_exceptions = (TimeoutError, ConnectionError, HTTPException)
+
+  def __init__(self, max_attempts: int = 3, backoff_factor: float = 0.5, backoff_max: float = 30.0,
+               jitter: bool = True, retry_codes: Tuple[int, ...] = (429, 500, 502, 503, 504),
+               retry_methods: Tuple[str, ...] = ("GET", "PUT", "DELETE"), respect_retry_after: bool = True,
+               circuit_breaker: CircuitBreaker = None):
+    """
+    :param max_attempts: total amount of attempts, including the first one
+    :param backoff_factor: delay before the second attempt, doubled for every next one
+    :param backoff_max: max delay between attempts, "Retry-After" value is capped with it as well
+    :param jitter: use random delay in range [0, backoff] instead of fixed one
+    :param retry_codes: HTTP response codes to retry on
+    :param retry_methods: HTTP methods which are safe to be retried
+    :param respect_retry_after: wait for the "Retry-After" header value of 429/503 responses
+    :param circuit_breaker: per-host circuit breaker
+    """
+    self._max_attempts: int = max(1, max_attempts)
+    self._backoff_factor: float = backoff_factor
+    self._backoff_max: float = backoff_max
+    self._jitter: bool = jitter
+    self._retry_codes: Tuple[int, ...] = retry_codes
+    self._retry_methods: Tuple[str, ...] = retry_methods
+    self._respect_retry_after: bool = respect_retry_after
+    self._circuit_breaker: CircuitBreaker or None = circuit_breaker
+
+  @property
+  def max_attempts(self) -> int:
+    return self._max_attempts
+
+  @property
+  def circuit_breaker(self) -> CircuitBreaker or None:
+    return self._circuit_breaker
+
+  def backoff(self, attempt: int) -> float:
+    """
+    :param attempt: number of the failed attempt, starting from 1
+    :return: delay in seconds before the next attempt
+    """
+    delay = min(self._backoff_max, self._backoff_factor * (2 ** (attempt - 1)))
+    return random.uniform(0, delay) if self._jitter else delay
+
+  def _retry_after(self, headers) -> float or None:
+    value = headers.get("Retry-After") if headers is not None else None
+    if not value:
+      return None
+
+    value = value.strip()
+    if value.isdigit():
+      return min(self._backoff_max, float(value))
+
+    try:
+      return min(self._backoff_max, max(0.0, parsedate_to_datetime(value).timestamp() - time.time()))
+    except (TypeError, ValueError, IndexError):
+      return None
+
+  def delay(self, attempt: int, headers=None) -> float:
+    if self._respect_retry_after:
+      retry_after = self._retry_after(headers)
+      if retry_after is not None:
+        return retry_after
+
+    return self.backoff(attempt)
+
+  def _can_retry(self, method: str, attempt: int) -> bool:
+    return attempt < self._max_attempts and method in self._retry_methods
+
+  def _is_failure_code(self, code: int) -> bool:
+    return code in self._retry_codes and code >= 500
+
+  @classmethod
+  def _discard(cls, response):
+    raw = response.raw
+    if hasattr(raw, "close"):
+      raw.close()
+
+  def _on_response(self, host: str, method: str, attempt: int, response) -> float or None:
+    """
+    :return: delay before the next attempt or None if response should be returned
+    """
+    if self._circuit_breaker:
+      if self._is_failure_code(response.code):
+        self._circuit_breaker.record_failure(host)
+      else:
+        self._circuit_breaker.record_success(host)
+
+    if response.code in self._retry_codes and self._can_retry(method, attempt):
+      self._discard(response)
+      return self.delay(attempt, response.headers)
+
+    return None
+
+  def _on_error(self, host: str, method: str, attempt: int, e: Exception) -> float:
+    if isinstance(e, CircuitOpenError):
+      raise e
+
+    if self._circuit_breaker:
+      self._circuit_breaker.record_failure(host)
+
+    if not self._can_retry(method, attempt):
+      raise e
+
+    return self.backoff(attempt)
+
+  def _on_abort(self, host: str):
+    if self._circuit_breaker:
+      self._circuit_breaker.record_aborted(host)
+
+  def call(self, method: str, url: str, func: Callable):
+    """
+    Execute request with retries
+
+    :param method: HTTP method of the request
+    :param url: request url, host part is used by the circuit breaker
+    :param func: callable which sends the request and returns CURLResponse
+    """
+    host = urlsplit(url).netloc
+    attempt = 0
+    while True:
+      attempt += 1
+      try:
+        if self._circuit_breaker:
+          self._circuit_breaker.before_request(host)
+        response = func()
+      except self.retry_exceptions as e:
+        time.sleep(self._on_error(host, method, attempt, e))
+        continue
+      except BaseException:
+        self._on_abort(host)
+        raise
+
+      delay = self._on_response(host, method, attempt, response)
+      if delay is None:
+        return response
+      time.sleep(delay)
+
+  async def call_async(self, method: str, url: str, func: Callable[[], Awaitable]):
+    """
+    Asyncio version of the call(), func should return awaitable
+    """
+    host = urlsplit(url).netloc
+    attempt = 0
+    while True:
+      attempt += 1
+      try:
+        if self._circuit_breaker:
+          self._circuit_breaker.before_request(host)
+        response = await func()
+      except self.retry_exceptions as e:
+        await asyncio.sleep(self._on_error(host, method, attempt, e))
+        continue
+      except BaseException:
+        self._on_abort(host)
+        raise
+
+      delay = self._on_response(host, method, attempt, response)
+      if delay is None:
+        return response
+      await asyncio.sleep(delay)
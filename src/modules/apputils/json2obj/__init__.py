@@ -17,8 +17,45 @@
 #
 #
 import json
-from types import FunctionType
-from typing import get_type_hints, get_args, ClassVar, Dict
+from array import array
+from typing import Dict, IO, Iterable, Iterator, List
+
+from .plan import ClassPlan, ValidationError, report_error, errors_report
+from .compact import CompactMeta
+from .clone import copy_view
+from .validation import ValidationReport, validate_records, nested_error
+from .codegen import specialize, init_source
+from . import decoder, encoder
+
+
+# array.array type codes for the numeric columns of SerializableObject.from_list(columnar=True)
+_ARRAY_TYPECODES = {
+  int: "q",
+  float: "d"
+}
+
+
+def _reporting(convert):
+  """
+  Converter, which reports errors raised by the strict nested views instead of raising them
+  """
+  def _convert(obj, value):
+    try:
+      return convert(obj, value)
+    except ValueError as e:
+      report_error(obj, nested_error(e))
+      return None
+  return _convert
+
+
+def _reporting_fields(plan: ClassPlan) -> list:
+  """
+  Fields of the plan with the reporting converters, the rest of the record is converted after the bad nested view
+  """
+  if plan.reporting_fields is None:
+    plan.reporting_fields = [(name, key, default, _reporting(convert), exact)
+                             for name, key, default, convert, exact in plan.fields]
+  return plan.reporting_fields
 
 
 class SerializableObject(object):
@@ -50,13 +87,47 @@ class SerializableObject(object):
 
     person = PersonView(name=name, age=16)
 
+    For the large amount of small records, view could be declared with CompactMeta metaclass: fields
+    are stored in __slots__ and instances have no __dict__ (see CompactMeta):
+
+   class PersonView(SerializableObject, metaclass=CompactMeta):
+     name: str = None
+     age: int = 0
+
+    For the hot ingestion paths, the constructor with the unrolled de-serialization could be generated
+    per view class with @specialize decorator (see codegen.specialize).
+
+    Class schema (annotations, defaults, __strict__, __lazy__, __aliases__ and __mapping__) is compiled to
+    the plan on the first use of the view class and cached in the class. Changes made to the class after
+    that are not picked up, declare a subclass with the other settings instead:
+
+   class LenientPersonView(PersonView):
+     __strict__ = False
+
   """
+  __slots__ = ()
 
   """
   Any error in de-serialization will trigger ValueError exception
   """
   __strict__: bool = True
 
+  """
+  Convert nested views and typed lists/dicts only on the first access of the field, instead of the
+  de-serialization time. Conversion result is cached in the instance, type errors of the field are
+  reported (or raised in strict mode) on the first access as well.
+
+  Reading a few fields of the big document costs in proportion to what is read:
+
+   class PersonView(SerializableObject):
+     __lazy__ = True
+
+     name: str = None
+     address: AddressView = None        # AddressView(dict) is created on the person.address access
+     phones: List[PhoneView] = []
+  """
+  __lazy__: bool = False
+
   """
   Group an json key by the string.endswith pattern.
 
@@ -99,16 +170,17 @@ class SerializableObject(object):
   __aliases__: Dict = {}
 
   def __init__(self, serialized_obj: str or dict or object or None = None, **kwargs):
-    self.__error__ = []
+    plan = ClassPlan.of(self.__class__)
+    # compact view gets the list on the first error, reading the set slot is cheaper than the __getattr__ fallback
+    self.__error__ = () if plan.compact else []
 
-    if isinstance(serialized_obj, type(self)):
-      import copy
-      self.__dict__ = copy.deepcopy(serialized_obj.__dict__)
-      self.__annotations__ = copy.deepcopy(serialized_obj.__annotations__)
+    if isinstance(serialized_obj, type(self)):  # see clone()
+      copy_view(serialized_obj, self)
       return
 
     if isinstance(serialized_obj, str):
-      # ToDo: inject class decode via object_hook/object_pairs_hook with provided schema
+      # the C scanner followed by the compiled plan walk is faster than per-object hooks in python,
+      # see iter_json() for the big documents
       serialized_obj = json.loads(serialized_obj)
 
     assert type(serialized_obj) is dict or serialized_obj is None
@@ -122,126 +194,245 @@ class SerializableObject(object):
     if serialized_obj is None:
       return
 
-    self.__deserialize(serialized_obj)
-
-  def __handle_errors(self, clazz: ClassVar, d: dict, missing_definitions, missing_annotations):
-    for miss_def in missing_definitions:
-      v = d[miss_def]
-      self.__error__.append(f"{clazz.__name__} class doesn't contain property '{miss_def}: {type(v).__name__}' (value sample:{v})")
-
-    for miss_ann in missing_annotations:
-      self.__error__.append(f"{clazz.__name__} class doesn't contain type annotation in the definition '{miss_ann}'")
+    self.__deserialize(plan, serialized_obj)
 
-    if not self.__error__:
-      return
+  def __handle_errors(self, plan: ClassPlan, d: dict, missing_definitions, raise_errors: bool = True):
+    plan.report_schema_errors(self, d, missing_definitions)
 
-    end_line = "\n- "
-    raise ValueError(f"""
-A number of errors happen:
---------------------------
-- {end_line.join(self.__error__)}
-""")
-
-  def __deserialize_transform(self, property_value, schema):
-    is_generic = '__origin__' in schema.__dict__
-    _type = schema.__dict__['__origin__'] if is_generic else schema
-    schema_args = list(get_args(schema)) if is_generic else [] if _type is list else [schema]
-    schema_len = len(schema_args)
-    property_type = schema_args[0] if schema_args else None
-
-    if property_type in (int, float, complex) and isinstance(property_value, str) and property_value == "":
-      property_value = 0  # this is really weird fix for bad written API
-
-    if property_type and property_value is not None and not isinstance(property_value, _type) \
-      and not (issubclass(property_type, SerializableObject) and isinstance(property_value, dict)):
-
-      self.__error__.append(
-        "Conflicting type in schema and data for object '{}', expecting '{}' but got '{}' (value: {})".format(
-          self.__class__.__name__,
-          property_type.__name__,
-          type(property_value).__name__,
-          property_value
-        ))
-      return None
+    if raise_errors and self.__error__:
+      raise ValueError(errors_report(self.__error__))
 
-    if _type is list:
-      return [property_type(i) for i in property_value] if property_type else property_value
-    elif _type is dict:
-      return {k: self.__deserialize_transform(v, schema_args[1] if schema_len == 2 else type(v)) for k, v in property_value.items()}
+  def __deserialize(self, plan: ClassPlan, d: dict, raise_errors: bool = True):
+    fields = plan.fields if raise_errors else _reporting_fields(plan)
+    if plan.compact:  # defaults are served by the class
+      for property_name, resolved_prop, _, convert, exact in fields:
+        if resolved_prop in d:
+          v = d[resolved_prop]
+          setattr(self, property_name, v if v.__class__ is exact else convert(self, v))
     else:
-      return _type(property_value) if _type and property_value is not None else property_value
-
-  def __deserialize(self, d: dict):
-    self.__error__ = []
-    clazz = self.__class__
-    exclude_types = (FunctionType, property, classmethod, staticmethod)
-    properties = {k: v for k, v in clazz.__dict__.items() if not k.startswith("__") and not isinstance(v, exclude_types)}
-    annotations = get_type_hints(clazz)
-
-    for property_name, schema in annotations.items():
-      if property_name.startswith("__"):
-        continue
-
-      try:
-        # the way to map properties like "a-b" to python fields
-        resolved_prop = self.__aliases__[property_name]
-      except KeyError:
-        resolved_prop = property_name
+      attrs = self.__dict__
+      for property_name, resolved_prop, default, convert, exact in fields:
+        if resolved_prop in d:
+          v = d[resolved_prop]
+          attrs[property_name] = v if v.__class__ is exact else convert(self, v)
+        else:  # Property didn't come with data, setting default value
+          attrs[property_name] = default
+
+    missing_definitions = plan.unknown_keys(d)
+    if plan.mapping and missing_definitions:
+      for definition, ret in plan.group_unknown(d, missing_definitions).items():
+        setattr(self, definition, ret)
+
+    if plan.strict and (missing_definitions or plan.missing_annotations or self.__error__):
+      self.__handle_errors(plan, d, missing_definitions, raise_errors)
+
+  def clone(self) -> 'SerializableObject':
+    """
+    Copy of the view, same as passing the view to the constructor. Immutable values are shared with the
+    source, nested views, lists and dicts are copied.
+
+    For the views with __lazy__ set, fields which are not accessed yet are not copied: the copy converts
+    their json value on its own first access, so forking a record and touching a few fields of it doesn't
+    convert the rest. Source view is never modified by the copy.
+    """
+    return copy_view(self)
+
+  @classmethod
+  def from_json(cls, s: str or bytes) -> 'SerializableObject' or List['SerializableObject']:
+    """
+    Decode JSON document to the view instance, or list of instances for the top-level JSON array
+    """
+    data = json.loads(s)
+    return cls.from_list(data) if isinstance(data, list) else cls(data)
+
+  @classmethod
+  def iter_json(cls, source: str or bytes or IO, chunk_size: int = 64 * 1024) -> Iterator['SerializableObject']:
+    """
+    Incrementally decode top-level JSON array from the file or stream, yielding view instance per array item.
+    Every item is converted right after it is scanned, so neither the whole document nor the tree of dicts
+    for it are kept in the memory.
+
+    Example:
+
+      with open("people.json", "rb") as f:
+        for person in PersonView.iter_json(f):
+          ...
+
+    :param source: JSON document, text or binary file-like object (binary is decoded as utf-8)
+    :param chunk_size: amount of characters (bytes) to read at once
+    """
+    return cls.iter_list(decoder.iter_items(source, chunk_size))
+
+  @classmethod
+  def validate(cls, records: Iterable[dict], report: ValidationReport = None) -> ValidationReport:
+    """
+    Check the batch of records against the class schema without creating the views. Nothing is raised,
+    errors are collected by the record index and their messages are formatted only when they are read.
+
+    :param records: list or iterable of dicts
+    :param report: report to add errors to, record indexes continue from the report.records
+    """
+    return validate_records(ClassPlan.of(cls), records, report if report is not None else ValidationReport())
+
+  @classmethod
+  def iter_list(cls, records: Iterable[dict], report: ValidationReport = None) -> Iterator['SerializableObject']:
+    """
+    Lazily convert records to the view instances, see from_list()
+    """
+    if report is not None:
+      return cls.__iter_reported(records, report)
+    return cls.__iter_list(records)
+
+  @classmethod
+  def __iter_list(cls, records: Iterable[dict]) -> Iterator['SerializableObject']:
+    plan = ClassPlan.of(cls)
+    if cls.__init__ is not SerializableObject.__init__:  # respect custom constructors
+      for d in records:
+        yield cls(d)
+      return
 
-      if resolved_prop not in d:  # Property didn't come with data, setting default value
-        self.__setattr__(property_name, properties[property_name])
+    new = cls.__new__
+    for d in records:
+      if d.__class__ is not dict:  # None, JSON string or instance are handled by the constructor
+        yield cls(d)
         continue
 
-      property_value = d[resolved_prop]
-      self.__setattr__(property_name, self.__deserialize_transform(property_value, schema))
-
-    missing_definitions = set(d.keys()) - set(annotations.keys()) - set(self.__aliases__.values())
-    if self.__mapping__:
-      for definition, pattern in self.__mapping__.items():
-        ret = {}
-        for unknown_def in missing_definitions:
-          if unknown_def.endswith(pattern):
-            ret[unknown_def] = d[unknown_def]
-        if ret:
-          self.__setattr__(definition, ret)
-          missing_definitions = set(missing_definitions) - set(ret.keys())
-
-    if self.__strict__:
-      missing_annotations = set(properties.keys()) - set(annotations.keys())
-      self.__handle_errors(clazz, d, missing_definitions, missing_annotations)
-
-  def __serialize_transform(self, item):
-    _type = type(item)
-
-    if _type is list:
-      return [self.__serialize_transform(i) for i in item]
-    elif _type is dict:
-      return {k: self.__serialize_transform(v) for k, v in item.items() if v is not None}
-    else:
-      return self.__serialize_transform(item.serialize()) if issubclass(_type, SerializableObject) else _type(item)
-
-  def serialize(self) -> dict:
-    # first of all we need to move defaults from class
-    all_properties = dict(self.__class__.__dict__)
-    all_properties.update(dict(self.__dict__))
-    _filter_properties = list(self.__aliases__.keys()) + list(self.__mapping__.keys())
-
-    properties: Dict = {k: v for k, v in all_properties.items()
-                        if not k.startswith("__")                                     # filter hidden properties
-                        and not isinstance(v, (FunctionType, property, classmethod))  # ignore functions
-                        and k not in _filter_properties                               # exclude "special cases"
-                        }
-
-    if self.__aliases__:
-      properties.update({a: all_properties[p] for p, a in self.__aliases__.items() if p in all_properties})
-
-    if self.__mapping__:
-      for k in self.__mapping__.keys():
-        if k in all_properties and isinstance(all_properties[k], dict):
-          properties.update(all_properties[k])
-
-    return self.__serialize_transform(properties)
-
-  def to_json(self) -> str:
-    # ToDo: inject class encode via object_hook/object_pairs_hook with provided schema
-    return json.dumps(self.serialize())
+      obj = new(cls)
+      obj.__error__ = () if plan.compact else []
+      obj.__deserialize(plan, d)
+      yield obj
+
+  @classmethod
+  def __iter_reported(cls, records: Iterable[dict], report: ValidationReport) -> Iterator['SerializableObject']:
+    """
+    Convert records without raising, errors are collected to the report. Field with the bad value is left
+    with None or the default. None is yielded for the records, which the custom constructor failed to convert
+    """
+    plan = ClassPlan.of(cls)
+    # generated constructor raises on the strict errors, the interpreted path is used to collect them
+    custom_init = cls.__init__ is not SerializableObject.__init__ and \
+                  not getattr(cls.__init__, "__specialized__", False)
+    new = cls.__new__
+    for index, d in enumerate(records, start=report.records):
+      report.records = index + 1
+      if custom_init or d.__class__ is not dict:
+        try:
+          obj = cls(d)
+        except ValueError as e:
+          report.add(index, [ValidationError("{}", str(e).strip())])
+          yield None
+          continue
+      else:
+        obj = new(cls)
+        obj.__error__ = () if plan.compact else []
+        obj.__deserialize(plan, d, False)
+
+      if obj.__error__:
+        report.add(index, obj.__error__)
+      yield obj
+
+  @classmethod
+  def from_list(cls, records: Iterable[dict], columnar: bool = False, use_array: bool = False,
+                report: ValidationReport = None) -> List['SerializableObject'] or Dict[str, list or array]:
+    """
+    Convert list of records in one pass over the compiled class schema
+
+    Example:
+
+      people = PersonView.from_list(json.loads(response))
+      columns = PersonView.from_list(json.loads(response), columnar=True, use_array=True)
+      avg_age = sum(columns["age"]) / len(columns["age"])
+
+      report = ValidationReport()
+      people = PersonView.from_list(json.loads(response), report=report)  # bulk ingestion, nothing is raised
+      valid = [p for i, p in enumerate(people) if i not in report.errors]
+
+    :param records: list or iterable of dicts
+    :param columnar: instead of list of objects, return dict of field name -> list of the field values,
+                     no objects are created for the records
+    :param use_array: with columnar=True, store int and float columns in array.array, columns
+                      with None values (or out of the int64 range) are left as lists
+    :param report: collect errors by the record index instead of raising on the first bad record (even for
+                   the strict view), see ValidationReport
+    """
+    if not columnar:
+      return list(cls.iter_list(records, report))
+
+    plan = ClassPlan.of(cls)
+    sink = cls.__new__(cls)  # collects errors of the record being converted
+    sink.__error__ = []
+    columns: Dict[str, list] = {name: [] for name, _, _, _, _ in plan.fields}
+    steps = [(key, default, plan.lazy[name].convert if name in plan.lazy else convert, exact, columns[name].append)
+             for name, key, default, convert, exact in plan.fields]  # columns are never lazy
+    if report is not None:  # rows should stay aligned, strict nested views are not allowed to raise
+      steps = [(key, default, _reporting(convert), exact, append) for key, default, convert, exact, append in steps]
+    groups_only = {definition: columns.setdefault(definition, []) for definition, _ in plan.mapping
+                   if definition not in plan.schemas}
+
+    index = report.records - 1 if report is not None else -1
+    for index, d in enumerate(records, start=index + 1):
+      for key, default, convert, exact, append in steps:
+        if key in d:
+          v = d[key]
+          append(v if v.__class__ is exact else convert(sink, v))
+        else:
+          append(default)
+
+      missing_definitions = plan.unknown_keys(d)
+      if plan.mapping:
+        groups = plan.group_unknown(d, missing_definitions) if missing_definitions else {}
+        for definition, column in groups_only.items():
+          column.append(groups.get(definition))
+        for definition, ret in groups.items():
+          if definition not in groups_only:
+            columns[definition][-1] = ret
+
+      if sink.__error__ or (plan.strict and (missing_definitions or plan.missing_annotations)):
+        if plan.strict:
+          sink.__handle_errors(plan, d, missing_definitions, report is None)
+        if report is not None:
+          report.add(index, sink.__error__)
+        sink.__error__ = []
+
+    if report is not None:
+      report.records = index + 1
+
+    if use_array:
+      for name, schema in plan.schemas.items():
+        typecode = _ARRAY_TYPECODES.get(schema)
+        if typecode and None not in columns[name]:
+          try:
+            columns[name] = array(typecode, columns[name])
+          except OverflowError:
+            pass
+
+    return columns
+
+  def serialize(self, skip_none: bool = True) -> dict:
+    """
+    Convert view to the json-compatible dict, using serialization plan compiled once per class
+
+    :param skip_none: do not output fields with None values (and None values of the nested dicts)
+    """
+    return encoder.serialize(self, skip_none)
+
+  def to_json(self, skip_none: bool = True) -> str:
+    return encoder.dumps(self, skip_none)
+
+  def dump(self, fp: IO[str], skip_none: bool = True):
+    """
+    Write view as JSON document to the text stream
+    """
+    fp.write(encoder.dumps(self, skip_none))
+
+  @staticmethod
+  def dump_list(objects: Iterable['SerializableObject'], fp: IO[str], skip_none: bool = True):
+    """
+    Write views as JSON array to the text stream, without building the whole document in the memory
+
+    Example:
+
+      with open("people.json", "w") as f:
+        PersonView.dump_list(PersonView.iter_json(source), f)
+    """
+    encoder.dump_list(objects, fp, skip_none)
@@ -0,0 +1,97 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+import copy
+
+from .plan import ClassPlan, LazyValue
+
+
+_SHARED_TYPES = (str, int, float, bool, complex, bytes, type(None))  # values, which are shared by the copies
+
+
+def copy_value(v):
+  """
+  Copy of the json-like value: immutable values are shared, lists, dicts and views are copied recursively,
+  other objects are deep-copied
+  """
+  _type = v.__class__
+  if _type in _SHARED_TYPES:
+    return v
+  if _type is list:
+    return [i if i.__class__ in _SHARED_TYPES else copy_value(i) for i in v]
+  if _type is dict:
+    return {k: i if i.__class__ in _SHARED_TYPES else copy_value(i) for k, i in v.items()}
+
+  from . import SerializableObject
+  if isinstance(v, SerializableObject):
+    return copy_view(v)
+  return copy.deepcopy(v)
+
+
+def _copy_lazy(v):
+  """
+  Value of the lazy field: json value, which is not converted yet, is shared and each view converts it
+  on its own. Converted value could be referenced outside of the view and is copied
+  """
+  return v if v.__class__ is LazyValue else copy_value(v)
+
+
+def copy_view(source, target=None):
+  """
+  Structural copy of the view, no constructor is called for the copy.
+
+  Immutable values are shared, nested views and containers are copied. For the lazy views (see
+  SerializableObject.__lazy__) fields, which are not accessed yet, share the json value and are
+  converted by the copy on its own first access. The source is never modified.
+
+  :param target: instance to populate, new instance of the source class is created otherwise
+  """
+  clazz = source.__class__
+  plan = ClassPlan.of(clazz)
+  lazy = plan.lazy
+  if target is None:
+    target = clazz.__new__(clazz)
+
+  if not plan.compact:
+    attrs = {}
+    for k, v in source.__dict__.items():
+      if v.__class__ in _SHARED_TYPES:
+        attrs[k] = v
+      elif k in lazy:
+        attrs[k] = _copy_lazy(v)
+      else:
+        attrs[k] = copy_value(v)
+    target.__dict__ = attrs
+    return target
+
+  for name in (*clazz.__field_defaults__, "__error__"):
+    field = lazy.get(name)
+    try:
+      v = field.slot.__get__(source, clazz) if field else object.__getattribute__(source, name)
+    except AttributeError:  # not set, the class default is used
+      continue
+
+    if v.__class__ in _SHARED_TYPES or (v.__class__ is tuple and not v):  # empty tuple is __error__ without errors
+      pass
+    elif field:
+      v = _copy_lazy(v)
+    else:
+      v = copy_value(v)
+    setattr(target, name, v)
+
+  return target
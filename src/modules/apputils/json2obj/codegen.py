@@ -0,0 +1,227 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+import linecache
+from typing import Any, Callable, Dict, List, Set, get_args, get_origin
+
+from .plan import ClassPlan, LazyValue, compile_converter, errors_report, _IMMUTABLE_TYPES
+
+
+_compiling: Set[type] = set()  # classes, which constructor is being generated
+
+
+def _nested_fill(plan: ClassPlan, clazz, index: int, ns: Dict[str, Any]) -> str or None:
+  """
+  Function, which fills the new instance of the specialized nested view from the dict. Such views are created
+  bypassing the type call and the checks of the constructor arguments.
+
+  :return: name of the function or None, if the nested view should be created with the constructor
+  """
+  init = clazz.__dict__.get("__init__")
+  if not getattr(init, "__specialized__", False) or clazz.__new__ is not object.__new__ or \
+     type(clazz).__call__ is not type.__call__:
+    return None
+
+  if clazz is plan.clazz:  # recursive view, the function is being generated
+    return "_fill"
+  if not hasattr(init, "__fill__"):  # constructor is not generated yet
+    if clazz in _compiling:  # views, which reference each other
+      return None
+    init = _compile(clazz)
+
+  ns[f"_fill_{index}"] = init.__fill__
+  return f"_fill_{index}"
+
+
+def _conversion(plan: ClassPlan, index: int, ns: Dict[str, Any]) -> str:
+  """
+  Expression, which converts the json value 'v' of the field. Common cases are inlined, the rest of the
+  values (and type errors) go to the field converter
+  """
+  from . import SerializableObject
+
+  name, _, _, convert, exact = plan.fields[index]
+  if name in plan.lazy:
+    ns["_LazyValue"] = LazyValue
+    return "v if v is None else _LazyValue(v)"
+
+  schema = plan.schemas[name]
+  ns[f"_convert_{index}"] = convert
+  fallback = f"_convert_{index}(self, v)"
+
+  if exact is not None:
+    ns[f"_type_{index}"] = exact
+    return f"v if v.__class__ is _type_{index} else {fallback}"
+  if schema is list:  # untyped list is taken as-is
+    return "v"
+
+  args = get_args(schema)
+  if get_origin(schema) is list and args and isinstance(args[0], type):
+    # C loop over the constructor calls is faster than the comprehension with the direct fill
+    ns[f"_item_{index}"] = args[0]
+    return f"list(map(_item_{index}, v)) if v.__class__ is list else {fallback}"
+  if get_origin(schema) is dict and len(args) == 2 and args[1] in _IMMUTABLE_TYPES:
+    ns[f"_value_{index}"], ns[f"_convert_value_{index}"] = args[1], compile_converter(args[1])
+    return f"{{k: i if i.__class__ is _value_{index} else _convert_value_{index}(self, i) for k, i in v.items()}} " \
+           f"if v.__class__ is dict else {fallback}"
+
+  if isinstance(schema, type) and issubclass(schema, SerializableObject):
+    ns[f"_type_{index}"] = schema
+    fill = _nested_fill(plan, schema, index, ns)
+    if fill is None:
+      return f"_type_{index}(v) if v.__class__ is dict else {fallback}"
+    return f"{fill}(_new(_type_{index}), v) if v.__class__ is dict else {fallback}"
+
+  return fallback
+
+
+def _init_source(plan: ClassPlan, ns: Dict[str, Any]) -> str:
+  """
+  Source of the constructor with the plan unrolled: one block per field with the json key (alias) and the
+  conversion inlined. Anything but a single dict argument goes to the generic constructor.
+
+  De-serialization is generated as the separate _fill(self, d) function, nested specialized views are
+  created with it directly, bypassing the constructor.
+  """
+  lines: List[str] = [
+    "def _fill(self, d):",
+    "  self.__error__ = ()" if plan.compact else "  self.__error__ = []",
+  ]
+  if plan.lazy and not plan.compact:  # value is stored bypassing the LazyField descriptor
+    lines.append("  attrs = self.__dict__")
+
+  for index, (name, key, _, _, _) in enumerate(plan.fields):
+    target = f"attrs[{name!r}]" if name in plan.lazy and not plan.compact else f"self.{name}"
+    lines += [
+      f"  if {key!r} in d:",
+      f"    v = d[{key!r}]",
+      f"    {target} = {_conversion(plan, index, ns)}",
+    ]
+    if not plan.compact:  # compact views serve defaults from the class
+      ns[f"_default_{index}"] = plan.fields[index][2]
+      lines += [
+        "  else:",
+        f"    {target} = _default_{index}",
+      ]
+
+  if plan.mapping or plan.strict:
+    lines.append("  missing = () if d.keys() <= _known_keys else d.keys() - _known_keys")
+  if plan.mapping:
+    lines += [
+      "  if missing:",
+      "    for definition, ret in _plan.group_unknown(d, missing).items():",
+      "      setattr(self, definition, ret)",
+    ]
+  if plan.strict:
+    report = [
+      "_plan.report_schema_errors(self, d, missing)",
+      "if self.__error__:",
+      "  raise ValueError(_errors_report(self.__error__))",
+    ]
+    if plan.missing_annotations:  # reported for every record
+      lines += [f"  {line}" for line in report]
+    else:
+      lines += ["  if missing or self.__error__:"] + [f"    {line}" for line in report]
+
+  lines += [
+    "  return self",
+    "",
+    "",
+    "def __init__(self, serialized_obj=None, **kwargs):",
+    "  if serialized_obj.__class__ is not dict or kwargs or self.__class__ is not _cls:",
+    "    _generic_init(self, serialized_obj, **kwargs)",
+    "    return",
+    "  _fill(self, serialized_obj)",
+  ]
+  return "\n".join(lines) + "\n"
+
+
+def _compile(clazz) -> Callable:
+  """
+  Generate the constructor of the class and install it instead of the stub, the source is registered
+  in the linecache, so it is shown by inspect.getsource() and in the tracebacks
+  """
+  from . import SerializableObject
+
+  plan = ClassPlan.of(clazz)
+  ns: Dict[str, Any] = {
+    "_cls": clazz,
+    "_new": object.__new__,
+    "_plan": plan,
+    "_known_keys": plan.known_keys,
+    "_generic_init": SerializableObject.__init__,
+    "_errors_report": errors_report,
+  }
+  _compiling.add(clazz)
+  try:
+    source = _init_source(plan, ns)
+  finally:
+    _compiling.discard(clazz)
+
+  filename = f"<json2obj generated __init__ {clazz.__module__}.{clazz.__qualname__}>"
+  exec(compile(source, filename, "exec"), ns)
+  linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+  init = ns["__init__"]
+  init.__qualname__ = f"{clazz.__qualname__}.__init__"
+  init.__source__ = source
+  init.__specialized__ = True
+  init.__fill__ = ns["_fill"]
+  clazz.__init__ = init
+  return init
+
+
+def specialize(clazz):
+  """
+  Class decorator, which replaces the interpreted de-serialization of the view with the constructor
+  generated for the class, in the spirit of the dataclasses. Field assignments are unrolled, json keys
+  (aliases) and the common conversions (exact types, nested views, typed lists and dicts) are inlined.
+
+  The constructor is generated on the first instantiation, when forward references of the annotations
+  could be resolved. Views of the same behaviour are produced, the generated source could be read
+  with init_source().
+
+  Example:
+
+   @specialize
+   class PersonView(SerializableObject):
+     name: str = None
+     address: AddressView = None
+
+  Subclasses are not specialized, unless decorated as well.
+  """
+  if "__init__" in clazz.__dict__:
+    raise TypeError(f"{clazz.__name__} class defines own __init__, which couldn't be specialized")
+
+  def __init__(self, serialized_obj: str or dict or object or None = None, **kwargs):
+    _compile(clazz)(self, serialized_obj, **kwargs)
+
+  __init__.__qualname__ = f"{clazz.__qualname__}.__init__"
+  __init__.__specialized__ = True
+  clazz.__init__ = __init__
+  return clazz
+
+
+def init_source(clazz) -> str:
+  """
+  :return: source of the constructor generated for the class decorated with specialize()
+  """
+  init = clazz.__dict__.get("__init__")
+  if not getattr(init, "__specialized__", False):
+    raise TypeError(f"{clazz.__name__} class is not specialized")
+  return init.__source__ if hasattr(init, "__source__") else _compile(clazz).__source__
@@ -0,0 +1,117 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+import codecs
+import json
+from json.decoder import JSONDecodeError, WHITESPACE
+from typing import Any, IO, Iterator, Tuple
+
+
+_ws_end = WHITESPACE.match
+_scan_once = json.JSONDecoder().scan_once  # C scanner, if available
+
+
+def _scan_value(s: str, idx: int) -> Tuple[Any, int]:
+  try:
+    return _scan_once(s, idx)
+  except StopIteration as e:
+    raise JSONDecodeError("Expecting value", s, e.value) from None
+
+
+def iter_items(source: str or bytes or IO, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+  """
+  Incrementally decode items of the top-level JSON array from the file or stream. Only the item being decoded
+  and the current chunk are kept in the memory. Top-level JSON object is yielded as the single item.
+
+  :param source: JSON document, text or binary file-like object (binary is decoded as utf-8)
+  :param chunk_size: amount of characters (bytes) to read at once
+  """
+  if isinstance(source, bytes):
+    source = source.decode("utf-8")
+
+  buffer: str = source if isinstance(source, str) else ""
+  exhausted: bool = isinstance(source, str)
+  decoder = None
+
+  def _more(size: int = chunk_size) -> bool:
+    """
+    Append next chunk to the buffer, at least size characters (bytes) are requested from the source
+    """
+    nonlocal buffer, exhausted, decoder
+    while not exhausted:
+      chunk = source.read(max(size, chunk_size))
+      if isinstance(chunk, bytes):
+        if decoder is None:
+          decoder = codecs.getincrementaldecoder("utf-8")()
+        exhausted = not chunk
+        chunk = decoder.decode(chunk, final=exhausted)
+      elif not chunk:
+        exhausted = True
+
+      if chunk:
+        buffer += chunk
+        return True
+    return False
+
+  def _skip_ws(idx: int) -> int:
+    idx = _ws_end(buffer, idx).end()
+    while idx == len(buffer) and _more():
+      idx = _ws_end(buffer, idx).end()
+    return idx
+
+  idx = _skip_ws(0)
+  if buffer[idx:idx + 1] == "{":
+    while _more(len(buffer)):
+      pass
+    yield json.loads(buffer[idx:])
+    return
+  if buffer[idx:idx + 1] != "[":
+    raise JSONDecodeError("Expecting JSON array", buffer, idx)
+
+  idx = _skip_ws(idx + 1)
+  if buffer[idx:idx + 1] == "]":
+    return
+
+  while True:
+    # item is scanned again with more data, until it is followed by the delimiter
+    while True:
+      try:
+        item, end = _scan_value(buffer, idx)
+        end = _ws_end(buffer, end).end()
+        if end < len(buffer):
+          break
+        if exhausted:
+          raise JSONDecodeError("Unterminated JSON array", buffer, end)
+      except JSONDecodeError:
+        if exhausted:
+          raise
+      _more(len(buffer) - idx)  # grow the read size with the item size, to avoid quadratic re-scanning
+
+    yield item
+
+    delimiter = buffer[end]
+    if delimiter == "]":
+      return
+    if delimiter != ",":
+      raise JSONDecodeError("Expecting ',' delimiter", buffer, end)
+
+    idx = end + 1
+    if not exhausted and idx >= chunk_size:  # drop decoded items
+      buffer = buffer[idx:]
+      idx = 0
+    idx = _skip_ws(idx)
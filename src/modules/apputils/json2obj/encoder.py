@@ -0,0 +1,194 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+import json
+from types import FunctionType
+from typing import Any, Dict, FrozenSet, IO, Iterable, List, Tuple
+
+from .plan import ClassPlan, LazyField, LazyValue
+from .compact import field_values
+
+
+_EXCLUDE_TYPES = (FunctionType, property, classmethod, staticmethod)
+_PLAIN_TYPES = (str, int, float, bool)
+_MISSING = object()
+
+# field name, output key, class default (or _MISSING), type of values which are written as-is
+OutputStep = Tuple[str, str, Any, type or None]
+
+
+def _class_default(v):
+  return v.default if isinstance(v, LazyField) else v
+
+
+def _instance_value(obj, name: str, v):
+  """
+  Value of the lazy field is converted on the access
+  """
+  return getattr(obj, name) if v.__class__ is LazyValue else v
+
+
+class EncodePlan(object):
+  """
+  Serialization plan of the SerializableObject subclass:
+
+  - steps: fields in the output order, aliased fields are written at the end under the json key.
+           Values not set on the instance are taken from the class default
+  - mapping: __mapping__ fields with their class default, which content is merged into the output
+  - known_attrs: instance attributes, covered by the plan. Instance with other attributes is serialized
+                 by the generic path
+  """
+  __slots__ = ("steps", "mapping", "known_attrs", "compact")
+
+  def __init__(self, plan: ClassPlan):
+    clazz = plan.clazz
+    aliases: Dict[str, str] = clazz.__aliases__
+    mapping: Dict[str, str] = clazz.__mapping__
+    special = set(aliases) | set(mapping)
+
+    class_props = {k: _class_default(v) for k, v in clazz.__dict__.items()
+                   if not k.startswith("__") and not isinstance(v, _EXCLUDE_TYPES) and k not in special}
+
+    if plan.compact:
+      defaults: Dict[str, Any] = clazz.__field_defaults__
+      order = [k for k in defaults if k not in special] + [k for k in class_props if k not in defaults]
+      class_props.update(defaults)
+    else:
+      order = list(class_props) + [name for name, _, _, _, _ in plan.fields
+                                   if name not in special and name not in class_props]
+
+    def _default(name: str):
+      return class_props[name] if name in class_props else _MISSING
+
+    def _exact(name: str) -> type or None:
+      schema = plan.schemas.get(name)
+      return schema if schema in _PLAIN_TYPES else None
+
+    if not plan.compact:  # aliased and mapped fields are written under another key, but default is the same
+      class_props.update({k: _class_default(clazz.__dict__[k]) for k in special if k in clazz.__dict__})
+
+    self.steps: List[OutputStep] = [(name, name, _default(name), _exact(name)) for name in order] + \
+                                   [(name, key, _default(name), _exact(name)) for name, key in aliases.items()]
+    self.mapping: List[Tuple[str, Any]] = [(name, class_props.get(name)) for name in mapping]
+    self.known_attrs: FrozenSet[str] = frozenset(order) | special | {"__error__", "__annotations__"}
+    self.compact: bool = plan.compact
+
+  @classmethod
+  def of(cls, clazz) -> 'EncodePlan':
+    plan = ClassPlan.of(clazz)
+    if plan.encoder is None:
+      plan.encoder = cls(plan)
+    return plan.encoder
+
+
+def transform(item, skip_none: bool = True):
+  """
+  Convert value to the json-compatible one: views are serialized, lists and dicts are copied recursively
+  """
+  _type = item.__class__
+  if _type in _PLAIN_TYPES or item is None:
+    return item
+  if _type is list:
+    return [transform(i, skip_none) for i in item]
+  if _type is dict:
+    return {k: transform(v, skip_none) for k, v in item.items() if v is not None or not skip_none}
+
+  from . import SerializableObject
+  if isinstance(item, SerializableObject):
+    if _type.serialize is SerializableObject.serialize:
+      return serialize(item, skip_none)
+    return transform(item.serialize(), skip_none)
+
+  return _type(item)
+
+
+def _serialize_generic(obj, skip_none: bool) -> Dict[str, Any]:
+  """
+  Serialize instance with the attributes, which are not the part of the class schema
+  """
+  all_properties = {k: _class_default(v) for k, v in obj.__class__.__dict__.items()}
+  all_properties.update({k: _instance_value(obj, k, v) for k, v in obj.__dict__.items()})
+  _filter_properties = set(obj.__aliases__) | set(obj.__mapping__)
+
+  properties: Dict = {k: v for k, v in all_properties.items()
+                      if not k.startswith("__")                 # filter hidden properties
+                      and not isinstance(v, _EXCLUDE_TYPES)     # ignore functions
+                      and k not in _filter_properties           # exclude "special cases"
+                      }
+
+  if obj.__aliases__:
+    properties.update({a: all_properties[p] for p, a in obj.__aliases__.items() if p in all_properties})
+
+  if obj.__mapping__:
+    for k in obj.__mapping__.keys():
+      if k in all_properties and isinstance(all_properties[k], dict):
+        properties.update(all_properties[k])
+
+  return transform(properties, skip_none)
+
+
+def serialize(obj, skip_none: bool = True) -> Dict[str, Any]:
+  """
+  Convert view instance to the json-compatible dict in one pass over the compiled class plan
+
+  :param skip_none: do not output fields with None values (and None values of the nested dicts)
+  """
+  encoder = EncodePlan.of(obj.__class__)
+  if encoder.compact:
+    values = field_values(obj)
+  else:
+    values = obj.__dict__
+    if not values.keys() <= encoder.known_attrs:  # attributes were added to the instance
+      return _serialize_generic(obj, skip_none)
+
+  result = {}
+  for name, key, default, exact in encoder.steps:
+    v = values.get(name, default)
+    if v is _MISSING:
+      continue
+    if v.__class__ is not exact:
+      v = transform(_instance_value(obj, name, v), skip_none)
+    if v is not None or not skip_none:
+      result[key] = v
+
+  for name, default in encoder.mapping:
+    v = values.get(name, default)
+    if isinstance(v, dict):
+      for k, item in v.items():
+        if item is not None or not skip_none:
+          result[k] = transform(item, skip_none)
+
+  return result
+
+
+def dumps(obj, skip_none: bool = True) -> str:
+  return json.dumps(serialize(obj, skip_none))
+
+
+def dump_list(objects: Iterable, fp: IO[str], skip_none: bool = True):
+  """
+  Write views as JSON array to the text stream, item by item
+  """
+  fp.write("[")
+  first = True
+  for obj in objects:
+    if not first:
+      fp.write(", ")
+    fp.write(dumps(obj, skip_none))
+    first = False
+  fp.write("]")
@@ -0,0 +1,446 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+from types import FunctionType, MemberDescriptorType
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple, get_type_hints, get_args, get_origin
+
+from .compact import is_compact
+
+
+# converter(obj, value) -> converted value, type errors are reported to the obj.__error__
+Converter = Callable[[Any, Any], Any]
+
+# field name, json key, default value, converter, type of values which could be taken as-is (or None)
+FieldStep = Tuple[str, str, Any, Converter, type or None]
+
+_EXCLUDE_TYPES = (FunctionType, property, classmethod, staticmethod, MemberDescriptorType)
+_NUMERIC_TYPES = (int, float, complex)
+_IMMUTABLE_TYPES = (str, int, float, bool, complex, bytes)  # t(value) is an equal value if type(value) is t
+
+_RESOLVED_KEYS_LIMIT = 8192  # per class, see SuffixIndex
+
+_converters: Dict[Any, Converter] = {}
+
+
+def _type_name(t) -> str:
+  return getattr(t, "__name__", None) or str(t)
+
+
+class ValidationError(object):
+  """
+  De-serialization error. The message is formatted only when it is read via str(), as values could be big
+  and the errors of the bulk conversion are often only counted
+  """
+  __slots__ = ("message_format", "args")
+
+  def __init__(self, message_format: str, *args):
+    self.message_format: str = message_format
+    self.args: tuple = args
+
+  def __str__(self) -> str:
+    return self.message_format.format(*self.args)
+
+  def __repr__(self) -> str:
+    return f"ValidationError({str(self)!r})"
+
+
+def report_error(obj, error: ValidationError or str):
+  """
+  Append error to the obj.__error__, allocating the list if compact instance has no errors yet
+  """
+  try:
+    obj.__error__.append(error)
+  except AttributeError:
+    obj.__error__ = [error]
+
+
+def errors_report(errors: List[ValidationError or str]) -> str:
+  end_line = "\n- "
+  return f"""
+A number of errors happen:
+--------------------------
+- {end_line.join(map(str, errors))}
+"""
+
+
+def _report_mismatch(obj, expected, value):
+  report_error(obj, ValidationError(
+    "Conflicting type in schema and data for object '{}', expecting '{}' but got '{}' (value: {})",
+    obj.__class__.__name__, _type_name(expected), type(value).__name__, value
+  ))
+  return None
+
+
+def _convert_dynamic(obj, value):
+  """
+  Converter for the values of untyped dict, the schema is the type of the value itself
+  """
+  return compile_converter(type(value))(obj, value)
+
+
+def compile_converter(schema) -> Converter:
+  """
+  Build converter of the json value to the schema type, converters are cached per schema
+
+  Supported schemas: classes (including SerializableObject subclasses), list, dict, List[T], Dict[K, V]
+  """
+  try:
+    return _converters[schema]
+  except KeyError:
+    pass
+
+  from . import SerializableObject
+
+  origin = get_origin(schema)
+  _type = origin if origin is not None else schema
+  schema_args = get_args(schema) if origin is not None else () if _type is list else (schema,)
+  property_type = schema_args[0] if schema_args else None
+
+  if _type is list:
+    if property_type is None:
+      def _transform(obj, value):
+        return value
+    else:
+      def _transform(obj, value):
+        return None if value is None else [property_type(i) for i in value]
+
+  elif _type is dict:
+    convert_value = compile_converter(schema_args[1]) if len(schema_args) == 2 else _convert_dynamic
+
+    def _transform(obj, value):
+      return None if value is None else {k: convert_value(obj, v) for k, v in value.items()}
+
+  elif _type in _IMMUTABLE_TYPES:
+    def _transform(obj, value):
+      return value if value is None or value.__class__ is _type else _type(value)
+
+  else:
+    def _transform(obj, value):
+      return None if value is None else _type(value)
+
+  if property_type is None:
+    converter = _transform
+  else:
+    fix_empty_numbers = property_type in _NUMERIC_TYPES
+    accepts_dict = isinstance(property_type, type) and issubclass(property_type, SerializableObject)
+
+    def converter(obj, value):
+      if fix_empty_numbers and value == "":
+        value = 0  # this is really weird fix for bad written API
+
+      if value is not None and not isinstance(value, _type) and not (accepts_dict and isinstance(value, dict)):
+        return _report_mismatch(obj, property_type, value)
+
+      return _transform(obj, value)
+
+  _converters[schema] = converter
+  return converter
+
+
+class LazyValue(object):
+  """
+  Raw json value of the lazy field, which is not converted yet
+  """
+  __slots__ = ("raw",)
+
+  def __init__(self, raw):
+    self.raw = raw
+
+
+def _defer(obj, value):
+  return value if value is None else LazyValue(value)
+
+
+def _is_lazy_schema(schema) -> bool:
+  """
+  Nested views and typed containers are converted lazily, other values are cheap to convert
+  """
+  from . import SerializableObject
+
+  origin = get_origin(schema)
+  if origin in (list, dict):
+    return bool(get_args(schema))
+  return isinstance(schema, type) and issubclass(schema, SerializableObject)
+
+
+class LazyField(object):
+  """
+  Data descriptor of the lazy field (see SerializableObject.__lazy__). Raw json value is converted and validated
+  on the first access, the result replaces the raw value in the instance.
+
+  Value is stored in the instance __dict__, or in the slot for the compact views
+  """
+  __slots__ = ("name", "default", "convert", "strict", "slot")
+
+  def __init__(self, name: str, default, convert: Converter, strict: bool, slot: MemberDescriptorType or None):
+    self.name: str = name
+    self.default = default
+    self.convert: Converter = convert
+    self.strict: bool = strict
+    self.slot: MemberDescriptorType or None = slot
+
+  def __get__(self, obj, owner=None):
+    if obj is None:
+      return self.default
+
+    if self.slot is None:
+      v = obj.__dict__.get(self.name, self.default)
+    else:
+      v = self.slot.__get__(obj, owner)  # unset slot raises AttributeError, the default is served by __getattr__
+
+    if v.__class__ is LazyValue:
+      return self.__resolve(obj, v.raw)
+    return v
+
+  def __set__(self, obj, value):
+    if self.slot is None:
+      obj.__dict__[self.name] = value
+    else:
+      self.slot.__set__(obj, value)
+
+  def __delete__(self, obj):
+    if self.slot is not None:
+      self.slot.__delete__(obj)
+    elif self.name in obj.__dict__:
+      del obj.__dict__[self.name]
+    else:
+      raise AttributeError(self.name)
+
+  def __resolve(self, obj, raw):
+    errors = len(obj.__error__)
+    value = self.convert(obj, raw)
+    if self.strict and len(obj.__error__) > errors:
+      raise ValueError(errors_report(obj.__error__[errors:]))
+
+    self.__set__(obj, value)
+    return value
+
+
+class SuffixIndex(object):
+  """
+  __mapping__ rules compiled for the grouping of the record keys. Key matching several rules belongs to the
+  first of them, as rules are applied in the order.
+
+  - suffixes: suffixes of the rules in the order
+  - rules: key suffix -> index of the first rule with such suffix
+  - lengths: distinct suffix lengths, the key suffix of each length is looked up in the rules
+  - resolved: key -> rule index (or -1 for not matching key), as dynamic keys usually repeat from record
+              to record. Limited by the amount of keys
+  """
+  __slots__ = ("suffixes", "rules", "lengths", "resolved")
+
+  def __init__(self, mapping: List[Tuple[str, str]]):
+    self.suffixes: Tuple[str, ...] = tuple(pattern for _, pattern in mapping)
+    self.rules: Dict[str, int] = {}
+    for i, pattern in enumerate(self.suffixes):
+      self.rules.setdefault(pattern, i)
+    self.lengths: Tuple[int, ...] = tuple(sorted({len(pattern) for pattern in self.rules}))
+    self.resolved: Dict[str, int] = {}
+
+  def match(self, key: str) -> int:
+    """
+    :return: index of the first rule, which suffix the key has, or -1. Result is remembered
+    """
+    i = -1
+    if key.endswith(self.suffixes):
+      n = len(key)
+      for length in self.lengths:
+        if length > n:
+          break
+        rule = self.rules.get(key[n - length:], -1)
+        if rule >= 0 and (i < 0 or rule < i):
+          i = rule
+
+    if len(self.resolved) < _RESOLVED_KEYS_LIMIT:
+      self.resolved[key] = i
+    return i
+
+  def group(self, d: dict, unknown: set) -> Dict[int, dict]:
+    """
+    Group keys in one pass over the record, rules of the most keys should be resolved already.
+    Grouped keys are removed from the unknown set
+    """
+    resolved, match = self.resolved.get, self.match
+
+    found: Dict[int, dict] = {}  # rule index -> grouped keys, in the record order
+    for k, v in d.items():
+      if k in unknown:
+        i = resolved(k)
+        if i is None:
+          i = match(k)
+        if i < 0:
+          continue
+
+        group = found.get(i)
+        if group is None:
+          found[i] = {k: v}
+        else:
+          group[k] = v
+
+    if found:
+      unknown.difference_update(*found.values())
+    return found
+
+  def scan(self, d: dict, unknown: set) -> Dict[int, dict]:
+    """
+    Group keys rule by rule, cheaper than the key by key resolution for the keys seen first time.
+    Grouped keys are removed from the unknown set, rules of the scanned keys are remembered
+    """
+    found: Dict[int, dict] = {}
+    for i, pattern in enumerate(self.suffixes):
+      ret = {k: v for k, v in d.items() if k in unknown and k.endswith(pattern)}
+      if ret:
+        found[i] = ret
+        unknown.difference_update(ret)
+
+    if len(self.resolved) < _RESOLVED_KEYS_LIMIT:
+      for i, ret in found.items():
+        self.resolved.update(dict.fromkeys(ret, i))
+      self.resolved.update(dict.fromkeys(unknown, -1))
+    return found
+
+
+class ClassPlan(object):
+  """
+  Deserialization plan of the SerializableObject subclass, compiled once on the first use of the class:
+
+  - fields: (field name, json key with resolved alias, default value, value converter, exact type) in the
+            annotations order. Values of the exact type need no conversion and are taken as-is
+  - schemas: field name -> type annotation
+  - known_keys: json keys, which are mapped to the fields
+  - mapping: __mapping__ rules as (field name, key suffix)
+  - suffix_index: mapping rules compiled for the grouping of the unknown keys (see SuffixIndex)
+  - missing_annotations: class properties without type annotation, reported in strict mode
+  - compact: fields are stored in __slots__ and defaults are not assigned to the instance (see CompactMeta)
+  - lazy: field name -> LazyField, for the classes with __lazy__ set. Such fields are stored unconverted
+  - encoder: serialization plan, compiled on the first serialize() call (see encoder.EncodePlan)
+  - reporting_fields: fields with the converters, which report errors of the strict nested views instead
+                      of raising them. Compiled on the first conversion with the ValidationReport
+  """
+  __slots__ = ("clazz", "fields", "schemas", "known_keys", "mapping", "suffix_index", "missing_annotations", "strict",
+               "compact", "lazy", "encoder", "reporting_fields")
+
+  def __init__(self, clazz):
+    annotations = get_type_hints(clazz)
+    aliases: Dict[str, str] = clazz.__aliases__
+    properties = {k: v for k, v in clazz.__dict__.items()
+                  if not k.startswith("__") and not isinstance(v, _EXCLUDE_TYPES)}
+
+    self.clazz = clazz
+    self.fields: List[FieldStep] = [
+      (name, aliases.get(name, name), self.__default(clazz, name), compile_converter(schema),
+       schema if schema in _IMMUTABLE_TYPES else None)
+      for name, schema in annotations.items() if not name.startswith("__")
+    ]
+    self.schemas: Dict[str, Any] = {name: schema for name, schema in annotations.items() if not name.startswith("__")}
+    self.known_keys: FrozenSet[str] = frozenset(annotations.keys()) | frozenset(aliases.values())
+    self.mapping: List[Tuple[str, str]] = list(clazz.__mapping__.items())
+    self.suffix_index: SuffixIndex = SuffixIndex(self.mapping)
+    self.missing_annotations: FrozenSet[str] = frozenset(properties.keys()) - frozenset(annotations.keys())
+    self.strict: bool = clazz.__strict__
+    self.compact: bool = is_compact(clazz)
+    self.lazy: Dict[str, LazyField] = {}
+    self.encoder = None
+    self.reporting_fields = None
+
+    if clazz.__lazy__:
+      self.__install_lazy_fields(clazz)
+
+  def unknown_keys(self, d: dict) -> set or Tuple:
+    """
+    :return: keys of the record, which are not mapped to the fields
+    """
+    if d.keys() <= self.known_keys:  # fast check for the valid records, no set is built
+      return ()
+    return d.keys() - self.known_keys
+
+  def report_schema_errors(self, obj, d: dict, unknown: set or Tuple):
+    """
+    Report keys, which are not mapped to the fields, and class properties without annotation (strict mode)
+    """
+    name = self.clazz.__name__
+    for key in unknown:
+      v = d[key]
+      report_error(obj, ValidationError("{} class doesn't contain property '{}: {}' (value sample:{})",
+                                        name, key, type(v).__name__, v))
+
+    for miss_ann in self.missing_annotations:
+      report_error(obj, ValidationError("{} class doesn't contain type annotation in the definition '{}'",
+                                        name, miss_ann))
+
+  def group_unknown(self, d: dict, unknown: set) -> Dict[str, dict]:
+    """
+    Group unknown keys of the record by the __mapping__ suffixes, grouped keys are removed from the unknown set.
+
+    Records with the dynamic keys seen before are grouped in one pass with the single lookup per key, others
+    are scanned rule by rule (see SuffixIndex)
+
+    :return: field name -> dict of the grouped keys and values
+    """
+    if not unknown:
+      return {}
+
+    index = self.suffix_index
+    found = index.group(d, unknown) if next(iter(unknown)) in index.resolved else index.scan(d, unknown)
+    return {self.mapping[i][0]: found[i] for i in sorted(found)}
+
+  def __install_lazy_fields(self, clazz):
+    """
+    Replace converters of the lazy fields with the deferring one, values are converted by the LazyField
+    descriptors installed to the class
+    """
+    for i, (name, key, default, convert, exact) in enumerate(self.fields):
+      if not _is_lazy_schema(self.schemas[name]):
+        continue
+
+      field = LazyField(name, default, convert, self.strict, self.__slot(clazz, name) if self.compact else None)
+      setattr(clazz, name, field)
+      self.lazy[name] = field
+      self.fields[i] = (name, key, default, _defer, None)
+
+  @staticmethod
+  def __slot(clazz, name: str) -> MemberDescriptorType:
+    for base in clazz.__mro__:
+      v = base.__dict__.get(name)
+      if isinstance(v, LazyField):
+        return v.slot
+      if isinstance(v, MemberDescriptorType):
+        return v
+    raise AttributeError(f"'{clazz.__name__}' has no slot for the field '{name}'")
+
+  @staticmethod
+  def __default(clazz, name: str):
+    if is_compact(clazz):
+      return clazz.__field_defaults__.get(name)
+
+    for base in clazz.__mro__:
+      if name in base.__dict__:
+        v = base.__dict__[name]
+        return v.default if isinstance(v, LazyField) else v
+    return None
+
+  @classmethod
+  def of(cls, clazz) -> 'ClassPlan':
+    """
+    :return: cached plan of the class, compiling it on the first call
+    """
+    plan = clazz.__dict__.get("__plan__")
+    if plan is None:
+      plan = cls(clazz)
+      clazz.__plan__ = plan
+    return plan
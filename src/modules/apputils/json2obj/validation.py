@@ -0,0 +1,116 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+from typing import Dict, Iterable, List
+
+from .plan import ClassPlan, ValidationError, report_error
+
+
+def nested_error(e: ValueError) -> ValidationError:
+  """
+  Error raised by the strict nested view, its message is already formatted
+  """
+  return ValidationError("Nested view is not valid: {}", str(e).strip())
+
+
+class ValidationReport(object):
+  """
+  Errors of the batch conversion by the record index. Messages are formatted only when they are read.
+
+  Example:
+
+    report = PersonView.validate(records)
+    if report:
+      print(f"{len(report)} of {report.records} records are invalid: {report.indexes}")
+  """
+  __slots__ = ("errors", "records")
+
+  def __init__(self):
+    self.errors: Dict[int, List[ValidationError]] = {}
+    self.records: int = 0
+
+  def add(self, index: int, errors: List[ValidationError]):
+    self.errors.setdefault(index, []).extend(errors)
+
+  @property
+  def indexes(self) -> List[int]:
+    """
+    :return: indexes of the invalid records
+    """
+    return list(self.errors)
+
+  def messages(self, index: int) -> List[str]:
+    return [str(e) for e in self.errors.get(index, ())]
+
+  def __bool__(self) -> bool:
+    """
+    :return: True if any record is invalid
+    """
+    return bool(self.errors)
+
+  def __len__(self) -> int:
+    return len(self.errors)
+
+  def __str__(self) -> str:
+    lines = [f"{len(self.errors)} of {self.records} records are invalid"]
+    for index, errors in self.errors.items():
+      lines.extend(f"[{index}] {e}" for e in errors)
+    return "\n".join(lines)
+
+
+def validate_records(plan: ClassPlan, records: Iterable[dict], report: ValidationReport) -> ValidationReport:
+  """
+  Check records against the class schema without creating views, errors are collected to the report.
+
+  Values of the exact field type and records without unknown keys pass with the fast checks only, converters
+  run for the rest of the values. Strict nested views raise on the bad data, such errors are reported for
+  the record as well.
+  """
+  clazz = plan.clazz
+  sink = clazz.__new__(clazz)  # collects errors of the record being checked
+  sink.__error__ = []
+  steps = [(key, plan.lazy[name].convert if name in plan.lazy else convert, exact)
+           for name, key, _, convert, exact in plan.fields]
+
+  for index, d in enumerate(records, start=report.records):
+    if d is None:  # converted to the view with defaults
+      pass
+    elif d.__class__ is not dict:
+      report_error(sink, ValidationError("Record is not a JSON object, got '{}'", type(d).__name__))
+    else:
+      for key, convert, exact in steps:
+        if key in d:
+          v = d[key]
+          if v.__class__ is not exact:
+            try:
+              convert(sink, v)
+            except ValueError as e:  # the rest of the record is checked after the bad nested view
+              report_error(sink, nested_error(e))
+
+      unknown = plan.unknown_keys(d)
+      if unknown and plan.mapping:
+        plan.group_unknown(d, unknown)
+      if plan.strict and (unknown or plan.missing_annotations):
+        plan.report_schema_errors(sink, d, unknown)
+
+    if sink.__error__:
+      report.add(index, sink.__error__)
+      sink.__error__ = []
+    report.records = index + 1
+
+  return report
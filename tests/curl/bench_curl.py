@@ -0,0 +1,212 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+# Usage: PYTHONPATH=src python3 -m tests.curl.bench_curl --count 2000 --payload-size 65536 --encoding gzip
+#
+# Every scenario is executed in the separate process (peak RSS is measured per scenario), stand-in server
+# is running in its own process as well, so CPU time per request belongs to the client only.
+# Results could be saved with --save and compared with the previous run via --compare.
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+
+from typing import Callable, Dict, List
+
+try:
+  import resource
+except ImportError:  # windows
+  resource = None
+
+
+def _peak_rss_mb() -> float:
+  if resource is None:
+    return 0.0
+
+  rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB on linux
+
+
+def _percentile(latencies: List[float], p: float) -> float:
+  index = min(len(latencies) - 1, max(0, int(round(p / 100 * len(latencies) + 0.5)) - 1))
+  return latencies[index]
+
+
+def _report(name: str, count: int, elapsed: float, cpu: float, latencies: List[float]) -> Dict[str, float or str]:
+  latencies.sort()
+  return {
+    "scenario": name,
+    "requests": count,
+    "rps": count / elapsed,
+    "p50": _percentile(latencies, 50) * 1000,
+    "p95": _percentile(latencies, 95) * 1000,
+    "p99": _percentile(latencies, 99) * 1000,
+    "cpu_ms": cpu / count * 1000,
+    "rss_mb": _peak_rss_mb()
+  }
+
+
+def _sequential(call: Callable[[], None], count: int) -> List[float]:
+  latencies = []
+  for _ in range(count):
+    started = time.perf_counter()
+    call()
+    latencies.append(time.perf_counter() - started)
+  return latencies
+
+
+def _bench_curl(url: str, count: int, concurrency: int) -> List[float]:
+  from modules.apputils.curl import curl
+
+  return _sequential(lambda: curl(url).content, count)
+
+
+def _bench_session(url: str, count: int, concurrency: int) -> List[float]:
+  from modules.apputils.curl import curl, CurlSession
+
+  with CurlSession(pool_size=1) as session:
+    return _sequential(lambda: curl(url, session=session).content, count)
+
+
+def _bench_stream(url: str, count: int, concurrency: int) -> List[float]:
+  from modules.apputils.curl import curl, CurlSession
+
+  def _call():
+    for _ in curl(url, session=session, use_stream=True).iter_content():
+      pass
+
+  with CurlSession(pool_size=1) as session:
+    return _sequential(_call, count)
+
+
+def _bench_many(url: str, count: int, concurrency: int) -> List[float]:
+  from modules.apputils.curl import curl_many, CurlBatchStats
+
+  stats = CurlBatchStats()
+  for _, r in curl_many([url] * count, concurrency=concurrency, stats=stats):
+    r.content
+  return list(stats._latencies)
+
+
+def _bench_async(url: str, count: int, concurrency: int) -> List[float]:
+  from modules.apputils.curl import curl_many_async, CurlBatchStats
+
+  stats = CurlBatchStats()
+
+  async def _run():
+    async for _, r in curl_many_async(asyncio.get_event_loop(), [url] * count, concurrency=concurrency, stats=stats):
+      r.content
+
+  asyncio.run(_run())
+  return list(stats._latencies)
+
+
+SCENARIOS: Dict[str, Callable[[str, int, int], List[float]]] = {
+  "curl": _bench_curl,
+  "curl+session": _bench_session,
+  "curl+stream": _bench_stream,
+  "curl_many": _bench_many,
+  "curl_async": _bench_async
+}
+
+
+def _run_scenario(name: str, url: str, count: int, concurrency: int, warmup: int, results: multiprocessing.Queue):
+  bench = SCENARIOS[name]
+  bench(url, warmup, concurrency)
+
+  cpu_started = time.process_time()
+  started = time.perf_counter()
+  latencies = bench(url, count, concurrency)
+  elapsed = time.perf_counter() - started
+  cpu = time.process_time() - cpu_started
+
+  results.put(_report(name, count, elapsed, cpu, latencies))
+
+
+def run(url: str, scenarios: List[str], count: int, concurrency: int, warmup: int = 20) -> List[Dict]:
+  reports = []
+  for name in scenarios:
+    results = multiprocessing.Queue()
+    p = multiprocessing.Process(target=_run_scenario, args=(name, url, count, concurrency, warmup, results))
+    p.start()
+    reports.append(results.get())
+    p.join()
+
+  return reports
+
+
+def print_reports(reports: List[Dict], baseline: List[Dict] = None):
+  baseline = {r["scenario"]: r for r in baseline} if baseline else {}
+  columns = ("rps", "p50", "p95", "p99", "cpu_ms", "rss_mb")
+
+  print(f"{'scenario':<14} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'cpu ms/req':>11} {'peak rss MiB':>13}")
+  for r in reports:
+    print(f"{r['scenario']:<14} {r['rps']:>10.1f} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['p99']:>9.2f} "
+          f"{r['cpu_ms']:>11.3f} {r['rss_mb']:>13.1f}")
+
+    base = baseline.get(r["scenario"])
+    if base:
+      deltas = [(r[c] - base[c]) / base[c] * 100 if base[c] else 0.0 for c in columns]
+      print(f"{'  vs baseline':<14} " + " ".join(f"{d:>+{w}.1f}%" for d, w in zip(deltas, (9, 8, 8, 8, 10, 12))))
+
+
+def main(argv: List[str] = None):
+  from .stand_in import StandInOptions, StandInProcess
+
+  parser = argparse.ArgumentParser(description="apputils.curl benchmark")
+  parser.add_argument("--count", type=int, default=1000, help="requests per scenario")
+  parser.add_argument("--concurrency", type=int, default=8, help="requests in flight for batch scenarios")
+  parser.add_argument("--latency", type=float, default=0.0, help="server latency in milliseconds")
+  parser.add_argument("--payload-size", type=int, default=None, help="response payload size in bytes")
+  parser.add_argument("--encoding", choices=("gzip", "deflate"), default=None, help="response content encoding")
+  parser.add_argument("--chunked", action="store_true", help="send chunked responses")
+  parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated list of scenarios")
+  parser.add_argument("--save", help="save results to the json file")
+  parser.add_argument("--compare", help="json file with the previous results to compare with")
+  args = parser.parse_args(argv)
+
+  scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+  unknown = set(scenarios) - set(SCENARIOS)
+  if unknown:
+    parser.error(f"unknown scenarios: {', '.join(unknown)}, available: {', '.join(SCENARIOS)}")
+
+  options = StandInOptions(latency=args.latency / 1000, payload_size=args.payload_size,
+                           content_encoding=args.encoding, chunked=args.chunked)
+
+  with StandInProcess(options) as server:
+    print(f"server: {options}; requests: {args.count}, concurrency: {args.concurrency}")
+    reports = run(server.url, scenarios, args.count, args.concurrency)
+
+  baseline = None
+  if args.compare:
+    with open(args.compare, "r") as f:
+      baseline = json.load(f)
+
+  print_reports(reports, baseline)
+
+  if args.save:
+    with open(args.save, "w") as f:
+      json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+  main()
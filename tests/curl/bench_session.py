@@ -0,0 +1,48 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+# Usage: PYTHONPATH=src python3 -m tests.curl.bench_session
+
+import time
+
+
+def _run(url: str, count: int, session=None) -> float:
+  from modules.apputils.curl import curl
+
+  start = time.perf_counter()
+  for _ in range(count):
+    r = curl(url, session=session)
+    assert r.code == 200
+  return count / (time.perf_counter() - start)
+
+
+def main(count: int = 2000):
+  from modules.apputils.curl import CurlSession
+  from .stand_in import StandInServer
+
+  with StandInServer() as server:
+    print(f"no pooling: {_run(server.url, count):10.1f} req/s")
+
+    with CurlSession(pool_size=1) as session:
+      print(f"pooling:    {_run(server.url, count, session):10.1f} req/s "
+            f"(connections opened: {session.pool.created}, reused: {session.pool.reused})")
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,220 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import gzip
+import json
+import multiprocessing
+import socket
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInOptions(object):
+  def __init__(self, latency: float = 0.0, payload_size: int = None, content_encoding: str = None,
+               chunked: bool = False, chunk_size: int = 16 * 1024):
+    """
+    :param latency: seconds to wait before the response
+    :param payload_size: approximate size of the generated JSON payload, default - tiny status object
+    :param content_encoding: "gzip", "deflate" or None
+    :param chunked: send response with "Transfer-Encoding: chunked"
+    :param chunk_size: size of the chunk for chunked responses
+    """
+    if content_encoding not in (None, "gzip", "deflate"):
+      raise ValueError(f"Unsupported content encoding: {content_encoding}")
+
+    self.latency: float = latency
+    self.payload_size: int or None = payload_size
+    self.content_encoding: str or None = content_encoding
+    self.chunked: bool = chunked
+    self.chunk_size: int = chunk_size
+
+  def build_payload(self, default: bytes) -> bytes:
+    """
+    :return: response body, already compressed if content encoding is set
+    """
+    payload = default
+    if self.payload_size:
+      record = {"id": 0, "name": "stand-in record", "tags": ["a", "b", "c"], "value": 0.5}
+      record_size = len(json.dumps(record)) + 2
+      payload = json.dumps([dict(record, id=i) for i in range(max(1, self.payload_size // record_size))]).encode()
+
+    if self.content_encoding == "gzip":
+      return gzip.compress(payload)
+    elif self.content_encoding == "deflate":
+      return zlib.compress(payload)
+
+    return payload
+
+  def __str__(self):
+    return f"latency: {self.latency * 1000:.0f}ms, payload: {self.payload_size or 'tiny'}, " \
+           f"encoding: {self.content_encoding or 'identity'}, chunked: {self.chunked}"
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+  daemon_threads = True
+  request_queue_size = 1024
+  options: StandInOptions = StandInOptions()
+  body: bytes = b""
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+  payload: bytes = b'{"status": "ok"}'
+
+  def setup(self):
+    super(StandInHandler, self).setup()
+    # headers and body are written separately, avoid Nagle delay on keep-alive connections
+    self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+  def log_message(self, format, *args):
+    pass
+
+  def _send_body(self, body: bytes, content_encoding: str = None):
+    """
+    :param content_encoding: encoding the body is already compressed with
+    """
+    options: StandInOptions = self.server.options
+    if options.latency:
+      time.sleep(options.latency)
+
+    self.send_response(200)
+    self.send_header("Content-Type", "application/json; charset=UTF-8")
+    if content_encoding:
+      self.send_header("Content-Encoding", content_encoding)
+
+    if not options.chunked:
+      self.send_header("Content-Length", str(len(body)))
+      self.end_headers()
+      self.wfile.write(body)
+      return
+
+    self.send_header("Transfer-Encoding", "chunked")
+    self.end_headers()
+    view = memoryview(body)
+    for pos in range(0, len(body), options.chunk_size):
+      chunk = view[pos:pos + options.chunk_size]
+      self.wfile.write(b"%x\r\n" % len(chunk) + chunk + b"\r\n")
+    self.wfile.write(b"0\r\n\r\n")
+
+  def _read_body(self) -> int:
+    if "chunked" in (self.headers.get("Transfer-Encoding") or "").lower():
+      size = 0
+      while True:
+        chunk_size = int(self.rfile.readline().split(b";", 1)[0], 16)
+        self.rfile.read(chunk_size + 2)
+        size += chunk_size
+        if not chunk_size:
+          break
+      return size
+
+    size = int(self.headers.get("Content-Length") or 0)
+    self.rfile.read(size)
+    return size
+
+  def do_GET(self):
+    self._send_body(self.server.body, self.server.options.content_encoding)
+
+  def do_POST(self):
+    size = self._read_body()
+    self._send_body(json.dumps({"received": size}).encode())
+
+  do_PUT = do_POST
+
+
+class StandInServer(object):
+  """
+  In-process http server to run curl benchmarks against
+
+  Usage:
+
+    with StandInServer(StandInOptions(latency=0.005, content_encoding="gzip")) as server:
+      curl(server.url)
+  """
+
+  def __init__(self, options: StandInOptions = None, host: str = "127.0.0.1", port: int = 0, handler=StandInHandler):
+    """
+    :param handler: request handler class, its "payload" attribute (if any) is the default body of GET responses
+    """
+    self._server = _StandInHTTPServer((host, port), handler)
+    self._server.options = options if options else StandInOptions()
+    self._server.body = self._server.options.build_payload(getattr(handler, "payload", StandInHandler.payload))
+    self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+  @property
+  def url(self) -> str:
+    host, port = self._server.server_address[:2]
+    return f"http://{host}:{port}"
+
+  def start(self):
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self._server.shutdown()
+    self._server.server_close()
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.stop()
+
+
+def _serve(options: StandInOptions, urls: multiprocessing.Queue, stop: multiprocessing.Event):
+  with StandInServer(options) as server:
+    urls.put(server.url)
+    stop.wait()
+
+
+class StandInProcess(object):
+  """
+  Stand-in server running in the separate process, so its CPU time doesn't affect measurements of the client
+
+  Usage:
+
+    with StandInProcess(StandInOptions(payload_size=64 * 1024)) as server:
+      curl(server.url)
+  """
+
+  def __init__(self, options: StandInOptions = None):
+    self._urls = multiprocessing.Queue()
+    self._stop = multiprocessing.Event()
+    self._process = multiprocessing.Process(target=_serve, args=(options, self._urls, self._stop), daemon=True)
+    self._url: str or None = None
+
+  @property
+  def url(self) -> str:
+    return self._url
+
+  def start(self):
+    self._process.start()
+    self._url = self._urls.get(timeout=10)
+    return self
+
+  def stop(self):
+    self._stop.set()
+    self._process.join(timeout=5)
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.stop()
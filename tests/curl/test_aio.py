@@ -0,0 +1,186 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import asyncio
+from typing import Dict, List
+
+import pytest
+
+from modules.apputils.curl.aio import AsyncCurlSession, request
+
+
+class ScriptedServer(object):
+  """
+  Raw http server, which answers with the scripted bytes per request path and records received requests
+  """
+
+  def __init__(self, responses: Dict[str, bytes]):
+    self.responses: Dict[str, bytes] = responses
+    self.requests: List[dict] = []
+    self.connections: int = 0
+    self.url: str or None = None
+    self._server = None
+
+  async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    self.connections += 1
+    try:
+      while True:
+        line = await reader.readline()
+        if not line:
+          break
+
+        method, path, _ = line.decode().split(" ", 2)
+        headers = {}
+        while True:
+          line = await reader.readline()
+          if line in (b"\r\n", b""):
+            break
+          name, _, value = line.decode().partition(":")
+          headers[name.strip().lower()] = value.strip()
+
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        self.requests.append({"method": method, "path": path, "headers": headers, "body": body})
+        writer.write(self.responses[path])
+        await writer.drain()
+        if headers.get("connection") == "close" or path.startswith("/eof"):
+          break
+    finally:
+      writer.close()
+
+  async def __aenter__(self):
+    self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+    host, port = self._server.sockets[0].getsockname()[:2]
+    self.url = f"http://{host}:{port}"
+    return self
+
+  async def __aexit__(self, exc_type, exc_val, exc_tb):
+    self._server.close()
+    await self._server.wait_closed()
+
+
+def _run(responses: Dict[str, bytes], scenario):
+  async def _main():
+    async with ScriptedServer(responses) as server:
+      return server, await scenario(server)
+
+  return asyncio.run(_main())
+
+
+def _response(body: bytes = b"", status: str = "200 OK", headers: str = "") -> bytes:
+  return f"HTTP/1.1 {status}\r\nContent-Length: {len(body)}\r\n{headers}\r\n".encode() + body
+
+
+def test_chunked_body_with_extensions_and_trailers():
+  responses = {
+    "/": b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+         b"5;name=value\r\nhello\r\n1\r\n \r\n5\r\nworld\r\n0\r\nX-Checksum: 1\r\n\r\n"
+  }
+  _, r = _run(responses, lambda server: request("GET", server.url + "/"))
+  assert (r.status, r.read()) == (200, b"hello world")
+
+
+def test_truncated_chunked_body_is_an_error():
+  responses = {"/eof": b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhel"}
+  with pytest.raises(asyncio.IncompleteReadError):
+    _run(responses, lambda server: request("GET", server.url + "/eof"))
+
+
+def test_informational_responses_are_skipped():
+  responses = {"/": b"HTTP/1.1 100 Continue\r\n\r\n" + _response(b"done")}
+  _, r = _run(responses, lambda server: request("GET", server.url + "/"))
+  assert (r.status, r.read()) == (200, b"done")
+
+
+def test_body_without_length_is_read_till_close():
+  responses = {"/eof": b"HTTP/1.0 200 OK\r\n\r\nuntil close"}
+  _, r = _run(responses, lambda server: request("GET", server.url + "/eof"))
+  assert r.read() == b"until close"
+
+
+def test_head_and_not_modified_have_no_body():
+  responses = {
+    "/head": b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\n",
+    "/cached": b"HTTP/1.1 304 Not Modified\r\nETag: \"v1\"\r\n\r\n",
+    "/next": _response(b"next")
+  }
+
+  async def scenario(server):
+    async with AsyncCurlSession() as session:
+      return [await request(method, server.url + path, session=session)
+              for method, path in (("HEAD", "/head"), ("GET", "/cached"), ("GET", "/next"))]
+
+  server, (head, cached, after) = _run(responses, scenario)
+  assert (head.read(), cached.status, cached.read(), after.read()) == (b"", 304, b"", b"next")
+  assert server.connections == 1  # response framing was kept on the reused connection
+
+
+def test_redirect_of_post_switches_to_get_without_body():
+  responses = {
+    "/form": _response(status="303 See Other", headers="Location: ../done?x=1\r\n"),
+    "/done?x=1": _response(b"ok")
+  }
+  server, r = _run(responses, lambda server: request(
+    "POST", server.url + "/form", headers={"Content-Type": "text/plain", "X-Token": "t"}, data=b"payload"
+  ))
+
+  assert (r.status, r.read(), r.geturl()) == (200, b"ok", server.url + "/done?x=1")
+  post, get = server.requests
+  assert (post["method"], post["body"]) == ("POST", b"payload")
+  assert (get["method"], get["body"], get["headers"]["x-token"]) == ("GET", b"", "t")
+  assert "content-type" not in get["headers"] and "content-length" not in get["headers"]
+
+
+def test_temporary_redirect_of_post_is_not_followed():
+  responses = {"/form": _response(status="307 Temporary Redirect", headers="Location: /other\r\n")}
+  server, r = _run(responses, lambda server: request("POST", server.url + "/form", data=b"payload"))
+  assert r.status == 307 and len(server.requests) == 1
+
+
+def test_redirect_loop_is_limited():
+  responses = {"/loop": _response(status="302 Found", headers="Location: /loop\r\n")}
+  server, r = _run(responses, lambda server: request("GET", server.url + "/loop"))
+  assert r.status == 302 and len(server.requests) == 11
+
+
+def test_session_reuses_connections():
+  responses = {"/": _response(b"ok")}
+
+  async def scenario(server):
+    async with AsyncCurlSession(max_requests=3) as session:
+      bodies = [(await request("GET", server.url + "/", session=session)).read() for _ in range(4)]
+      return bodies, session.created, session.reused
+
+  server, (bodies, created, reused) = _run(responses, scenario)
+  assert bodies == [b"ok"] * 4
+  assert (created, reused, server.connections) == (2, 2, 2)
+  assert [r["headers"].get("connection") for r in server.requests] == [None, None, "close", None]
+
+
+def test_dropped_keep_alive_connection_is_not_reused():
+  responses = {"/eof": _response(b"ok")}  # server closes connection after each response, without saying so
+
+  async def scenario(server):
+    async with AsyncCurlSession() as session:
+      first = await request("GET", server.url + "/eof", session=session)
+      await asyncio.sleep(0.05)
+      second = await request("GET", server.url + "/eof", session=session)
+      return first.read(), second.read()
+
+  server, bodies = _run(responses, scenario)
+  assert bodies == (b"ok", b"ok") and server.connections == 2
@@ -0,0 +1,154 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import asyncio
+import socket
+import threading
+import time
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+from modules.apputils.curl import CURLResponse
+from modules.apputils.curl.batch import curl_many, curl_many_async, CurlBatchStats
+from modules.apputils.curl.pool import CurlSession
+
+from .stand_in import StandInServer, StandInHandler
+
+
+class SlowHandler(StandInHandler):
+  """
+  Answers with the request path after the "delay" query argument, tracks amount of requests in flight
+  """
+  lock = threading.Lock()
+  in_flight = 0
+  max_in_flight = 0
+
+  def do_GET(self):
+    with SlowHandler.lock:
+      SlowHandler.in_flight += 1
+      SlowHandler.max_in_flight = max(SlowHandler.max_in_flight, SlowHandler.in_flight)
+    try:
+      url = urlsplit(self.path)
+      time.sleep(float(parse_qs(url.query).get("delay", ["0"])[0]))
+      if url.path == "/missing":
+        self.send_error(404)
+      else:
+        self._send_body(url.path.encode())
+    finally:
+      with SlowHandler.lock:
+        SlowHandler.in_flight -= 1
+
+
+@pytest.fixture(scope="module")
+def server():
+  with StandInServer(handler=SlowHandler) as server:
+    yield server
+
+
+@pytest.fixture
+def in_flight():
+  SlowHandler.max_in_flight = 0
+  return SlowHandler
+
+
+def _closed_port_url() -> str:
+  with socket.socket() as s:
+    s.bind(("127.0.0.1", 0))
+    return f"http://127.0.0.1:{s.getsockname()[1]}/"
+
+
+def _body(r: CURLResponse) -> str:
+  return r.body.decode()
+
+
+def _urls(server: StandInServer, delays) -> list:
+  return [f"{server.url}/{i}?delay={delay}" for i, delay in enumerate(delays)]
+
+
+DELAYS = (0.3, 0.0, 0.2, 0.0, 0.1)
+
+
+def test_ordered_results(server):
+  results = [(index, _body(r)) for index, r in curl_many(_urls(server, DELAYS), concurrency=5, ordered=True)]
+  assert results == [(i, f"/{i}") for i in range(len(DELAYS))]
+
+
+def test_results_in_order_of_completion(server):
+  results = [index for index, _ in curl_many(_urls(server, DELAYS), concurrency=5)]
+  assert sorted(results) == list(range(len(DELAYS)))
+  assert results[:2] in ([1, 3], [3, 1]) and results[2:] == [4, 2, 0]
+
+
+def test_concurrency_limit(server, in_flight):
+  session = CurlSession(pool_size=3)
+  stats = CurlBatchStats()
+  results = list(curl_many(_urls(server, [0.05] * 12), concurrency=3, session=session, stats=stats))
+
+  assert len(results) == 12 and in_flight.max_in_flight == 3
+  assert stats.count == 12 and stats.errors == 0 and stats.elapsed >= 0.2
+  assert session.pool.created == 3 and session.pool.reused == 9  # session is not closed, as it is not owned
+  session.close()
+
+
+def test_request_specs(server):
+  specs = [server.url + "/0", {"url": server.url + "/1", "params": {"delay": "0"}}, {"url": server.url + "/missing"}]
+  results = dict(curl_many(specs, concurrency=2))
+  assert (_body(results[0]), _body(results[1]), results[2].code) == ("/0", "/1", 404)
+
+  with pytest.raises(ValueError):
+    list(curl_many([1]))
+
+
+def test_exceptions(server):
+  urls = [server.url + "/0", _closed_port_url(), server.url + "/2"]
+  stats = CurlBatchStats()
+  results = dict(curl_many(urls, concurrency=1, return_exceptions=True, stats=stats))
+
+  assert isinstance(results[1], TimeoutError) and _body(results[2]) == "/2"
+  assert (stats.count, stats.errors) == (3, 1)
+
+  with pytest.raises(TimeoutError):
+    list(curl_many(urls, concurrency=1))
+
+
+def _run_async(requests, **kwargs) -> list:
+  async def _main():
+    return [item async for item in curl_many_async(asyncio.get_running_loop(), requests, **kwargs)]
+  return asyncio.run(_main())
+
+
+def test_async_ordered_results(server, in_flight):
+  results = _run_async(_urls(server, DELAYS * 2), concurrency=3, ordered=True)
+  assert [(index, _body(r)) for index, r in results] == [(i, f"/{i}") for i in range(len(DELAYS) * 2)]
+  assert in_flight.max_in_flight == 3
+
+
+def test_async_results_in_order_of_completion(server):
+  results = [index for index, _ in _run_async(_urls(server, DELAYS), concurrency=5)]
+  assert results[:2] in ([1, 3], [3, 1]) and results[2:] == [4, 2, 0]
+
+
+def test_async_exceptions(server):
+  urls = [server.url + "/0", _closed_port_url()]
+  results = dict(_run_async(urls, return_exceptions=True))
+  assert _body(results[0]) == "/0" and isinstance(results[1], TimeoutError)
+
+  with pytest.raises(TimeoutError):
+    _run_async(urls)
@@ -0,0 +1,142 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import json
+
+from modules.apputils.curl import curl, CURLAuth, HttpCache, CookieJar, CURLCookie
+from modules.apputils.curl.cache import request_key
+
+from .stand_in import StandInServer, StandInHandler
+
+
+class CachingHandler(StandInHandler):
+  """
+  Responds with the credentials of the request, conditional requests with the matching ETag get 304
+  """
+  requests = []
+  cache_control = "max-age=60"
+  vary = None
+
+  def do_GET(self):
+    CachingHandler.requests.append(dict(self.headers.items()))
+    if self.headers.get("If-None-Match") == '"v1"':
+      self.send_response(304)
+      self.send_header("ETag", '"v1"')
+      self.send_header("Content-Length", "0")
+      self.end_headers()
+      return
+
+    body = json.dumps({"auth": self.headers.get("Authorization"), "cookie": self.headers.get("Cookie")}).encode()
+    self.send_response(200)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Cache-Control", self.cache_control)
+    self.send_header("ETag", '"v1"')
+    if self.vary:
+      self.send_header("Vary", self.vary)
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+
+def _serve(**attrs):
+  CachingHandler.requests = []
+  handler = type("Handler", (CachingHandler,), attrs)
+  return StandInServer(handler=handler)
+
+
+def test_request_key_depends_on_credentials_only():
+  url = "http://example.com/a"
+  assert request_key(url, {"Accept-Encoding": "gzip"}) == url
+  assert request_key(url, {"Authorization": "Bearer a"}) == request_key(url, {"authorization": "Bearer a"})
+  assert request_key(url, {"Authorization": "Bearer a"}) != request_key(url, {"Authorization": "Bearer b"})
+  assert request_key(url, {"Cookie": "s=1"}) != request_key(url, {"Cookie": "s=2"})
+  assert "Bearer" not in request_key(url, {"Authorization": "Bearer a"})  # kept in the persistent tier
+
+
+def test_fresh_response_is_served_from_cache():
+  cache = HttpCache()
+  with _serve() as server:
+    first = curl(server.url, cache=cache)
+    second = curl(server.url, cache=cache)
+
+  assert len(CachingHandler.requests) == 1
+  assert first.from_json() == second.from_json()
+  assert cache.hits == 1
+
+
+def test_response_is_not_served_to_other_credentials():
+  cache = HttpCache()
+  with _serve() as server:
+    a = curl(server.url, headers={"Authorization": "Bearer a"}, cache=cache)
+    b = curl(server.url, headers={"Authorization": "Bearer b"}, cache=cache)
+    anonymous = curl(server.url, cache=cache)
+    a_again = curl(server.url, headers={"Authorization": "Bearer a"}, cache=cache)
+
+  assert len(CachingHandler.requests) == 3
+  assert a.from_json()["auth"] == "Bearer a"
+  assert b.from_json()["auth"] == "Bearer b"
+  assert anonymous.from_json()["auth"] is None
+  assert a_again.from_json()["auth"] == "Bearer a"
+
+
+def test_forced_auth_and_cookies_are_keyed():
+  cache = HttpCache()
+  with _serve() as server:
+    user_a = curl(server.url, auth=CURLAuth("a", "1", force=True, headers={}), cache=cache)
+    user_b = curl(server.url, auth=CURLAuth("b", "2", force=True, headers={}), cache=cache)
+
+    jar = CookieJar()
+    jar.set_cookie(CURLCookie("session", "s1"), server.url)
+    with_cookie = curl(server.url, cookies=jar, cache=cache)
+
+  assert len(CachingHandler.requests) == 3
+  assert user_a.from_json()["auth"] != user_b.from_json()["auth"]
+  assert with_cookie.from_json()["cookie"] == "session=s1"
+
+
+def test_stale_entry_is_revalidated():
+  cache = HttpCache()
+  with _serve(cache_control="no-cache") as server:
+    first = curl(server.url, cache=cache)
+    second = curl(server.url, cache=cache)
+
+  assert len(CachingHandler.requests) == 2
+  assert CachingHandler.requests[1].get("If-None-Match") == '"v1"'
+  assert second.code == 200
+  assert second.from_json() == first.from_json()
+  assert cache.revalidated == 1
+
+
+def test_response_varying_by_not_keyed_header_is_not_stored():
+  cache = HttpCache()
+  with _serve(vary="Accept-Language") as server:
+    curl(server.url, cache=cache)
+    curl(server.url, cache=cache)
+
+  assert len(CachingHandler.requests) == 2
+  assert cache.hits == 0
+
+
+def test_response_varying_by_credentials_is_stored():
+  cache = HttpCache()
+  with _serve(vary="Authorization, Accept-Encoding") as server:
+    curl(server.url, headers={"Authorization": "Bearer a"}, cache=cache)
+    curl(server.url, headers={"Authorization": "Bearer a"}, cache=cache)
+
+  assert len(CachingHandler.requests) == 1
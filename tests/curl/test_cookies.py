@@ -0,0 +1,130 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import time
+from http.client import parse_headers
+from io import BytesIO
+
+from modules.apputils.curl.cookies import CookieJar, CURLCookie
+
+
+def _jar(*cookies) -> CookieJar:
+  jar = CookieJar()
+  for url, name, value in cookies:
+    jar.set_cookie(CURLCookie(name, value), url)
+  return jar
+
+
+def test_cookie_attributes():
+  cookie = CURLCookie(" sid ", "abc; Path=/api; Domain=.Example.com; Secure; HttpOnly; Max-Age=60")
+  assert (cookie.name, cookie.value, cookie.path, cookie.domain, cookie.secure) == \
+         ("sid", "abc", "/api", "example.com", True)
+  assert 55 < cookie.expires - time.time() <= 60 and not cookie.is_expired
+  assert CURLCookie("a", "1; Expires=Thu, 01 Jan 1970 00:00:00 GMT").is_expired
+  assert CURLCookie("a", "1; Max-Age=60; Expires=Thu, 01 Jan 1970 00:00:00 GMT").expires > time.time()
+  assert CURLCookie("a", "1; Path=relative").path is None
+
+
+def test_domain_cookies_match_subdomains():
+  jar = _jar(("https://www.example.com/", "shared", "1; Domain=example.com"),
+             ("https://www.example.com/", "host", "2"))
+
+  assert jar.header_for("https://www.example.com/") == "host=2; shared=1"  # the most specific domain first
+  assert jar.header_for("https://api.example.com/") == "shared=1"
+  assert jar.header_for("https://example.com/") == "shared=1"
+  assert jar.header_for("https://sub.www.example.com/") == "shared=1"  # host-only cookie isn't sent to subdomains
+  assert jar.header_for("https://notexample.com/") is None
+
+
+def test_foreign_domain_cookie_is_rejected():
+  jar = _jar(("https://www.example.com/", "a", "1; Domain=other.com"),
+             ("https://www.example.com/", "b", "1; Domain=api.example.com"))
+  assert len(jar) == 0
+
+
+def test_path_and_secure_matching():
+  jar = _jar(("https://example.com/api/v1/items", "default", "1"),
+             ("https://example.com/", "root", "2; Path=/"),
+             ("https://example.com/", "api", "3; Path=/api"),
+             ("https://example.com/", "secret", "4; Secure"))
+
+  assert jar.header_for("https://example.com/api/v1/x") == "default=1; api=3; root=2; secret=4"  # longer paths first
+  assert jar.header_for("https://example.com/apiary") == "root=2; secret=4"
+  assert jar.header_for("http://example.com/api") == "api=3; root=2"
+
+
+def test_ip_address_has_no_parent_domains():
+  jar = _jar(("http://10.0.0.1/", "a", "1"), ("http://10.0.0.1/", "b", "2; Domain=0.0.1"),
+             ("http://10.0.0.1/", "c", "3; Domain=10.0.0.1"))
+  assert jar.header_for("http://10.0.0.1/") == "a=1; c=3"
+  assert jar.header_for("http://20.0.0.1/") is None and len(jar) == 2
+
+
+def test_public_suffix_cookie_is_rejected():
+  jar = _jar(("https://a.example.com/", "tld", "1; Domain=com"),
+             ("https://www.example.co.uk/", "sld", "2; Domain=.co.uk"),
+             ("https://www.example.co.uk/", "site", "3; Domain=example.co.uk"),
+             ("http://localhost/", "local", "4; Domain=localhost"))
+
+  assert jar.header_for("https://b.example.com/") is None
+  assert jar.header_for("https://other.co.uk/") is None
+  assert jar.header_for("https://shop.example.co.uk/") == "site=3"
+  assert jar.header_for("http://localhost/") == "local=4"  # kept as host-only cookie
+  assert jar.header_for("http://sub.localhost/") is None
+  assert len(jar) == 2
+
+
+def test_cookie_is_replaced_and_removed():
+  jar = _jar(("https://example.com/", "a", "1"))
+  assert jar.header_for("https://example.com/") == "a=1"  # cached header is invalidated by the changes
+
+  jar.set_cookie(CURLCookie("a", "2"), "https://example.com/")
+  assert jar.header_for("https://example.com/") == "a=2" and len(jar) == 1
+
+  jar.set_cookie(CURLCookie("a", "; Max-Age=0"), "https://example.com/")
+  assert jar.header_for("https://example.com/") is None and len(jar) == 0
+
+
+def test_expired_cookies_are_evicted_on_lookup():
+  jar = CookieJar()
+  jar.set_cookie(CURLCookie("short", "1", expires=time.time() + 0.05), "https://example.com/")
+  jar.set_cookie(CURLCookie("long", "2"), "https://example.com/")
+
+  assert jar.header_for("https://example.com/") == "short=1; long=2"
+  time.sleep(0.1)
+  assert jar.header_for("https://example.com/") == "long=2"  # cached header expires with its cookies
+  assert [c.name for c in jar] == ["long"]
+
+
+def test_extract_from_response_headers():
+  headers = parse_headers(BytesIO(b"Set-Cookie: a=1; Path=/\r\nSet-Cookie: b=x=y\r\nSet-Cookie: invalid\r\n\r\n"))
+  jar = CookieJar()
+  jar.extract("https://example.com/login", headers)
+  assert jar.header_for("https://example.com/") == "a=1; b=x=y"
+
+
+def test_json_round_trip():
+  jar = _jar(("https://www.example.com/app/", "a", "1; Domain=example.com; Max-Age=60"),
+             ("https://www.example.com/app/", "b", "2; Secure"))
+  jar.set_cookie(CURLCookie("gone", "3", expires=time.time() - 1), "https://www.example.com/")
+
+  restored = CookieJar.from_json(jar.to_json())
+  for url in ("https://www.example.com/app/x", "http://api.example.com/app/", "https://www.example.com/"):
+    assert restored.header_for(url) == jar.header_for(url)
+  assert [c.expires for c in restored] == [c.expires for c in jar]
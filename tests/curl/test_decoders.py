@@ -0,0 +1,135 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import gzip
+import random
+import zlib
+
+import pytest
+
+from modules.apputils.curl import curl
+from modules.apputils.curl.decoders import ContentDecoder, split_lines, get_charset
+
+from .stand_in import StandInServer, StandInHandler, StandInOptions
+
+DATA = bytes(random.Random(1).randrange(64) for _ in range(256 * 1024))
+
+
+def _raw_deflate(data: bytes) -> bytes:
+  compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+  return compressor.compress(data) + compressor.flush()
+
+
+def _chunks(data: bytes, size: int):
+  return [data[pos:pos + size] for pos in range(0, len(data), size)]
+
+
+ENCODED = {
+  "raw deflate": ("deflate", _raw_deflate(DATA)),
+  "zlib deflate": ("deflate", zlib.compress(DATA)),
+  "gzip": ("gzip", gzip.compress(DATA)),
+  "multi-member gzip": ("x-gzip", b"".join(gzip.compress(p) for p in (DATA[:1000], DATA[1000:5000], DATA[5000:]))),
+  "identity": (None, DATA)
+}
+
+
+@pytest.mark.parametrize("name", list(ENCODED))
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 1000, 1024 * 1024])
+def test_decoder(name, chunk_size):
+  encoding, body = ENCODED[name]
+  pieces = list(ContentDecoder(encoding).decode(_chunks(body, chunk_size), 4096))
+
+  assert b"".join(pieces) == DATA
+  assert max(map(len, pieces)) <= 4096 or encoding is None
+
+
+def test_gzip_members_split_at_the_chunk_boundary():
+  first, second = gzip.compress(b"first "), gzip.compress(b"second")
+  assert b"".join(ContentDecoder("gzip").decode([first, second])) == b"first second"
+
+
+def test_deflate_shorter_than_header():
+  assert b"".join(ContentDecoder("deflate").decode([_raw_deflate(b"")])) == b""
+
+
+def test_unknown_encoding_is_passed_as_is():
+  decoder = ContentDecoder("br")
+  assert decoder.is_passthrough and list(decoder.decode([b"a", b"", b"b"])) == [b"a", b"b"]
+
+
+@pytest.mark.parametrize("chunks,delimiter,lines", [
+  ([b"a\r", b"\nb\r\n", b"c"], None, [b"a", b"b", b"c"]),
+  (["a\r", "\nb\r", "\n", "\r\n"], None, ["a", "b", ""]),
+  ([b"a", b"b\r", b"\nc", b"\r", b"\n", b"\r\n", b"d\r"], b"\r\n", [b"ab", b"c", b"", b"d\r"]),
+  (["x<", "-", "-", ">y<--", ">z"], "<-->", ["x", "y", "z"]),
+  ([b"long " * 10] * 100 + [b"\n"], None, [b"long " * 1000])
+])
+def test_split_lines(chunks, delimiter, lines):
+  assert list(split_lines(chunks, delimiter)) == lines
+
+
+@pytest.mark.parametrize("content_type,charset", [
+  ("application/json; charset=UTF-8", "utf-8"), ('text/plain; charset="cp1251"', "cp1251"),
+  ("text/plain", "utf-8"), (None, "utf-8")
+])
+def test_charset(content_type, charset):
+  assert get_charset(content_type) == charset
+
+
+class BodyHandler(StandInHandler):
+  body: bytes = b""
+  encoding: str = None
+
+  def do_GET(self):
+    self._send_body(self.body, self.encoding)
+
+
+def serve(body: bytes, encoding: str = None, chunk_size: int = 7) -> StandInServer:
+  handler = type("Handler", (BodyHandler,), {"body": body, "encoding": encoding})
+  return StandInServer(StandInOptions(chunked=True, chunk_size=chunk_size), handler=handler)
+
+
+@pytest.mark.parametrize("name", list(ENCODED))
+@pytest.mark.parametrize("use_stream", [True, False])
+def test_iter_content(name, use_stream):
+  encoding, body = ENCODED[name]
+  with serve(body, encoding, chunk_size=1000) as server:
+    r = curl(server.url, use_stream=use_stream)
+    pieces = list(r.iter_content(chunk_size=1024))
+
+  assert b"".join(pieces) == DATA and max(map(len, pieces)) <= 1024
+  assert all(type(piece) is bytes for piece in pieces)
+
+
+def test_iter_content_decodes_split_characters():
+  text = "Åsa ünïcødé ☃\n" * 100
+  with serve(gzip.compress(text.encode()), "gzip") as server:
+    pieces = list(curl(server.url, use_stream=True).iter_content(chunk_size=3, decode_unicode=True))
+
+  assert "".join(pieces) == text and len(pieces) > 100
+
+
+@pytest.mark.parametrize("decode_unicode", [True, False])
+def test_iter_lines(decode_unicode):
+  body = b"first\r\nsecond\n\r\nlast"
+  with serve(zlib.compress(body), "deflate", chunk_size=1) as server:
+    lines = list(curl(server.url, use_stream=True).iter_lines(chunk_size=1, decode_unicode=decode_unicode))
+
+  expected = ["first", "second", "", "last"]
+  assert lines == (expected if decode_unicode else [line.encode() for line in expected])
@@ -0,0 +1,181 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+from modules.apputils.curl import curl, curl_async
+from modules.apputils.curl import dns
+from modules.apputils.curl.aio import AsyncCurlSession
+from modules.apputils.curl.dns import DnsCache
+from modules.apputils.curl.pool import CurlSession
+
+from .stand_in import StandInServer
+
+
+def _address(ip: str, port: int = 80) -> tuple:
+  return socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (ip, port)
+
+
+class Resolver(object):
+  """
+  Stand-in of the socket.getaddrinfo(), answers for the hosts it knows and counts lookups
+  """
+
+  def __init__(self, hosts: dict):
+    self.hosts = hosts
+    self.lookups = []
+    self._getaddrinfo = socket.getaddrinfo
+
+  def __call__(self, host, port, family=0, type=0, *args, **kwargs):
+    if host not in self.hosts:  # ip addresses of the connection attempts
+      return self._getaddrinfo(host, port, family, type, *args, **kwargs)
+
+    self.lookups.append(host)
+    ips = self.hosts[host]
+    if ips is None:
+      raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+    return [_address(ip, port) for ip in ips]
+
+
+class Clock(object):
+  def __init__(self):
+    self.offset = 0.0
+    self._monotonic = time.monotonic
+
+  def __call__(self) -> float:
+    return self._monotonic() + self.offset
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+  resolver = Resolver({"one.test": ["10.0.0.1"], "many.test": ["10.0.0.1", "10.0.0.2", "10.0.0.3"],
+                       "missing.test": None, "local.test": ["127.0.0.2", "127.0.0.1"]})
+  monkeypatch.setattr(socket, "getaddrinfo", resolver)
+  return resolver
+
+
+@pytest.fixture
+def clock(monkeypatch):
+  clock = Clock()
+  monkeypatch.setattr(dns.time, "monotonic", clock)  # moves forward only, so the event loop is not affected
+  return clock
+
+
+def _ips(addresses) -> list:
+  return [sockaddr[0] for _, _, _, _, sockaddr in addresses]
+
+
+def test_addresses_are_cached_for_ttl(resolver, clock):
+  cache = DnsCache(ttl=10)
+  assert _ips(cache.resolve("one.test", 80)) == _ips(cache.resolve("ONE.test", 80)) == ["10.0.0.1"]
+  assert (resolver.lookups, cache.hits, cache.misses) == (["one.test"], 1, 1)
+
+  cache.resolve("one.test", 443)  # port is the part of the key
+  clock.offset = 10
+  cache.resolve("one.test", 80)
+  assert resolver.lookups == ["one.test"] * 3
+
+
+def test_failures_are_cached_for_negative_ttl(resolver, clock):
+  cache = DnsCache(ttl=10, negative_ttl=2)
+  for _ in range(2):
+    with pytest.raises(socket.gaierror) as e:
+      cache.resolve("missing.test", 80)
+    assert e.value.errno == socket.EAI_NONAME
+  assert resolver.lookups == ["missing.test"]
+
+  clock.offset = 2
+  with pytest.raises(socket.gaierror):
+    cache.resolve("missing.test", 80)
+  assert resolver.lookups == ["missing.test"] * 2
+
+
+def test_failures_are_not_cached_without_negative_ttl(resolver):
+  cache = DnsCache(negative_ttl=0)
+  for _ in range(2):
+    with pytest.raises(socket.gaierror):
+      cache.resolve("missing.test", 80)
+  assert resolver.lookups == ["missing.test"] * 2
+
+
+def test_addresses_are_rotated(resolver):
+  cache = DnsCache()
+  assert [_ips(cache.resolve("many.test", 80)) for _ in range(4)] == [
+    ["10.0.0.1", "10.0.0.2", "10.0.0.3"], ["10.0.0.2", "10.0.0.3", "10.0.0.1"],
+    ["10.0.0.3", "10.0.0.1", "10.0.0.2"], ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+  ]
+
+  cache = DnsCache(rotate=False)
+  assert [_ips(cache.resolve("many.test", 80)) for _ in range(2)] == [["10.0.0.1", "10.0.0.2", "10.0.0.3"]] * 2
+
+
+def test_least_recently_used_hosts_are_evicted(resolver):
+  cache = DnsCache(max_entries=2)
+  for host in ("one.test", "many.test", "one.test", "local.test", "one.test", "many.test"):
+    cache.resolve(host, 80)
+  assert resolver.lookups == ["one.test", "many.test", "local.test", "many.test"]
+
+  cache.invalidate("ONE.TEST")
+  cache.resolve("one.test", 80)
+  cache.clear()
+  cache.resolve("many.test", 80)
+  assert resolver.lookups[-2:] == ["one.test", "many.test"]
+
+
+def test_async_resolve_shares_the_cache(resolver, clock):
+  cache = DnsCache(ttl=10, negative_ttl=2)
+
+  async def _main():
+    first = await cache.resolve_async("many.test", 80)
+    with pytest.raises(socket.gaierror):
+      await cache.resolve_async("missing.test", 80)
+    with pytest.raises(socket.gaierror):
+      await cache.resolve_async("missing.test", 80)
+    return first, await cache.resolve_async("many.test", 80)
+
+  first, second = asyncio.run(_main())
+  assert (_ips(first)[0], _ips(second)[0], _ips(cache.resolve("many.test", 80))[0]) == \
+         ("10.0.0.1", "10.0.0.2", "10.0.0.3")
+  assert resolver.lookups == ["many.test", "missing.test"]
+
+  clock.offset = 10
+  asyncio.run(cache.resolve_async("many.test", 80))
+  assert resolver.lookups == ["many.test", "missing.test", "many.test"]
+
+
+def test_requests_use_the_cache(resolver):
+  cache = DnsCache()
+  with StandInServer() as server:
+    url = server.url.replace("127.0.0.1", "local.test")  # 127.0.0.2 refuses, the next address is tried
+
+    with CurlSession(dns_cache=cache) as session:
+      assert curl(url, session=session).code == 200
+    assert curl(url, dns_cache=cache).code == 200
+
+    async def _main():
+      async with AsyncCurlSession(dns_cache=cache) as session:
+        return (await curl_async(asyncio.get_running_loop(), url, session=session)).code
+
+    assert asyncio.run(_main()) == 200
+
+  assert resolver.lookups == ["local.test"] and cache.hits == 2
@@ -0,0 +1,226 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import hashlib
+import os
+
+import pytest
+
+from modules.apputils.curl import CurlSession
+from modules.apputils.curl.download import curl_download, curl_download_parallel
+
+from .stand_in import StandInServer, StandInHandler
+
+CONTENT = bytes(range(256)) * 16 * 1024  # 4 MiB
+CHECKSUM = hashlib.sha256(CONTENT).hexdigest()
+MiB = 1024 * 1024
+
+
+class RangeHandler(StandInHandler):
+  """
+  Serves CONTENT with the byte ranges support, records "Range" header of the requests
+  """
+  requests = []
+  ranges = True
+  truncate_at = None
+
+  def do_GET(self):
+    RangeHandler.requests.append(self.headers.get("Range"))
+    value = self.headers.get("Range") if self.ranges else None
+    if not value:
+      self._send(200, CONTENT, {"Accept-Ranges": "bytes"} if self.ranges else {})
+      return
+
+    start, _, end = value[len("bytes="):].partition("-")
+    start, end = int(start), min(int(end) if end else len(CONTENT) - 1, len(CONTENT) - 1)
+    if start >= len(CONTENT):
+      self._send(416, b"", {"Content-Range": f"bytes */{len(CONTENT)}"})
+    else:
+      self._send(206, CONTENT[start:end + 1], {"Content-Range": f"bytes {start}-{end}/{len(CONTENT)}"})
+
+  def _send(self, code: int, body: bytes, headers: dict):
+    self.send_response(code)
+    for name, value in headers.items():
+      self.send_header(name, value)
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    if self.truncate_at is not None:
+      self.wfile.write(body[:self.truncate_at])
+      self.close_connection = True
+    else:
+      self.wfile.write(body)
+
+
+class Progress(object):
+  def __init__(self):
+    self.calls = []
+    self.value = 0
+
+  def start(self, total: int):
+    self.calls.append(("start", total))
+
+  def progress(self, value: int):
+    self.value = value
+
+  def stop(self):
+    self.calls.append(("stop", self.value))
+
+
+def serve(**attrs) -> StandInServer:
+  RangeHandler.requests = []
+  return StandInServer(handler=type("Handler", (RangeHandler,), attrs))
+
+
+@pytest.fixture
+def target(tmp_path):
+  return str(tmp_path / "download.bin")
+
+
+def _write(path: str, data: bytes):
+  with open(path, "wb") as f:
+    f.write(data)
+
+
+def _read(path: str) -> bytes:
+  with open(path, "rb") as f:
+    return f.read()
+
+
+def test_download_with_checksum(target):
+  progress = Progress()
+  with serve() as server:
+    r = curl_download(server.url, target, checksum=CHECKSUM, chunk_size=64 * 1024, progress=progress)
+
+  assert r.code == 200 and _read(target) == CONTENT
+  assert progress.calls == [("start", len(CONTENT)), ("stop", len(CONTENT))]
+  assert RangeHandler.requests == [None]
+
+
+def test_resume_requests_the_rest(target):
+  _write(target, CONTENT[:1000])
+  progress = Progress()
+  with serve() as server:
+    r = curl_download(server.url, target, resume=True, checksum=CHECKSUM, progress=progress)
+
+  assert r.code == 206 and _read(target) == CONTENT  # checksum includes already downloaded part
+  assert RangeHandler.requests == ["bytes=1000-"]
+  assert progress.calls == [("start", len(CONTENT)), ("stop", len(CONTENT))]
+
+
+def test_resume_of_complete_file(target):
+  _write(target, CONTENT)
+  with serve() as server:
+    r = curl_download(server.url, target, resume=True, checksum=CHECKSUM)
+
+  assert r.code == 416 and _read(target) == CONTENT
+  assert RangeHandler.requests == [f"bytes={len(CONTENT)}-"]
+
+
+def test_resume_restarts_if_ranges_are_not_supported(target):
+  _write(target, b"x" * 1000 + CONTENT)  # longer, than the resource
+  with serve(ranges=False) as server:
+    r = curl_download(server.url, target, resume=True, checksum=CHECKSUM)
+
+  assert r.code == 200 and _read(target) == CONTENT
+  assert RangeHandler.requests == [f"bytes={len(CONTENT) + 1000}-"]
+
+
+def test_resume_of_not_existing_file(target):
+  with serve() as server:
+    curl_download(server.url, target, resume=True)
+
+  assert _read(target) == CONTENT and RangeHandler.requests == [None]
+
+
+def test_checksum_mismatch(target):
+  _write(target, b"y" * 1000)  # corrupted beginning of the file
+  progress = Progress()
+  with serve() as server:
+    with pytest.raises(ValueError):
+      curl_download(server.url, target, resume=True, checksum=CHECKSUM, progress=progress)
+
+  assert progress.calls[-1] == ("stop", len(CONTENT))
+
+
+def test_error_response(target):
+  with serve() as server:
+    with pytest.raises(IOError):  # 416 is not expected, as the download is not resumed
+      curl_download(server.url, target, headers={"Range": f"bytes={len(CONTENT)}-"})
+
+
+def test_incomplete_body_stops_progress(target):
+  progress = Progress()
+  with serve(truncate_at=1024 * 1024) as server:
+    with pytest.raises(IOError):
+      curl_download(server.url, target, progress=progress)
+
+  assert progress.calls == [("start", len(CONTENT)), ("stop", 1024 * 1024)]
+
+
+def _parallel(server: StandInServer, target: str, **kwargs):
+  with CurlSession(pool_size=4) as session:
+    size = curl_download_parallel(server.url, target, connections=4, min_part_size=MiB, session=session, **kwargs)
+    return size, session.pool
+
+
+def test_parallel_download(target):
+  progress = Progress()
+  with serve() as server:
+    size, pool = _parallel(server, target, checksum=CHECKSUM, progress=progress)
+
+  assert size == len(CONTENT) and _read(target) == CONTENT
+  assert progress.calls == [("start", len(CONTENT)), ("stop", len(CONTENT))]
+  assert RangeHandler.requests[0] == "bytes=0-0"
+  assert sorted(RangeHandler.requests[1:]) == sorted(f"bytes={i * MiB}-{(i + 1) * MiB - 1}" for i in range(4))
+  assert pool.reused >= 1 and pool.created <= 4  # connection of the range probe is re-used
+
+
+def test_parallel_download_without_pwrite(target, monkeypatch):
+  monkeypatch.delattr(os, "pwrite", raising=False)
+  with serve() as server:
+    _parallel(server, target, checksum=CHECKSUM)
+
+  assert _read(target) == CONTENT
+
+
+@pytest.mark.parametrize("attrs,min_part_size", [({"ranges": False}, MiB), ({}, 4 * MiB)])
+def test_parallel_download_falls_back_to_single_stream(target, attrs, min_part_size):
+  progress = Progress()
+  with serve(**attrs) as server:
+    size = curl_download_parallel(server.url, target, min_part_size=min_part_size, checksum=CHECKSUM,
+                                  progress=progress)
+
+  assert size == len(CONTENT) and _read(target) == CONTENT
+  assert RangeHandler.requests == ["bytes=0-0", None]
+  assert progress.calls == [("start", len(CONTENT)), ("stop", len(CONTENT))]
+
+
+def test_parallel_download_checksum_mismatch(target):
+  with serve() as server:
+    with pytest.raises(ValueError):
+      _parallel(server, target, checksum=hashlib.sha256(b"other").hexdigest())
+
+
+def test_parallel_download_incomplete_range(target):
+  progress = Progress()
+  with serve(truncate_at=MiB // 2) as server:
+    with pytest.raises(IOError):
+      _parallel(server, target, progress=progress)
+
+  assert progress.calls[0] == ("start", len(CONTENT)) and progress.calls[-1][0] == "stop"
@@ -0,0 +1,176 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import asyncio
+import gzip
+import logging
+import socket
+
+import pytest
+
+from modules.apputils.curl import curl, curl_async, CurlRequestType
+from modules.apputils.curl.aio import AsyncCurlSession
+from modules.apputils.curl.metrics import add_hook, remove_hook, current_metrics, HostLatencyAggregator, \
+  RequestMetrics
+from modules.apputils.curl.pool import CurlSession
+
+from .stand_in import StandInServer, StandInOptions
+
+
+class Recorder(object):
+  def __init__(self):
+    self.calls = []
+
+  def __call__(self, metrics: RequestMetrics):
+    self.calls.append(metrics)
+
+
+@pytest.fixture(scope="module")
+def server():
+  with StandInServer(StandInOptions(payload_size=64 * 1024, content_encoding="gzip")) as server:
+    yield server
+
+
+@pytest.fixture
+def recorder():
+  recorder = Recorder()
+  add_hook(recorder)
+  yield recorder
+  remove_hook(recorder)
+
+
+def _failing_hook(metrics: RequestMetrics):
+  raise RuntimeError("hook failure")
+
+
+def _closed_port_url() -> str:
+  with socket.socket() as s:
+    s.bind(("127.0.0.1", 0))
+    return f"http://127.0.0.1:{s.getsockname()[1]}/"
+
+
+def test_hook_gets_request_metrics(server, recorder):
+  r = curl(server.url + "/path", headers={"X-Test": "1"})
+
+  metrics, = recorder.calls
+  assert r.metrics is metrics and (metrics.method, metrics.code, metrics.error) == ("GET", 200, None)
+  assert metrics.url == server.url + "/path" and metrics.host == server.url.split("//")[1]
+  assert metrics.bytes_sent > len("X-Test: 1") and metrics.bytes_received == len(r.raw)
+  assert metrics.bytes_decoded == len(gzip.decompress(r.raw)) > metrics.bytes_received
+  assert all(getattr(metrics.timings, phase) is not None for phase in ("dns", "connect", "ttfb", "total"))
+  assert metrics.timings.tls is None
+
+
+def test_hook_gets_failed_attempt(recorder):
+  with pytest.raises(TimeoutError):
+    curl(_closed_port_url())
+
+  metrics, = recorder.calls
+  assert isinstance(metrics.error, TimeoutError) and metrics.code is None
+
+
+def test_session_hooks(server, recorder):
+  session_recorder = Recorder()
+  with CurlSession(hooks=[session_recorder]) as session:
+    for _ in range(2):
+      curl(server.url, session=session)
+  curl(server.url)
+
+  assert len(recorder.calls) == 3 and len(session_recorder.calls) == 2
+  assert [m.reused_connection for m in session_recorder.calls] == [False, True]
+  assert session_recorder.calls[1].timings.connect is None
+
+  remove_hook(recorder)
+  curl(server.url)
+  assert len(recorder.calls) == 3
+
+
+def test_hook_error_doesnt_fail_request(server, recorder, caplog):
+  add_hook(_failing_hook)
+  try:
+    with caplog.at_level(logging.ERROR, logger="modules.apputils.curl.metrics"):
+      assert curl(server.url).code == 200
+  finally:
+    remove_hook(_failing_hook)
+
+  assert len(recorder.calls) == 1  # hooks registered after the failed one are still called
+  record, = caplog.records
+  assert "_failing_hook" in record.getMessage() and record.exc_info[0] is RuntimeError
+
+
+def test_async_hook_error_doesnt_fail_request(server):
+  recorder = Recorder()
+
+  async def _main():
+    async with AsyncCurlSession(hooks=[_failing_hook, recorder]) as session:
+      return await curl_async(asyncio.get_running_loop(), server.url, session=session)
+
+  assert asyncio.run(_main()).code == 200 and recorder.calls[0].code == 200
+
+
+def test_current_metrics_of_the_request(server, recorder):
+  seen = []
+
+  def body():
+    seen.append(current_metrics())
+    yield b"outer"
+    curl(server.url)  # request made while sending the outer one
+    seen.append(current_metrics())
+
+  curl(server.url, req_type=CurlRequestType.POST, data=body())
+  inner, outer = recorder.calls
+  assert (inner.method, outer.method) == ("GET", "POST")
+  assert seen == [outer, outer] and current_metrics() is None
+
+
+def test_current_metrics_of_concurrent_tasks(server):
+  recorder = Recorder()
+
+  async def body(seen: list):
+    for _ in range(3):
+      seen.append(current_metrics())
+      await asyncio.sleep(0.01)
+      yield b"chunk"
+
+  async def _main():
+    loop = asyncio.get_running_loop()
+    async with AsyncCurlSession(hooks=[recorder]) as session:
+      seen = [[], []]
+      await asyncio.gather(*(curl_async(loop, server.url, req_type=CurlRequestType.POST, data=body(s), session=session)
+                             for s in seen))
+      return seen
+
+  first, second = asyncio.run(_main())
+  assert len(set(first)) == len(set(second)) == 1
+  assert {first[0], second[0]} == set(recorder.calls) and first[0] is not second[0]
+
+
+def test_host_latency_aggregator(server):
+  aggregator = HostLatencyAggregator(phase="ttfb")
+  with CurlSession(hooks=[aggregator]) as session:
+    for _ in range(5):
+      curl(server.url, session=session)
+
+  host = server.url.split("//")[1]
+  assert aggregator.hosts == [host] and aggregator.histogram(host).count == 5
+  assert 0 < aggregator.percentile(host, 50) <= aggregator.histogram(host).max
+  assert str(aggregator).splitlines()[1].startswith(host)
+
+  with pytest.raises(ValueError):
+    HostLatencyAggregator(phase="unknown")
@@ -0,0 +1,90 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import gzip
+import json
+
+import pytest
+
+from modules.apputils.curl import curl
+from modules.apputils.json2obj import SerializableObject
+
+from .stand_in import StandInServer, StandInHandler, StandInOptions
+
+
+class NdjsonHandler(StandInHandler):
+  body: bytes = b""
+  charset: str = "utf-8"
+
+  def do_GET(self):
+    body = gzip.compress(self.body)
+    self.send_response(200)
+    self.send_header("Content-Type", f"application/x-ndjson; charset={self.charset}")
+    self.send_header("Content-Encoding", "gzip")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+
+def _ndjson(body: bytes, clazz=None, charset: str = "utf-8", chunk_size: int = 5, use_stream: bool = True):
+  handler = type("Handler", (NdjsonHandler,), {"body": body, "charset": charset})
+  with StandInServer(StandInOptions(), handler=handler) as server:
+    return list(curl(server.url, use_stream=use_stream).iter_ndjson(clazz, chunk_size=chunk_size))
+
+
+class ItemView(SerializableObject):
+  id: int = 0
+  name: str = None
+
+
+RECORDS = [{"id": i, "name": f"item ☃ {i}"} for i in range(50)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64 * 1024])
+@pytest.mark.parametrize("use_stream", [True, False])
+def test_records_split_across_chunks(chunk_size, use_stream):
+  body = b"\r\n".join(json.dumps(r, ensure_ascii=False).encode() for r in RECORDS) + b"\r\n"
+  assert _ndjson(body, chunk_size=chunk_size, use_stream=use_stream) == RECORDS
+
+
+def test_blank_lines_are_skipped():
+  body = b'\n{"id": 1}\r\n\r\n  \n[1, 2]\n"s"\n\t\n{"id": 2}'
+  assert _ndjson(body) == [{"id": 1}, [1, 2], "s", {"id": 2}]
+
+
+def test_records_are_mapped_to_view():
+  body = "\n".join(json.dumps(r) for r in RECORDS).encode()
+  items = _ndjson(body, ItemView)
+  assert [(i.id, i.name) for i in items] == [(r["id"], r["name"]) for r in RECORDS]
+
+
+def test_not_utf8_charset():
+  body = '{"name": "caf\xe9"}\n{"name": "na\xefve"}\n'.encode("latin-1")
+  assert _ndjson(body, ItemView, charset="latin-1")[1].name == "na\xefve"
+
+
+@pytest.mark.parametrize("body,message", [
+  (b'{"id": 1}\n\n{"id": 2\n{"id": 3}', "Invalid JSON record at line 3"),
+  (b'{"id": 1}\n[1]\n', "Expected JSON object at line 2, got 'list'"),
+  (b'{"id": "x"}\n', "Conflicting type in schema and data for object 'ItemView'")
+])
+def test_broken_record(body, message):
+  with pytest.raises(ValueError) as e:
+    _ndjson(body, ItemView)
+  assert message in str(e.value)
@@ -0,0 +1,153 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import io
+import json
+from urllib.error import URLError
+from urllib.request import Request
+
+import pytest
+
+from modules.apputils.curl import curl, CurlSession
+
+from .stand_in import StandInServer, StandInHandler, StandInOptions
+
+
+class DroppingHandler(StandInHandler):
+  """
+  Serves the first request of the connection, the next one is read and the connection is dropped without response,
+  as the server does with the keep-alive connection it closed in the meantime
+  """
+  received = []
+  timeout = 5  # body announced, but not re-sent by the client
+
+  def handle(self):
+    self.served = 0
+    super(DroppingHandler, self).handle()
+
+  def __drop(self) -> bool:
+    self.served += 1
+    self.close_connection = self.served > 1
+    return self.close_connection
+
+  def do_POST(self):
+    body = self.rfile.read(int(self.headers["Content-Length"])) if self.headers.get("Content-Length") else \
+      b"".join(iter(lambda: self.__read_chunk(), b""))
+    DroppingHandler.received.append(body)
+    if not self.__drop():
+      self._send_body(json.dumps({"received": len(body)}).encode())
+
+  def do_GET(self):
+    DroppingHandler.received.append(self.path)
+    if not self.__drop():
+      super(DroppingHandler, self).do_GET()
+
+  def __read_chunk(self) -> bytes:
+    size = int(self.rfile.readline().split(b";", 1)[0], 16)
+    chunk = self.rfile.read(size)
+    self.rfile.read(2)
+    return chunk
+
+
+@pytest.fixture(scope="module")
+def server():
+  with StandInServer(StandInOptions(payload_size=256 * 1024)) as server:
+    yield server
+
+
+@pytest.fixture
+def dropping_server():
+  DroppingHandler.received = []
+  with StandInServer(handler=DroppingHandler) as server:
+    yield server
+
+
+def test_connections_are_reused(server):
+  with CurlSession() as session:
+    responses = [curl(server.url, session=session) for _ in range(3)]
+    assert [r.code for r in responses] == [200] * 3
+    assert len(responses[-1].body) > 200 * 1024
+    assert (session.pool.created, session.pool.reused) == (1, 2)
+
+
+def test_connection_is_closed_after_max_requests(server):
+  with CurlSession(max_requests=2) as session:
+    for _ in range(5):
+      curl(server.url, session=session)
+    assert (session.pool.created, session.pool.reused) == (3, 2)
+
+
+def test_not_read_response_discards_connection(server):
+  with CurlSession() as session:
+    opener = session.build_opener()
+    r = opener.open(server.url)
+    assert len(r.read(1024)) == 1024
+    r.close()  # the rest of the body is left in the socket
+
+    assert len(opener.open(server.url).read()) > 200 * 1024
+    assert (session.pool.created, session.pool.reused) == (2, 0)
+
+
+def test_busy_connection_is_not_shared(server):
+  with CurlSession() as session:
+    opener = session.build_opener()
+    first = opener.open(server.url)  # response is not read yet
+    second = opener.open(server.url)
+    assert first.read() == second.read()
+    assert (session.pool.created, session.pool.reused) == (2, 0)
+
+    opener.open(server.url).read()
+    assert session.pool.reused == 1
+
+
+def test_stale_connection_is_retried(dropping_server):
+  with CurlSession() as session:
+    assert [curl(dropping_server.url, session=session).code for _ in range(2)] == [200, 200]
+    assert (session.pool.created, session.pool.reused) == (2, 1)
+    assert DroppingHandler.received == ["/", "/", "/"]
+
+
+def _post_over_stale_connection(server: StandInServer, data, headers: dict = None):
+  with CurlSession() as session:
+    opener = session.build_opener()
+    assert opener.open(server.url).read() == StandInHandler.payload  # connection is kept in the pool
+    r = opener.open(Request(server.url, data=data, headers=headers or {}, method="POST"))
+    return json.loads(r.read()), session.pool
+
+
+def test_stale_connection_resends_buffer(dropping_server):
+  body, pool = _post_over_stale_connection(dropping_server, b"payload")
+  assert body == {"received": 7}
+  assert DroppingHandler.received == ["/", b"payload", b"payload"]
+  assert (pool.created, pool.reused) == (2, 1)
+
+
+def test_stale_connection_rewinds_file(dropping_server):
+  f = io.BytesIO(b"--skipped--payload")
+  f.seek(11)
+  body, _ = _post_over_stale_connection(dropping_server, f, {"Content-Length": "7"})
+  assert body == {"received": 7}
+  assert DroppingHandler.received == ["/", b"payload", b"payload"]
+
+
+def test_stale_connection_doesnt_resend_consumed_stream(dropping_server):
+  with pytest.raises(URLError):
+    _post_over_stale_connection(dropping_server, iter([b"pay", b"load"]))
+
+  assert DroppingHandler.received == ["/", b"payload"]
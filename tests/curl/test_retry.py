@@ -0,0 +1,184 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import asyncio
+import time
+
+import pytest
+
+from modules.apputils.curl.retry import CircuitBreaker, CircuitOpenError, CircuitState, RetryPolicy
+
+URL = "http://example.com/api"
+HOST = "example.com"
+
+
+class FakeResponse(object):
+  def __init__(self, code: int, headers: dict = None):
+    self.code: int = code
+    self.headers: dict = headers or {}
+    self.raw = None
+
+
+def _opened_breaker() -> CircuitBreaker:
+  breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+  breaker.record_failure(HOST)
+  breaker.record_failure(HOST)
+  return breaker
+
+
+def _failing(error: BaseException):
+  def _func():
+    raise error
+  return _func
+
+
+def test_circuit_opens_after_consecutive_failures():
+  breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+  breaker.record_failure(HOST)
+  breaker.record_success(HOST)  # failures should be consecutive
+  breaker.record_failure(HOST)
+  assert breaker.state(HOST) == CircuitState.CLOSED
+  breaker.before_request(HOST)
+
+  breaker.record_failure(HOST)
+  assert breaker.state(HOST) == CircuitState.OPEN
+  with pytest.raises(CircuitOpenError):
+    breaker.before_request(HOST)
+  breaker.before_request("other.com")
+
+
+def test_half_open_circuit_allows_one_probe():
+  breaker = _opened_breaker()
+  time.sleep(0.06)
+
+  breaker.before_request(HOST)
+  assert breaker.state(HOST) == CircuitState.HALF_OPEN
+  with pytest.raises(CircuitOpenError):
+    breaker.before_request(HOST)
+
+  breaker.record_success(HOST)
+  assert breaker.state(HOST) == CircuitState.CLOSED
+  breaker.before_request(HOST)
+
+
+def test_failed_probe_opens_circuit_again():
+  breaker = _opened_breaker()
+  time.sleep(0.06)
+  breaker.before_request(HOST)
+  breaker.record_failure(HOST)
+
+  assert breaker.state(HOST) == CircuitState.OPEN
+  with pytest.raises(CircuitOpenError):
+    breaker.before_request(HOST)
+
+
+def test_circuit_is_closed_by_successful_retry():
+  breaker = _opened_breaker()
+  time.sleep(0.06)
+  policy = RetryPolicy(circuit_breaker=breaker)
+
+  assert policy.call("GET", URL, lambda: FakeResponse(200)).code == 200
+  assert breaker.state(HOST) == CircuitState.CLOSED
+
+
+def test_open_circuit_fails_fast_without_request():
+  calls = []
+  policy = RetryPolicy(max_attempts=3, backoff_factor=0, circuit_breaker=_opened_breaker())
+  with pytest.raises(CircuitOpenError):
+    policy.call("GET", URL, lambda: calls.append(1))
+  assert calls == []
+
+
+@pytest.mark.parametrize("error", [ValueError("not a network error"), KeyboardInterrupt()])
+def test_aborted_probe_opens_circuit_again(error):
+  breaker = _opened_breaker()
+  time.sleep(0.06)
+  policy = RetryPolicy(circuit_breaker=breaker)
+
+  with pytest.raises(type(error)):
+    policy.call("GET", URL, _failing(error))
+  assert breaker.state(HOST) == CircuitState.OPEN
+
+  time.sleep(0.06)  # circuit recovers with the next probe
+  assert policy.call("GET", URL, lambda: FakeResponse(200)).code == 200
+  assert breaker.state(HOST) == CircuitState.CLOSED
+
+
+def test_cancelled_probe_opens_circuit_again():
+  breaker = _opened_breaker()
+  policy = RetryPolicy(circuit_breaker=breaker)
+
+  async def _slow():
+    await asyncio.sleep(10)
+
+  async def _ok():
+    return FakeResponse(200)
+
+  async def _main():
+    await asyncio.sleep(0.06)
+    with pytest.raises(asyncio.TimeoutError):
+      await asyncio.wait_for(policy.call_async("GET", URL, _slow), 0.01)
+    assert breaker.state(HOST) == CircuitState.OPEN
+
+    await asyncio.sleep(0.06)
+    return await policy.call_async("GET", URL, _ok)
+
+  assert asyncio.run(_main()).code == 200
+  assert breaker.state(HOST) == CircuitState.CLOSED
+
+
+def test_aborted_request_doesnt_count_as_failure():
+  breaker = CircuitBreaker(failure_threshold=1)
+  with pytest.raises(ValueError):
+    RetryPolicy(circuit_breaker=breaker).call("GET", URL, _failing(ValueError()))
+  assert breaker.state(HOST) == CircuitState.CLOSED
+
+
+def test_network_errors_are_retried():
+  errors = [ConnectionResetError(), TimeoutError()]
+
+  def _func():
+    if errors:
+      raise errors.pop()
+    return FakeResponse(200)
+
+  policy = RetryPolicy(max_attempts=3, backoff_factor=0)
+  assert policy.call("GET", URL, _func).code == 200
+
+  errors = [ConnectionResetError()]
+  with pytest.raises(ConnectionResetError):
+    policy.call("POST", URL, _func)  # not idempotent method
+
+
+def test_response_codes_are_retried():
+  codes = [200, 503, 503]
+  policy = RetryPolicy(max_attempts=3, backoff_factor=0)
+  assert policy.call("GET", URL, lambda: FakeResponse(codes.pop())).code == 200
+
+  codes = [200, 503, 503]
+  assert RetryPolicy(max_attempts=2, backoff_factor=0).call("GET", URL, lambda: FakeResponse(codes.pop())).code == 503
+
+
+def test_retry_after_is_capped():
+  policy = RetryPolicy(backoff_factor=0.5, backoff_max=2.0, jitter=False)
+  assert policy.delay(1, {"Retry-After": "1"}) == 1.0
+  assert policy.delay(1, {"Retry-After": "120"}) == 2.0
+  assert policy.delay(1, {"Retry-After": "Thu, 01 Jan 1970 00:00:00 GMT"}) == 0.0
+  assert policy.delay(3, {"Retry-After": "soon"}) == 2.0
+  assert RetryPolicy(respect_retry_after=False, jitter=False).delay(2, {"Retry-After": "9"}) == 1.0
@@ -0,0 +1,537 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+# Usage: PYTHONPATH=src python3 -m tests.json2obj.bench_json2obj --count 20000 [--memory]
+#
+# Every scenario is repeated several times and the best run is reported as objects per second.
+# With --memory, the memory retained per instance is reported for the regular and compact views.
+# Results could be saved with --save and compared with the previous run via --compare.
+
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+from typing import Callable, Dict, List
+
+from modules.apputils.json2obj import SerializableObject, CompactMeta, ValidationReport, specialize
+
+
+class AddressView(SerializableObject):
+  street: str = None
+  city: str = None
+  zip: int = 0
+
+
+class PhoneView(SerializableObject):
+  kind: str = None
+  number: str = None
+
+
+class PersonView(SerializableObject):
+  __aliases__ = {
+    "e_mail": "e-mail"
+  }
+
+  id: int = 0
+  name: str = None
+  e_mail: str = None
+  age: int = 0
+  score: float = 0.0
+  active: bool = False
+  tags: List[str] = []
+  address: AddressView = None
+  phones: List[PhoneView] = []
+  attributes: Dict[str, str] = {}
+
+
+class FlatView(SerializableObject):
+  id: int = 0
+  name: str = None
+  e_mail: str = None
+  age: int = 0
+  score: float = 0.0
+  active: bool = False
+  country: str = None
+  created: str = None
+
+
+class CompactAddressView(SerializableObject, metaclass=CompactMeta):
+  street: str = None
+  city: str = None
+  zip: int = 0
+
+
+class CompactPhoneView(SerializableObject, metaclass=CompactMeta):
+  kind: str = None
+  number: str = None
+
+
+class CompactPersonView(SerializableObject, metaclass=CompactMeta):
+  __aliases__ = {
+    "e_mail": "e-mail"
+  }
+
+  id: int = 0
+  name: str = None
+  e_mail: str = None
+  age: int = 0
+  score: float = 0.0
+  active: bool = False
+  tags: List[str] = []
+  address: CompactAddressView = None
+  phones: List[CompactPhoneView] = []
+  attributes: Dict[str, str] = {}
+
+
+class CompactFlatView(SerializableObject, metaclass=CompactMeta):
+  id: int = 0
+  name: str = None
+  e_mail: str = None
+  age: int = 0
+  score: float = 0.0
+  active: bool = False
+  country: str = None
+  created: str = None
+
+
+class LazyAddressView(AddressView):
+  __lazy__ = True
+
+
+class LazyPhoneView(PhoneView):
+  __lazy__ = True
+
+
+class LazyPersonView(PersonView):
+  __lazy__ = True
+
+  address: LazyAddressView = None
+  phones: List[LazyPhoneView] = []
+
+
+class TreeView(SerializableObject):
+  name: str = None
+  value: int = 0
+  labels: List[str] = []
+  children: List['TreeView'] = []
+
+
+class LazyTreeView(TreeView):
+  __lazy__ = True
+
+  children: List['LazyTreeView'] = []
+
+
+WIDE_FIELDS = 64
+
+WideView = type("WideView", (SerializableObject,), {
+  "__annotations__": {f"field_{n}": (int if n % 2 else str) for n in range(WIDE_FIELDS)},
+  **{f"field_{n}": (0 if n % 2 else None) for n in range(WIDE_FIELDS)}
+})
+
+
+class MappedView(SerializableObject):
+  __strict__ = False
+  __mapping__ = {
+    "uris": "_url",
+    "counts": "_count",
+    "flags": "_flag",
+    "labels": "_label"
+  }
+
+  id: int = 0
+  name: str = None
+  uris: Dict[str, str] = {}
+  counts: Dict[str, int] = {}
+
+
+# views with the generated constructor, compared to the interpreted ones (see json2obj.specialize)
+
+@specialize
+class SpecializedFlatView(FlatView):
+  pass
+
+
+@specialize
+class SpecializedCompactFlatView(CompactFlatView):
+  pass
+
+
+@specialize
+class SpecializedAddressView(AddressView):
+  pass
+
+
+@specialize
+class SpecializedPhoneView(PhoneView):
+  pass
+
+
+@specialize
+class SpecializedPersonView(PersonView):
+  address: SpecializedAddressView = None
+  phones: List[SpecializedPhoneView] = []
+
+
+@specialize
+class SpecializedTreeView(TreeView):
+  children: List['SpecializedTreeView'] = []
+
+
+MAPPED_SUFFIXES = ("_url", "_count", "_flag", "_label", "_other")
+
+
+def flat_record(i: int) -> dict:
+  return {
+    "id": i,
+    "name": f"user {i}",
+    "e_mail": f"user{i}@example.com",
+    "age": 18 + i % 60,
+    "score": i / 7,
+    "active": i % 2 == 0,
+    "country": "NL",
+    "created": "2020-01-01T00:00:00"
+  }
+
+
+def person_record(i: int) -> dict:
+  return {
+    "id": i,
+    "name": f"user {i}",
+    "e-mail": f"user{i}@example.com",
+    "age": 18 + i % 60,
+    "score": i / 7,
+    "active": i % 2 == 0,
+    "tags": ["a", "b", "c"],
+    "address": {"street": f"street {i}", "city": "Amsterdam", "zip": 1000 + i % 100},
+    "phones": [{"kind": "home", "number": f"+31-{i}"}, {"kind": "work", "number": f"+31-{i + 1}"}],
+    "attributes": {"source": "api", "region": "eu"}
+  }
+
+
+def wide_record(i: int) -> dict:
+  return {f"field_{n}": (i + n if n % 2 else f"value {i} {n}") for n in range(WIDE_FIELDS)}
+
+
+def mapped_record(i: int, keys: int = 300, unique: bool = False) -> dict:
+  """
+  :param unique: key names are unique per record, instead of repeating from record to record
+  :return: record with the dynamic keys, grouped by the suffix (every 5th key is not mapped)
+  """
+  prefix = f"r{i}_" if unique else ""
+  record = {"id": i, "name": f"user {i}"}
+  record.update({f"{prefix}key_{n}{MAPPED_SUFFIXES[n % len(MAPPED_SUFFIXES)]}": n for n in range(keys)})
+  return record
+
+
+def tree_record(i: int, depth: int = 4) -> dict:
+  """
+  :return: binary tree of the 2^depth - 1 nodes
+  """
+  return {
+    "name": f"node {i} {depth}",
+    "value": i + depth,
+    "labels": ["x", "y"],
+    "children": [tree_record(i, depth - 1) for _ in range(2)] if depth > 1 else []
+  }
+
+
+def mixed_records(record: Callable[[int], dict], count: int) -> List[dict]:
+  """
+  :return: records, every 10th of them has a bad value and an unknown key
+  """
+  records = [record(i) for i in range(count)]
+  for r in records[::10]:
+    r["age"] = "unknown"
+    r["legacy_id"] = 0
+  return records
+
+
+def _best_rate(call: Callable[[], int], repeat: int) -> float:
+  best = 0.0
+  for _ in range(repeat):
+    started = time.perf_counter()
+    count = call()
+    best = max(best, count / (time.perf_counter() - started))
+  return best
+
+
+def _bench_views(clazz, record: Callable[[int], dict]) -> Callable[[int], Callable[[], int]]:
+  def _bench(count: int) -> Callable[[], int]:
+    records = [record(i) for i in range(count)]
+
+    def _run():
+      for r in records:
+        clazz(r)
+      return count
+    return _run
+  return _bench
+
+
+def _bench_loop(clazz, record: Callable[[int], dict]) -> Callable[[int], Callable[[], int]]:
+  def _bench(count: int) -> Callable[[], int]:
+    records = [record(i) for i in range(count)]
+
+    def _run():
+      return len([clazz(r) for r in records])
+    return _run
+  return _bench
+
+
+def _bench_from_list(clazz, record: Callable[[int], dict], **kwargs) -> Callable[[int], Callable[[], int]]:
+  def _bench(count: int) -> Callable[[], int]:
+    records = [record(i) for i in range(count)]
+
+    def _run():
+      clazz.from_list(records, **kwargs)
+      return count
+    return _run
+  return _bench
+
+
+def _bench_partial(clazz, read_all: bool = False) -> Callable[[int], Callable[[], int]]:
+  """
+  Create view and read a few fields of it, or all of the nested fields
+  """
+  def _bench(count: int) -> Callable[[], int]:
+    records = [person_record(i) for i in range(count)]
+
+    def _run():
+      for r in records:
+        obj = clazz(r)
+        _ = obj.name, obj.address.city
+        if read_all:
+          _ = obj.tags, obj.attributes, [p.number for p in obj.phones]
+      return count
+    return _run
+  return _bench
+
+
+def _bench_json(count: int) -> Callable[[], int]:
+  documents = [json.dumps(person_record(i)) for i in range(count)]
+
+  def _run():
+    for doc in documents:
+      PersonView(doc)
+    return count
+  return _run
+
+
+def _bench_iter_json(count: int) -> Callable[[], int]:
+  document = json.dumps([person_record(i) for i in range(count)]).encode("utf-8")
+
+  def _run():
+    return sum(1 for _ in PersonView.iter_json(io.BytesIO(document)))
+  return _run
+
+
+def _bench_serialize(clazz, record: Callable[[int], dict], to_json: bool = False) -> Callable[[int], Callable[[], int]]:
+  def _bench(count: int) -> Callable[[], int]:
+    instances = [clazz(record(i)) for i in range(count)]
+
+    def _run():
+      if to_json:
+        for obj in instances:
+          obj.to_json()
+      else:
+        for obj in instances:
+          obj.serialize()
+      return count
+    return _run
+  return _bench
+
+
+def _bench_clone(clazz, record: Callable[[int], dict], read: Callable = None) -> Callable[[int], Callable[[], int]]:
+  """
+  Clone view via constructor, optionally reading (or modifying) the clone
+  """
+  def _bench(count: int) -> Callable[[], int]:
+    instances = [clazz(record(i)) for i in range(count)]
+
+    def _run():
+      for obj in instances:
+        c = clazz(obj)
+        if read:
+          read(c)
+      return count
+    return _run
+  return _bench
+
+
+def _bench_ingest(clazz, record: Callable[[int], dict], mode: str) -> Callable[[int], Callable[[], int]]:
+  """
+  Ingest batch with the bad records: by catching errors per record, with the report, or validate only
+  """
+  def _bench(count: int) -> Callable[[], int]:
+    records = mixed_records(record, count)
+
+    def _run():
+      if mode == "validate":
+        report = clazz.validate(records)
+      elif mode == "report":
+        report = ValidationReport()
+        clazz.from_list(records, report=report)
+      else:
+        bad = []
+        for index, r in enumerate(records):
+          try:
+            clazz(r)
+          except ValueError:
+            bad.append(index)
+        report = bad
+      assert len(report) == count // 10 + (count % 10 > 0)
+      return count
+    return _run
+  return _bench
+
+
+def _append_label(obj):
+  obj.children[0].labels.append("z")
+
+
+SCENARIOS: Dict[str, Callable[[int], Callable[[], int]]] = {
+  "flat": _bench_views(FlatView, flat_record),
+  "flat-compact": _bench_views(CompactFlatView, flat_record),
+  "nested": _bench_views(PersonView, person_record),
+  "nested-compact": _bench_views(CompactPersonView, person_record),
+  "flat-specialized": _bench_views(SpecializedFlatView, flat_record),
+  "flat-compact-specialized": _bench_views(SpecializedCompactFlatView, flat_record),
+  "nested-specialized": _bench_views(SpecializedPersonView, person_record),
+  "deep": _bench_views(TreeView, tree_record),
+  "deep-specialized": _bench_views(SpecializedTreeView, tree_record),
+  "nested-partial": _bench_partial(PersonView),
+  "nested-lazy-partial": _bench_partial(LazyPersonView),
+  "nested-read-all": _bench_partial(PersonView, read_all=True),
+  "nested-lazy-read-all": _bench_partial(LazyPersonView, read_all=True),
+  "nested-json": _bench_json,
+  "nested-iter-json": _bench_iter_json,
+  "mapping-dynamic-keys": _bench_views(MappedView, mapped_record),
+  "mapping-unique-keys": _bench_views(MappedView, lambda i: mapped_record(i, unique=True)),
+  "mapping-mostly-repeating": _bench_views(MappedView, lambda i: {**mapped_record(i), **mapped_record(i, 10, True)}),
+  "flat-loop": _bench_loop(FlatView, flat_record),
+  "flat-from-list": _bench_from_list(FlatView, flat_record),
+  "flat-columnar": _bench_from_list(FlatView, flat_record, columnar=True),
+  "flat-columnar-array": _bench_from_list(FlatView, flat_record, columnar=True, use_array=True),
+  "nested-loop": _bench_loop(PersonView, person_record),
+  "nested-from-list": _bench_from_list(PersonView, person_record),
+  "nested-from-list-specialized": _bench_from_list(SpecializedPersonView, person_record),
+  "nested-columnar": _bench_from_list(PersonView, person_record, columnar=True),
+  "serialize-flat": _bench_serialize(FlatView, flat_record),
+  "serialize-nested": _bench_serialize(PersonView, person_record),
+  "to-json-flat": _bench_serialize(FlatView, flat_record, to_json=True),
+  "to-json-nested": _bench_serialize(PersonView, person_record, to_json=True),
+  "flat-ingest-try": _bench_ingest(FlatView, flat_record, "try"),
+  "flat-ingest-report": _bench_ingest(FlatView, flat_record, "report"),
+  "flat-validate": _bench_ingest(FlatView, flat_record, "validate"),
+  "nested-ingest-try": _bench_ingest(PersonView, person_record, "try"),
+  "nested-ingest-report": _bench_ingest(PersonView, person_record, "report"),
+  "nested-validate": _bench_ingest(PersonView, person_record, "validate"),
+  "clone-flat": _bench_clone(FlatView, flat_record),
+  "clone-wide": _bench_clone(WideView, wide_record),
+  "clone-nested": _bench_clone(PersonView, person_record),
+  "clone-nested-compact": _bench_clone(CompactPersonView, person_record),
+  "clone-deep": _bench_clone(TreeView, tree_record),
+  "clone-deep-lazy": _bench_clone(LazyTreeView, tree_record),
+  "clone-deep-modify": _bench_clone(TreeView, tree_record, _append_label),
+  "clone-deep-lazy-modify": _bench_clone(LazyTreeView, tree_record, _append_label)
+}
+
+MEMORY_VIEWS = (
+  (FlatView, flat_record),
+  (CompactFlatView, flat_record),
+  (SpecializedFlatView, flat_record),
+  (PersonView, person_record),
+  (CompactPersonView, person_record),
+  (SpecializedPersonView, person_record)
+)
+
+
+def run(scenarios: List[str], count: int, repeat: int) -> List[Dict]:
+  return [{"scenario": name, "rate": _best_rate(SCENARIOS[name](count), repeat)} for name in scenarios]
+
+
+def memory_per_instance(clazz, record: Callable[[int], dict], count: int) -> float:
+  """
+  :return: bytes retained by the instance and its nested views, excluding the source record
+  """
+  records = [record(i) for i in range(count)]
+  tracemalloc.start()
+  try:
+    instances = [clazz(r) for r in records]
+    retained, _ = tracemalloc.get_traced_memory()
+  finally:
+    tracemalloc.stop()
+
+  del instances
+  return retained / count
+
+
+def print_memory(count: int):
+  print(f"{'view':<24} {'bytes/instance':>15}")
+  for clazz, record in MEMORY_VIEWS:
+    print(f"{clazz.__name__:<24} {memory_per_instance(clazz, record, count):>15.1f}")
+
+
+def print_reports(reports: List[Dict], baseline: List[Dict] = None):
+  baseline = {r["scenario"]: r for r in baseline} if baseline else {}
+
+  print(f"{'scenario':<28} {'objects/s':>12} {'us/object':>10} {'vs baseline':>12}")
+  for r in reports:
+    base = baseline.get(r["scenario"])
+    delta = f"{r['rate'] / base['rate']:>11.2f}x" if base else f"{'-':>12}"
+    print(f"{r['scenario']:<28} {r['rate']:>12.0f} {1e6 / r['rate']:>10.2f} {delta}")
+
+
+def main(argv: List[str] = None):
+  parser = argparse.ArgumentParser(description="apputils.json2obj benchmark")
+  parser.add_argument("--count", type=int, default=20000, help="objects per scenario run")
+  parser.add_argument("--repeat", type=int, default=5, help="runs per scenario, the best one is reported")
+  parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated list of scenarios")
+  parser.add_argument("--save", help="save results to the json file")
+  parser.add_argument("--compare", help="json file with the previous results to compare with")
+  parser.add_argument("--memory", action="store_true", help="report memory per instance instead of the speed")
+  args = parser.parse_args(argv)
+
+  if args.memory:
+    print_memory(args.count)
+    return
+
+  scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+  unknown = set(scenarios) - set(SCENARIOS)
+  if unknown:
+    parser.error(f"unknown scenarios: {', '.join(unknown)}, available: {', '.join(SCENARIOS)}")
+
+  reports = run(scenarios, args.count, args.repeat)
+
+  baseline = None
+  if args.compare:
+    with open(args.compare, "r") as f:
+      baseline = json.load(f)
+
+  print_reports(reports, baseline)
+
+  if args.save:
+    with open(args.save, "w") as f:
+      json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+  main()
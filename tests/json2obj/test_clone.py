@@ -0,0 +1,122 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+from typing import Dict, List
+
+from modules.apputils.json2obj import SerializableObject, CompactMeta
+
+
+class AddressView(SerializableObject):
+  city: str = None
+  zip: int = 0
+
+
+class PersonView(SerializableObject):
+  name: str = None
+  addr: AddressView = None
+  tags: List[str] = []
+  attributes: Dict[str, str] = {}
+
+
+class LazyPersonView(PersonView):
+  __lazy__ = True
+
+
+class CompactAddressView(SerializableObject, metaclass=CompactMeta):
+  city: str = None
+  zip: int = 0
+
+
+class LazyCompactPersonView(SerializableObject, metaclass=CompactMeta):
+  __lazy__ = True
+
+  name: str = None
+  addr: CompactAddressView = None
+  tags: List[str] = []
+
+
+VIEWS = (PersonView, LazyPersonView, LazyCompactPersonView)
+
+
+def person_record() -> dict:
+  return {"name": "amy", "addr": {"city": "oslo", "zip": 1}, "tags": ["a", "b"]}
+
+
+def test_clone_is_equal():
+  for clazz in VIEWS:
+    p = clazz(person_record())
+    q = p.clone()
+    assert type(q) is clazz
+    assert q.serialize() == p.serialize()
+    assert q.addr.city == "oslo" and q.tags == ["a", "b"]
+
+
+def test_source_mutation_after_clone_is_not_visible_in_clone():
+  for clazz in VIEWS:
+    p = clazz(person_record())
+    addr, tags = p.addr, p.tags  # references held by the caller
+
+    q = p.clone()
+    addr.city = "rome"
+    tags.append("c")
+
+    assert q.addr.city == "oslo"
+    assert q.tags == ["a", "b"]
+    assert p.addr.city == "rome" and p.tags == ["a", "b", "c"]
+
+
+def test_clone_keeps_source_identity():
+  for clazz in VIEWS:
+    p = clazz(person_record())
+    addr = p.addr
+    p.clone()
+
+    assert p.addr is addr
+    addr.zip = 2
+    assert p.addr.zip == 2
+    assert p.serialize()["addr"]["zip"] == 2
+
+
+def test_clone_mutation_is_not_visible_in_source():
+  for clazz in VIEWS:
+    p = clazz(person_record())
+    p.tags  # converted before the clone
+
+    q = p.clone()
+    q.addr.city = "rome"
+    q.tags.append("c")
+
+    assert p.addr.city == "oslo"
+    assert p.tags == ["a", "b"]
+
+
+def test_lazy_clone_converts_unread_fields_independently():
+  p = LazyPersonView(person_record())
+  q = p.clone()  # nothing is converted yet
+
+  assert q.addr is not p.addr
+  assert q.tags is not p.tags
+  q.addr.city = "rome"
+  assert p.addr.city == "oslo"
+
+
+def test_clone_of_lazy_view_doesnt_convert_source():
+  p = LazyPersonView(person_record())
+  p.clone()
+  assert "addr" in p.__dict__ and type(p.__dict__["addr"]).__name__ == "LazyValue"
@@ -0,0 +1,181 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import inspect
+import json
+import random
+from typing import Dict, List
+
+import pytest
+
+from modules.apputils.json2obj import SerializableObject, CompactMeta, ValidationReport, specialize, init_source
+
+
+class AddressView(SerializableObject):
+  city: str = None
+  zip: int = 0
+
+
+@specialize
+class SpecializedAddressView(AddressView):
+  pass
+
+
+@specialize
+class CompactAddressView(SerializableObject, metaclass=CompactMeta):
+  city: str = None
+  zip: int = 0
+
+
+FIELDS = {
+  "id": (int, 0),
+  "name": (str, None),
+  "score": (float, 0),
+  "tags": (List[str], []),
+  "raw": (list, None),
+  "meta": (Dict[str, int], None),
+  "e_mail": (str, None)
+}
+
+VALUES = {
+  "id": [1, "2", "", None, "x", 3.5],
+  "name": ["a", 5, None],
+  "score": [1.5, 2, "3.5", "z"],
+  "tags": [["a", 1], None, "s"],
+  "raw": [[1, 2], None, 3],
+  "meta": [{"a": 1, "b": "2"}, None, {"a": "x"}, {"a": True, "b": 2.5, "c": ""}, "m"],
+  "addr": [{"city": "c", "zip": 1}, None, 5, {"bad": 1}, {"city": 1, "zip": "9"}, '{"city": "j"}'],
+  "addrs": [[{"city": "x"}, None, '{"zip": 2}'], [], None, [{"q": 1}], "s"],
+  "e-mail": ["m", 3],
+  "e_mail": ["n"],
+  "zzz_url": ["u"],
+  "other": [1]
+}
+
+
+def _views(address, compact: bool = False, lazy: bool = False, strict: bool = True, mapping: bool = False):
+  """
+  :return: the same view with the interpreted and the generated constructor
+  """
+  views = []
+  for decorate in (False, True):
+    annotations = {k: t for k, (t, _) in FIELDS.items()}
+    annotations.update(addr=address, addrs=List[address])
+    namespace = {k: d for k, (_, d) in FIELDS.items()}
+    namespace.update(__annotations__=annotations, __strict__=strict, __lazy__=lazy, __aliases__={"e_mail": "e-mail"},
+                     addr=None, addrs=[])
+    if mapping:
+      annotations["urls"] = dict
+      namespace.update(__mapping__={"urls": "_url"}, urls=None)
+
+    clazz = (CompactMeta if compact else type)("View", (SerializableObject,), namespace)
+    views.append(specialize(clazz) if decorate else clazz)
+  return views
+
+
+def _state(clazz, record):
+  try:
+    obj = clazz(record)
+    return "ok", json.dumps(obj.serialize(skip_none=False), sort_keys=True, default=str), list(map(str, obj.__error__))
+  except ValueError as e:
+    return "error", str(e)
+
+
+@pytest.mark.parametrize("address", [AddressView, SpecializedAddressView, CompactAddressView])
+@pytest.mark.parametrize("options", [{}, {"compact": True}, {"lazy": True}, {"strict": False}, {"mapping": True},
+                                     {"compact": True, "lazy": True, "strict": False, "mapping": True}])
+def test_generated_constructor_is_equivalent(address, options):
+  interpreted, generated = _views(address, **options)
+  rnd = random.Random(1)
+  for _ in range(300):
+    record = {k: rnd.choice(v) for k, v in VALUES.items() if rnd.random() < 0.5}
+    assert _state(interpreted, dict(record)) == _state(generated, dict(record)), record
+
+  for other in (None, '{"id": 5}'):
+    assert _state(interpreted, other) == _state(generated, other)
+  assert generated(id=3).id == 3
+
+
+def test_batch_conversion_with_report():
+  interpreted, generated = _views(SpecializedAddressView)
+  rnd = random.Random(2)
+  records = [{k: rnd.choice(v) for k, v in VALUES.items() if rnd.random() < 0.5} for _ in range(100)]
+  reports = ValidationReport(), ValidationReport()
+
+  converted = [[obj.serialize() if obj is not None else None for obj in clazz.from_list(records, report=report)]
+               for clazz, report in zip((interpreted, generated), reports)]
+  assert converted[0] == converted[1]
+  assert str(reports[0]) == str(reports[1])
+
+
+@specialize
+class TreeView(SerializableObject):
+  name: str = None
+  children: List['TreeView'] = []
+
+
+@specialize
+class NodeView(SerializableObject):
+  name: str = None
+  edge: 'EdgeView' = None
+
+
+@specialize
+class EdgeView(SerializableObject):
+  weight: int = 0
+  target: NodeView = None
+
+
+def test_recursive_views():
+  tree = TreeView({"name": "root", "children": [{"name": "a", "children": [{"name": "b"}]}, None]})
+  assert type(tree.children[0].children[0]) is TreeView
+  assert tree.children[0].children[0].name == "b"
+  assert tree.children[1].name is None
+
+  node = NodeView({"name": "n", "edge": {"weight": 2, "target": {"name": "m", "edge": {"weight": 3}}}})
+  assert node.edge.target.edge.weight == 3
+  with pytest.raises(ValueError):
+    NodeView({"edge": {"target": {"name": 1, "unknown": 2}}})
+
+
+def test_subclass_is_not_specialized():
+  class SubTreeView(TreeView):
+    value: int = 0
+
+  sub = SubTreeView({"name": "s", "value": 2, "children": [{"name": "c"}]})
+  assert sub.value == 2 and type(sub.children[0]) is TreeView
+
+
+def test_source_is_inspectable():
+  TreeView({})
+  source = init_source(TreeView)
+  assert "def _fill(self, d):" in source and "'children' in d" in source
+  assert inspect.getsource(TreeView.__init__) in source
+  assert inspect.getsource(TreeView.__init__.__fill__) in source
+
+  with pytest.raises(TypeError):
+    init_source(AddressView)
+
+
+def test_own_constructor_is_rejected():
+  with pytest.raises(TypeError):
+    @specialize
+    class CustomView(SerializableObject):
+      def __init__(self):
+        super().__init__()
@@ -0,0 +1,73 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import sys
+
+import pytest
+
+from modules.apputils.json2obj import SerializableObject, CompactMeta
+
+from .views import person_views, records, state
+
+
+@pytest.mark.parametrize("options", [{}, {"strict": False}, {"mapping": True}])
+def test_compact_view_is_equivalent_to_reference(options):
+  current, reference = person_views(compact=True, **options)
+  for record in records(2):
+    assert state(current, record) == state(reference, record), record
+
+
+def test_instance_has_no_dict():
+  current, _ = person_views(compact=True, mapping=True)
+  obj = current({"id": 1, "a_url": "u"})
+
+  assert not hasattr(obj, "__dict__")
+  assert (obj.id, obj.name, obj.tags, obj.urls) == (1, None, [], {"a_url": "u"})
+  with pytest.raises(AttributeError):
+    obj.unknown = 1
+
+
+def test_defaults_stay_on_the_class():
+  current, _ = person_views(compact=True)
+  first, second = current({}), current({"tags": ["a"]})
+
+  assert first.tags is current.__field_defaults__["tags"] and second.tags == ["a"]
+  assert sys.getsizeof(first) == sys.getsizeof(second)
+
+
+def test_error_list_is_allocated_on_error():
+  current, reference = person_views(compact=True, strict=False)
+  valid, invalid = current({"id": 1}), current({"id": "x"})
+
+  assert valid.__error__ == () and type(invalid.__error__) is list
+  assert list(map(str, invalid.__error__)) == reference({"id": "x"}).__error__
+
+
+def test_subclass_of_compact_view():
+  class BaseView(SerializableObject, metaclass=CompactMeta):
+    name: str = None
+
+  class ChildView(BaseView):
+    age: int = 0
+
+  child = ChildView({"name": "amy", "age": 3})
+  assert (child.name, child.age, ChildView({}).age) == ("amy", 3, 0)
+  assert not hasattr(child, "__dict__")
+  with pytest.raises(ValueError):
+    ChildView({"age": "x"})
@@ -0,0 +1,116 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import json
+from array import array
+from typing import List
+
+import pytest
+
+from modules.apputils.json2obj import SerializableObject, ValidationReport
+
+from .views import person_views, records, error_lines, converts
+
+FIELDS = ("id", "name", "score", "tags", "raw", "meta", "e_mail", "urls", "addr", "addrs", "book")
+
+
+def _plain(value):
+  return json.loads(json.dumps(value, default=lambda v: v.serialize()))
+
+
+def test_list_is_equivalent_to_reference():
+  current, reference = person_views(strict=False, mapping=True)
+  batch = [r for r in records(3) if converts(reference, r)]  # nested views are strict
+  converted = current.from_list(json.loads(json.dumps(batch)))
+
+  assert [obj.serialize() for obj in converted] == [reference(r).serialize() for r in json.loads(json.dumps(batch))]
+  assert [sorted(map(str, obj.__error__)) for obj in converted] == \
+         [sorted(reference(r).__error__) for r in json.loads(json.dumps(batch))]
+
+
+def test_strict_list_raises_on_the_first_bad_record():
+  current, reference = person_views()
+  batch = list(records(4, 20))
+  bad = next(r for r in batch if not converts(reference, r))
+
+  with pytest.raises(ValueError) as e:
+    current.from_list(json.loads(json.dumps(batch)))
+  with pytest.raises(ValueError) as expected:
+    reference(bad)
+  assert error_lines(str(e.value)) == error_lines(str(expected.value))
+
+
+def test_list_with_report_converts_all_records():
+  current, reference = person_views(mapping=True)
+  batch = list(records(5))
+  report = ValidationReport()
+  converted = current.from_list(json.loads(json.dumps(batch)), report=report)
+
+  assert len(converted) == len(batch) and report.records == len(batch)
+  assert report.indexes == [i for i, r in enumerate(batch) if not converts(reference, r)]
+
+
+@pytest.mark.parametrize("mapping", [True, False])
+def test_columns_are_equivalent_to_views(mapping):
+  current, reference = person_views(strict=False, mapping=mapping)
+  batch = [r for r in records(6) if converts(reference, r)]
+  columns = current.from_list(json.loads(json.dumps(batch)), columnar=True)
+  views = current.from_list(json.loads(json.dumps(batch)))
+
+  assert sorted(columns) == sorted(FIELDS)
+  for name in FIELDS:
+    assert _plain(columns[name]) == _plain([getattr(obj, name) for obj in views]), name
+
+
+def test_strict_columns_raise():
+  current, _ = person_views()
+  with pytest.raises(ValueError):
+    current.from_list([{"id": 1}, {"id": "x"}], columnar=True)
+
+
+class MeasureView(SerializableObject):
+  count: int = 0
+  value: float = 0.0
+  label: str = None
+  total: int = None
+
+
+def test_numeric_columns_in_arrays():
+  columns = MeasureView.from_list([{"count": 1, "value": 0.5, "label": "a"}, {"count": 2, "total": 5}],
+                                  columnar=True, use_array=True)
+
+  assert columns["count"] == array("q", [1, 2]) and columns["value"] == array("d", [0.5, 0.0])
+  assert columns["label"] == ["a", None] and columns["total"] == [None, 5]  # column with None is left as list
+
+  columns = MeasureView.from_list([{"count": 2 ** 70}], columnar=True, use_array=True)
+  assert columns["count"] == [2 ** 70]
+
+
+def test_iter_list_is_lazy():
+  converted: List[int] = []
+
+  def _records():
+    for i in range(3):
+      converted.append(i)
+      yield {"count": i} if i != 1 else '{"count": 10}'
+
+  items = MeasureView.iter_list(_records())
+  assert converted == []
+  assert [next(items).count, next(items).count] == [0, 10] and converted == [0, 1]
+  assert [obj.count for obj in items] == [2]
@@ -0,0 +1,79 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import io
+import json
+
+import pytest
+
+from .views import person_views, records, converts
+
+
+def _document(reference) -> str:
+  batch = [r for r in records(7, 50) if converts(reference, r)]
+  batch[0]["name"] = "Åsa ünïcødé ☃"  # multibyte characters are split between the chunks
+  return json.dumps(batch, indent=1)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 64 * 1024])
+@pytest.mark.parametrize("binary", [True, False])
+def test_array_split_across_chunks(chunk_size, binary):
+  current, reference = person_views(strict=False, mapping=True)
+  document = _document(reference)
+  source = io.BytesIO(document.encode("utf-8")) if binary else io.StringIO(document)
+
+  converted = [obj.serialize() for obj in current.iter_json(source, chunk_size=chunk_size)]
+  assert converted == [reference(r).serialize() for r in json.loads(document)]
+  assert converted[0]["name"] == "Åsa ünïcødé ☃"
+
+
+def test_items_are_converted_while_reading():
+  current, _ = person_views()
+  source = io.StringIO(json.dumps([{"id": i} for i in range(100)]))
+  items = current.iter_json(source, chunk_size=16)
+
+  assert next(items).id == 0 and source.tell() < len(source.getvalue())
+  assert [obj.id for obj in items] == list(range(1, 100))
+
+
+def test_document_string_and_object():
+  current, _ = person_views()
+  assert [obj.id for obj in current.iter_json('  [{"id": 1}, {"id": 2}]  ')] == [1, 2]
+  assert [obj.id for obj in current.iter_json(b'[]')] == []
+  assert [obj.id for obj in current.iter_json(io.StringIO('{"id": 3}'), chunk_size=2)] == [3]
+  assert [obj.id for obj in current.from_json('[{"id": 4}]')] == [4] and current.from_json('{"id": 5}').id == 5
+
+
+@pytest.mark.parametrize("document", ['[{"id": 1}, {"id": 2}', '[{"id": 1} {"id": 2}]', '[{"id": 1},', '"id"'])
+def test_broken_document(document):
+  current, _ = person_views()
+  with pytest.raises(json.JSONDecodeError):
+    list(current.iter_json(io.StringIO(document), chunk_size=4))
+
+
+def test_strict_errors_are_raised_for_the_item():
+  current, reference = person_views()
+  items = current.iter_json(io.StringIO('[{"id": 1}, {"id": "x"}, {"id": 3}]'), chunk_size=4)
+
+  assert next(items).id == 1
+  with pytest.raises(ValueError) as e:
+    next(items)
+  with pytest.raises(ValueError) as expected:
+    reference({"id": "x"})
+  assert str(e.value) == str(expected.value)
@@ -0,0 +1,88 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import json
+
+import pytest
+
+from modules.apputils.json2obj.plan import LazyValue
+
+from .views import person_views, records, converts, error_lines, state
+
+LAZY_FIELDS = ("tags", "meta", "addr", "addrs", "book")
+
+
+def _read_all(obj):
+  for name in LAZY_FIELDS:
+    getattr(obj, name)
+  return obj
+
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_read_view_is_equivalent_to_reference(compact):
+  current, reference = person_views(lazy=True, strict=False, compact=compact, mapping=True)
+  for record in records(10):
+    if converts(reference, record):  # strict nested views raise on the access
+      assert state(lambda d: _read_all(current(d)), record) == state(reference, record), record
+
+
+def test_fields_are_converted_on_access():
+  current, _ = person_views(lazy=True)
+  obj = current({"id": 1, "addr": {"city": "x"}, "addrs": [{"zip": 2}], "tags": ["a"]})
+
+  assert all(type(obj.__dict__[name]) is LazyValue for name in ("addr", "addrs", "tags"))
+  assert obj.addr is obj.addr and obj.addr.city == "x"
+  assert type(obj.__dict__["addr"]) is not LazyValue and type(obj.__dict__["addrs"]) is LazyValue
+  assert obj.serialize() == {"id": 1, "score": 0, "addr": {"city": "x", "zip": 0}, "addrs": [{"zip": 2}],
+                             "tags": ["a"], "book": {}}
+
+
+@pytest.mark.parametrize("record", [{"tags": "s"}, {"meta": {"a": "x"}}, {"addr": {"city": 1}},
+                                    {"addrs": [{"zip": "q", "other": 1}]}, {"book": {"home": 5}}])
+def test_strict_error_is_raised_on_access(record):
+  current, reference = person_views(lazy=True)
+  obj = current(json.loads(json.dumps(record)))  # errors of the lazy fields are not seen yet
+  name, = record
+
+  with pytest.raises(ValueError) as e:
+    getattr(obj, name)
+  with pytest.raises(ValueError) as expected:
+    reference(json.loads(json.dumps(record)))
+  assert error_lines(str(e.value)) == error_lines(str(expected.value))
+
+
+def test_not_strict_errors_are_reported_on_access():
+  current, reference = person_views(lazy=True, strict=False)
+  record = {"id": "x", "tags": "s", "meta": {"a": "x"}}
+  obj = current(dict(record))
+
+  assert list(map(str, obj.__error__)) == [
+    "Conflicting type in schema and data for object 'PersonView', expecting 'int' but got 'str' (value: x)"
+  ]
+  assert (obj.tags, obj.meta) == (None, {"a": None})
+  assert sorted(map(str, obj.__error__)) == sorted(reference(dict(record)).__error__)
+
+
+def test_eager_fields_are_checked_on_construction():
+  current, reference = person_views(lazy=True)
+  with pytest.raises(ValueError) as e:
+    current({"id": "x", "other": 1, "addr": {"city": 1}})
+  with pytest.raises(ValueError) as expected:
+    reference({"id": "x", "other": 1})
+  assert error_lines(str(e.value)) == error_lines(str(expected.value))
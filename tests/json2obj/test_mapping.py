@@ -0,0 +1,94 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import json
+import random
+
+import pytest
+
+from .legacy import both
+from .views import error_lines
+
+SUFFIXES = ("_url", "_image_url", "_id", "_count", "l", "_id")
+
+
+def _links(strict: bool = True):
+  def declare(base):
+    class LinksView(base):
+      __strict__ = strict
+      __mapping__ = {"urls": "_url", "images": "_image_url", "ids": "_id", "counts": "_count", "tails": "l",
+                     "more_ids": "_id"}
+
+      name: str = None
+      urls: dict = None
+      images: dict = None
+      ids: dict = None
+      counts: dict = None
+      tails: dict = None
+      more_ids: dict = None
+    return LinksView
+  return declare
+
+
+def _record(rnd: random.Random, keys: int) -> dict:
+  d = {"name": "n"}
+  for i in range(keys):
+    prefix = rnd.choice(("a", "b", "photo", "x_y", ""))
+    d[f"{prefix}{rnd.randrange(keys)}{rnd.choice(SUFFIXES + ('_other', ''))}"] = i
+  return d
+
+
+def _state(clazz, record: dict):
+  try:
+    return "ok", clazz(dict(record)).serialize()
+  except ValueError as e:
+    return "error", error_lines(str(e))
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_grouping_is_equivalent_to_reference(strict):
+  current, reference = both(_links(strict))
+  rnd = random.Random(13)
+  for keys in (0, 1, 5, 300, 300, 1000):
+    record = _record(rnd, keys)
+    assert _state(current, record) == _state(reference, record)
+    if keys and not strict:
+      obj, expected = current(dict(record)), reference(dict(record))
+      for name in ("urls", "images", "ids", "counts", "tails", "more_ids"):
+        assert getattr(obj, name) == getattr(expected, name), name
+
+
+def test_first_matching_rule_wins():
+  current, reference = both(_links(strict=False))
+  record = {"a_image_url": 1, "b_url": 2, "c_id": 3, "tail": 4, "d_url_id": 5, "e": 6}
+  for _ in range(2):  # keys are scanned, then looked up in the resolved rules
+    obj = current(dict(record))
+    assert (obj.urls, obj.images, obj.ids, obj.tails, obj.more_ids) == \
+           ({"a_image_url": 1, "b_url": 2}, None, {"c_id": 3, "d_url_id": 5}, {"tail": 4}, None)
+    assert obj.serialize() == reference(dict(record)).serialize()
+
+
+def test_grouping_with_many_new_keys():
+  current, reference = both(_links(strict=False))
+  for i in range(3):  # remembered keys are limited, new keys are still grouped
+    record = {f"k{i}_{n}_url": n for n in range(20000)}
+    record.update({f"k{i}_{n}_count": n for n in range(100)})
+    obj, expected = current(dict(record)), reference(dict(record))
+    assert (obj.urls, obj.counts) == (expected.urls, expected.counts)
+    assert json.dumps(obj.serialize(), sort_keys=True) == json.dumps(expected.serialize(), sort_keys=True)
@@ -0,0 +1,78 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import pytest
+
+from .views import person_views, records, state
+
+
+@pytest.mark.parametrize("strict", [True, False])
+@pytest.mark.parametrize("mapping", [True, False])
+def test_conversion_is_equivalent_to_reference(strict, mapping):
+  current, reference = person_views(strict=strict, mapping=mapping)
+  for record in records(1):
+    assert state(current, record) == state(reference, record), record
+
+
+def test_not_strict_view_collects_errors():
+  current, reference = person_views(strict=False)
+  record = {"id": "x", "tags": "s", "e-mail": 3, "a_url": "u"}
+  obj = current(record)
+
+  assert sorted(map(str, obj.__error__)) == sorted(reference(record).__error__)
+  assert [str(e) for e in obj.__error__] == [
+    "Conflicting type in schema and data for object 'PersonView', expecting 'int' but got 'str' (value: x)",
+    "Conflicting type in schema and data for object 'PersonView', expecting 'str' but got 'str' (value: s)",
+    "Conflicting type in schema and data for object 'PersonView', expecting 'str' but got 'int' (value: 3)"
+  ]
+  assert (obj.id, obj.tags, obj.e_mail) == (None, None, None)
+
+
+def test_aliases_and_mapping():
+  current, reference = person_views(mapping=True)
+  record = {"e-mail": "m", "a_url": "u", "b_url": None, "addrs": [{"city": "x"}]}
+  obj = current(dict(record))
+
+  assert (obj.e_mail, obj.urls) == ("m", {"a_url": "u", "b_url": None})
+  assert obj.serialize() == reference(dict(record)).serialize() == {
+    "id": 0, "score": 0, "tags": [], "book": {}, "addrs": [{"city": "x", "zip": 0}], "e-mail": "m", "a_url": "u"
+  }
+
+
+def test_none_of_the_list_and_dict_fields():
+  current, reference = person_views()
+  record = {"tags": None, "meta": None, "addrs": None, "book": None}
+  with pytest.raises(TypeError):
+    reference(dict(record))  # reference converter iterates over None
+
+  obj = current(record)
+  assert (obj.tags, obj.meta, obj.addrs, obj.book) == (None, None, None, None)
+
+
+def test_subclass_changes_the_settings():
+  current, _ = person_views()
+  with pytest.raises(ValueError):
+    current({"other": 1})
+
+  class LenientPersonView(current):
+    __strict__ = False
+
+  assert not LenientPersonView({"other": 1}).__error__
+  with pytest.raises(ValueError):
+    current({"other": 1})  # plan of the base class is not affected
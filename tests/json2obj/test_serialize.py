@@ -0,0 +1,111 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import io
+import json
+
+import pytest
+
+from .legacy import both
+from .views import person_views, records, converts
+
+
+def _batch(reference, seed: int):
+  return [r for r in records(seed) if converts(reference, r)]
+
+
+@pytest.mark.parametrize("options", [{}, {"mapping": True}, {"compact": True, "mapping": True}, {"lazy": True}])
+def test_serialize_round_trip(options):
+  current, reference = person_views(strict=False, **options)
+  for record in _batch(reference, 8):
+    obj, expected = current(json.loads(json.dumps(record))), reference(json.loads(json.dumps(record)))
+
+    assert obj.serialize() == expected.serialize(), record
+    assert json.loads(obj.to_json()) == json.loads(expected.to_json())
+    again = current(obj.serialize())
+    assert again.serialize() == reference(expected.serialize()).serialize()
+    if not obj.__error__:  # fields with errors are serialized as None, the defaults are used on the way back
+      assert again.serialize() == obj.serialize()
+
+
+def test_none_values_are_kept_on_request():
+  current, reference = person_views(mapping=True)
+  record = {"name": None, "meta": {"a": None, "b": 1}, "a_url": None, "addr": {"city": None}}
+  obj = current(dict(record))
+
+  assert obj.serialize() == reference(dict(record)).serialize() == {
+    "id": 0, "score": 0, "tags": [], "book": {}, "addrs": [], "meta": {"b": 1}, "addr": {"zip": 0}
+  }
+  assert obj.serialize(skip_none=False) == {
+    "id": 0, "name": None, "score": 0, "tags": [], "raw": None, "meta": {"a": None, "b": 1}, "e-mail": None,
+    "addr": {"city": None, "zip": 0}, "addrs": [], "book": {}, "a_url": None
+  }
+  assert current(obj.serialize(skip_none=False)).serialize() == obj.serialize()
+
+
+def test_instance_attributes_are_serialized():
+  current, reference = person_views()
+  obj, expected = current({"id": 1}), reference({"id": 1})
+  obj.extra = expected.extra = {"x": [1, 2], "y": None}
+
+  assert obj.serialize() == expected.serialize() == {
+    "id": 1, "score": 0, "tags": [], "addrs": [], "book": {}, "extra": {"x": [1, 2]}
+  }
+
+
+def _custom(base):
+  class CustomView(base):
+    value: int = 0
+
+    def serialize(self, *args) -> dict:
+      return {"custom": self.value}
+  return CustomView
+
+
+def _holder(base, custom):
+  class HolderView(base):
+    item: custom = None
+    items: list = []
+  return HolderView
+
+
+def test_nested_view_with_own_serialize():
+  current, reference = both(_holder, both(_custom))
+  obj, expected = current({"item": {"value": 1}}), reference({"item": {"value": 1}})
+  obj.items, expected.items = [obj.item], [expected.item]
+
+  assert obj.serialize() == expected.serialize() == {"item": {"custom": 1}, "items": [{"custom": 1}]}
+
+
+def test_dump_and_dump_list():
+  current, reference = person_views()
+  batch = _batch(reference, 9)
+  views = current.from_list(json.loads(json.dumps(batch)))
+
+  fp = io.StringIO()
+  current.dump_list(views, fp)
+  assert json.loads(fp.getvalue()) == [reference(r).serialize() for r in batch]
+
+  fp = io.StringIO()
+  current.dump_list(iter([]), fp)
+  assert fp.getvalue() == "[]"
+
+  fp = io.StringIO()
+  views[0].dump(fp, skip_none=False)
+  assert json.loads(fp.getvalue()) == views[0].serialize(skip_none=False)
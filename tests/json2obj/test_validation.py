@@ -0,0 +1,104 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+import json
+
+from modules.apputils.json2obj import SerializableObject, ValidationReport
+
+from .views import person_views, records, converts, error_lines
+
+NESTED = ("addr", "addrs", "book")
+
+
+def _flat_records(seed: int):
+  return [{k: v for k, v in r.items() if k not in NESTED} for r in records(seed)]
+
+
+def _reference_errors(reference, record: dict):
+  try:
+    reference(json.loads(json.dumps(record)))
+    return None
+  except ValueError as e:
+    return error_lines(str(e))[1:]  # without the report header
+
+
+def test_report_is_equivalent_to_reference():
+  current, reference = person_views(mapping=True)
+  batch = _flat_records(11)
+  report = current.validate(batch)
+
+  assert report.records == len(batch)
+  assert report.indexes == [i for i, r in enumerate(batch) if not converts(reference, r)]
+  for index in report.indexes:
+    assert sorted(report.messages(index)) == _reference_errors(reference, batch[index])
+
+
+def test_report_is_the_same_as_of_the_conversion():
+  current, _ = person_views()
+  batch = list(records(12))
+  converted, columns = ValidationReport(), ValidationReport()
+  current.from_list(json.loads(json.dumps(batch)), report=converted)
+  current.from_list(json.loads(json.dumps(batch)), columnar=True, report=columns)
+
+  assert str(current.validate(json.loads(json.dumps(batch)))) == str(converted) == str(columns)
+
+
+def test_nested_and_not_object_records():
+  current, _ = person_views()
+  report = current.validate([{"addr": {"city": 1}, "id": "x"}, None, "{}", {"id": 1}])
+
+  assert report.indexes == [0, 2] and len(report) == 2 and report
+  assert report.messages(0)[0].startswith("Conflicting type in schema and data for object 'PersonView'")
+  assert report.messages(0)[1].startswith("Nested view is not valid: A number of errors happen:")
+  assert report.messages(2) == ["Record is not a JSON object, got 'str'"]
+  assert report.messages(3) == []
+
+
+def test_report_continues_record_indexes():
+  current, _ = person_views()
+  report = current.validate([{"id": 1}, {"id": "x"}])
+  current.validate([{"id": "y"}], report)
+
+  assert (report.indexes, report.records) == ([1, 2], 3)
+  assert str(report).splitlines()[0] == "2 of 3 records are invalid"
+
+
+class Sample(object):
+  formatted = 0
+
+  def __str__(self) -> str:
+    Sample.formatted += 1
+    return "sample"
+
+
+class ValueView(SerializableObject):
+  value: int = 0
+
+
+def test_messages_are_formatted_on_read():
+  Sample.formatted = 0
+  report = ValueView.validate([{"value": Sample()} for _ in range(100)])
+  assert len(report) == 100 and Sample.formatted == 0
+
+  assert report.messages(5) == [
+    "Conflicting type in schema and data for object 'ValueView', expecting 'int' but got 'Sample' (value: sample)"
+  ]
+  assert Sample.formatted == 1
+
+  assert ValueView.validate([{"value": 1}] * 10).indexes == []
@@ -0,0 +1,123 @@
+#  Licensed to the Apache Software Foundation (ASF) under one or more
+#  contributor license agreements.  See the NOTICE file distributed with
+#  this work for additional information regarding copyright ownership.
+#  The ASF licenses this file to You under the Apache License, Version 2.0
+#  (the "License"); you may not use this file except in compliance with
+#  the License.  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+#  Github: https://github.com/hapylestat/apputils
+#
+#
+
+"""
+Views declared over the current and the reference converter (see legacy.both) with the record generator
+"""
+import json
+import random
+from typing import Dict, Iterator, List
+
+from modules.apputils.json2obj import SerializableObject, CompactMeta
+
+from .legacy import both
+
+
+def _meta(base, compact: bool):
+  # reference converter keeps defaults in the class __dict__, the reference view is never compact
+  return CompactMeta if compact and base is SerializableObject else type
+
+
+def address_view(compact: bool = False):
+  def declare(base):
+    class AddressView(base, metaclass=_meta(base, compact)):
+      city: str = None
+      zip: int = 0
+    return AddressView
+  return declare
+
+
+def person_view(strict: bool = True, mapping: bool = False, compact: bool = False, lazy: bool = False):
+  def declare(base, address):
+    class PersonView(base, metaclass=_meta(base, compact)):
+      __strict__ = strict
+      __lazy__ = lazy
+      __aliases__ = {"e_mail": "e-mail"}
+      __mapping__ = {"urls": "_url"} if mapping else {}
+
+      id: int = 0
+      name: str = None
+      score: float = 0.0
+      tags: List[str] = []
+      raw: list = None
+      meta: Dict[str, int] = None
+      e_mail: str = None
+      urls: dict = None
+      addr: address = None
+      addrs: List[address] = []
+      book: Dict[str, address] = {}
+    return PersonView
+  return declare
+
+
+def person_views(compact: bool = False, **options):
+  """
+  :return: person view over the current and the reference converter
+  """
+  return both(person_view(compact=compact, **options), both(address_view(compact)))
+
+
+VALUES = {
+  "id": [1, "2", "", "x", 3.5],
+  "name": ["a", 5, None],
+  "score": [1.5, 2, "3.5", ""],
+  "tags": [["a", 1], "s", [], ["b"]],
+  "raw": [[1, 2], None, 3],
+  "meta": [{"a": 1, "b": "2"}, {"a": "x"}, {"a": True, "b": 2.5, "c": ""}, "m", {"a": None}],
+  "addr": [{"city": "c", "zip": 1}, None, 5, {"bad": 1}, {"city": 1, "zip": "9"}, {"zip": ""}],
+  "addrs": [[{"city": "x"}, {"zip": 2}], [], [{"q": 1}], "s"],
+  "book": [{"home": {"city": "x"}}, {"work": {"zip": "1"}}, {}, {"x": None}],
+  "e-mail": ["m", 3],
+  "e_mail": ["n"],
+  "a_url": ["u", None],
+  "b_url": ["v"],
+  "other": [1]
+}
+
+
+def records(seed: int, count: int = 300) -> Iterator[dict]:
+  rnd = random.Random(seed)
+  for _ in range(count):
+    yield {k: rnd.choice(v) for k, v in VALUES.items() if rnd.random() < 0.5}
+
+
+def error_lines(message: str) -> List[str]:
+  """
+  Unknown keys are reported by the reference converter in the set order
+  """
+  return sorted(message.strip().split("\n- "))
+
+
+def converts(clazz, record: dict) -> bool:
+  try:
+    clazz(json.loads(json.dumps(record)))
+    return True
+  except ValueError:
+    return False
+
+
+def state(clazz, record: dict):
+  """
+  :return: result of the conversion of the record copy
+  """
+  try:
+    obj = clazz(json.loads(json.dumps(record)))
+    return "ok", obj.serialize(), sorted(map(str, obj.__error__))
+  except ValueError as e:
+    return "error", error_lines(str(e))